@@ -0,0 +1,182 @@
+/*
+ * Client-side search for publication.html.
+ *
+ * The prebuilt index (publication-search.json, written by the publication
+ * updater) is only fetched the first time the search form is used. Entries
+ * of the generated list are numbered in page order, which is the document
+ * numbering of the index. Postings are delta-encoded and decoded on demand.
+ */
+(function () {
+  'use strict';
+
+  var INDEX_URL = 'publication-search.json';
+  var STOPWORDS = ['a', 'an', 'and', 'for', 'in', 'of', 'on', 'the', 'to', 'with', 'via', 'by', 'at', 'from'];
+
+  var form = document.getElementById('pub-search');
+  var list = document.getElementById('pub-list');
+  if (!form || !list) {
+    return;
+  }
+  var query = document.getElementById('pub-search-query');
+  var status = document.getElementById('pub-search-status');
+  var facetSelects = {
+    year: document.getElementById('pub-search-year'),
+    venue: document.getElementById('pub-search-venue'),
+    author: document.getElementById('pub-search-author')
+  };
+
+  var index = null;
+  var loading = null;
+  var decoded = {};
+
+  function entries() {
+    var items = [];
+    for (var node = list.firstElementChild; node; node = node.nextElementSibling) {
+      if (node.tagName === 'LI') {
+        items.push(node);
+      }
+    }
+    return items;
+  }
+
+  function decode(deltas) {
+    var ids = [];
+    var id = 0;
+    for (var i = 0; i < deltas.length; i++) {
+      id += deltas[i];
+      ids.push(id);
+    }
+    return ids;
+  }
+
+  function tokenize(text) {
+    var folded = text.normalize ? text.normalize('NFKD').replace(/[̀-ͯ]/g, '') : text;
+    var tokens = folded.toLowerCase().match(/[a-z0-9]+/g) || [];
+    return tokens.filter(function (token) {
+      return STOPWORDS.indexOf(token) < 0;
+    });
+  }
+
+  // Ids of every document with a term starting with the given prefix
+  function prefixMatches(prefix) {
+    if (decoded[prefix]) {
+      return decoded[prefix];
+    }
+    var terms = index.terms;
+    var low = 0;
+    var high = terms.length;
+    while (low < high) {
+      var mid = (low + high) >> 1;
+      if (terms[mid] < prefix) {
+        low = mid + 1;
+      } else {
+        high = mid;
+      }
+    }
+    var found = {};
+    for (var i = low; i < terms.length && terms[i].lastIndexOf(prefix, 0) === 0; i++) {
+      decode(index.postings[i]).forEach(function (id) {
+        found[id] = true;
+      });
+    }
+    decoded[prefix] = found;
+    return found;
+  }
+
+  function facetMatches(name, value) {
+    var found = {};
+    decode(index.facets[name][value] || []).forEach(function (id) {
+      found[id] = true;
+    });
+    return found;
+  }
+
+  function populate(select, values) {
+    Object.keys(values).sort(function (a, b) {
+      // Newest years first, everything else by number of publications
+      if (select === facetSelects.year) {
+        return b.localeCompare(a);
+      }
+      return values[b].length - values[a].length || a.localeCompare(b);
+    }).forEach(function (value) {
+      var option = document.createElement('option');
+      option.value = value;
+      option.textContent = value + ' (' + values[value].length + ')';
+      select.appendChild(option);
+    });
+  }
+
+  function setVisible(item, visible) {
+    // Separators after an entry are hidden with it
+    for (var node = item; node; node = node.nextElementSibling) {
+      if (node !== item && node.tagName !== 'BR') {
+        break;
+      }
+      node.style.display = visible ? '' : 'none';
+    }
+  }
+
+  function apply() {
+    if (!index) {
+      return;
+    }
+    var items = entries();
+    var filters = tokenize(query.value).map(prefixMatches);
+    Object.keys(facetSelects).forEach(function (name) {
+      if (facetSelects[name] && facetSelects[name].value) {
+        filters.push(facetMatches(name, facetSelects[name].value));
+      }
+    });
+
+    var shown = 0;
+    items.forEach(function (item, id) {
+      var visible = filters.every(function (found) {
+        return found[id];
+      });
+      setVisible(item, visible);
+      shown += visible ? 1 : 0;
+    });
+    status.textContent = filters.length ? shown + ' of ' + items.length + ' publications' : '';
+  }
+
+  function load() {
+    if (loading) {
+      return loading;
+    }
+    status.textContent = 'Loading search index...';
+    loading = fetch(INDEX_URL).then(function (response) {
+      if (!response.ok) {
+        throw new Error(response.status);
+      }
+      return response.json();
+    }).then(function (data) {
+      if (data.count !== entries().length) {
+        status.textContent = 'Search is unavailable until the publication list is next updated.';
+        return;
+      }
+      index = data;
+      Object.keys(facetSelects).forEach(function (name) {
+        if (facetSelects[name]) {
+          populate(facetSelects[name], index.facets[name] || {});
+        }
+      });
+      status.textContent = '';
+      apply();
+    }).catch(function () {
+      status.textContent = 'Search is unavailable right now.';
+    });
+    return loading;
+  }
+
+  form.addEventListener('focusin', load);
+  form.addEventListener('pointerenter', load);
+  form.addEventListener('submit', function (event) {
+    event.preventDefault();
+  });
+  query.addEventListener('input', apply);
+  Object.keys(facetSelects).forEach(function (name) {
+    if (facetSelects[name]) {
+      facetSelects[name].addEventListener('change', apply);
+    }
+  });
+}());
@@ -0,0 +1,56 @@
+"""Benchmark the publication updater's stages on synthetic Scholar data,
+optionally comparing the results with a stored baseline. Run from the
+repository root."""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from pubupdater.benchmark import BASELINE_PATH, REGRESSION_TOLERANCE, SCALES, compare, run_benchmarks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the publication updater offline")
+    parser.add_argument('--scales', default=','.join(str(scale) for scale in SCALES),
+                        help="comma-separated publication counts (default: %(default)s)")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per benchmark, best is kept (default: 3)")
+    parser.add_argument('--only', default=None, help="comma-separated benchmark names to run")
+    parser.add_argument('--output', default=os.path.join('_build', 'benchmark.json'),
+                        help="results file (default: %(default)s)")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="baseline to compare with (default: %(default)s)")
+    parser.add_argument('--tolerance', type=float, default=REGRESSION_TOLERANCE,
+                        help="slowdown counted as a regression (default: %(default)s)")
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the new baseline")
+    parser.add_argument('--check', action='store_true', help="exit non-zero if any benchmark regressed")
+    args = parser.parse_args()
+
+    scales = [int(scale) for scale in args.scales.split(',') if scale.strip()]
+    only = set(args.only.split(',')) if args.only else None
+    results = run_benchmarks(scales, repeat=args.repeat, only=only)
+
+    paths = [args.output] + ([args.baseline] if args.save_baseline else [])
+    for path in paths:
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=1)
+            f.write('\n')
+        print(f"Wrote {path}")
+
+    if args.save_baseline or not os.path.exists(args.baseline):
+        return
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {args.baseline} ({baseline.get('created_at', 'unknown date')}):")
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"{len(regressions)} benchmarks are more than {args.tolerance:.0%} slower than the baseline")
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
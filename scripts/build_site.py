@@ -0,0 +1,101 @@
+"""Build the static site from the shared templates in _templates/ and the
+data files in _data/. Run from the repository root."""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sitebuild.audit import audit_site
+from sitebuild.dist import build_dist
+from sitebuild.images import build_images
+from sitebuild.links import LINK_WORKERS, PER_HOST, check_links
+from sitebuild.pages import build_pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the AIMS Lab site")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    pages = subparsers.add_parser('pages', help="regenerate templated pages whose inputs changed")
+    pages.add_argument('--force', action='store_true', help="rebuild every page")
+    pages.add_argument('--jobs', type=int, default=None, help="worker processes (default: CPU count)")
+    pages.add_argument('--dry-run', action='store_true', help="only report which pages are stale")
+
+    images = subparsers.add_parser('images', help="generate responsive image variants and rewrite <img> tags")
+    images.add_argument('pages', nargs='*', help="pages to process (default: every top-level page)")
+    images.add_argument('--jobs', type=int, default=None, help="worker processes (default: CPU count)")
+    images.add_argument('--dry-run', action='store_true', help="only report what would be encoded")
+
+    audit = subparsers.add_parser('audit', help="report page weight and check it against budgets")
+    audit.add_argument('pages', nargs='*', help="pages to audit (default: every top-level page)")
+    audit.add_argument('--budgets', default=None, help="budget file (default: _data/budgets.json)")
+    audit.add_argument('--output', default=None, help="write the JSON report here instead of stdout")
+
+    links = subparsers.add_parser('links', help="check every local and external link of the pages")
+    links.add_argument('pages', nargs='*', help="pages to check (default: every top-level page)")
+    links.add_argument('--local-only', action='store_true', help="skip the external links")
+    links.add_argument('--cache', default=None, help="link result cache (default: _build/link-cache.json)")
+    links.add_argument('--jobs', type=int, default=LINK_WORKERS, help="concurrent requests (default: %(default)s)")
+    links.add_argument('--per-host', type=int, default=PER_HOST,
+                       help="concurrent requests to one host (default: %(default)s)")
+    links.add_argument('--output', default=None, help="write the JSON report here instead of stdout")
+
+    dist = subparsers.add_parser('dist', help="write a deployable copy with fingerprinted, precompressed assets")
+    dist.add_argument('--output', default=None, help="output directory (default: _site)")
+    dist.add_argument('--no-critical-css', action='store_true',
+                      help="keep render-blocking stylesheet links instead of inlining critical CSS")
+    dist.add_argument('--no-minify', action='store_true', help="copy pages without minifying them")
+
+    args = parser.parse_args()
+
+    if args.command == 'pages':
+        result = build_pages(force=args.force, jobs=args.jobs, dry_run=args.dry_run)
+        if result is None:
+            sys.exit(1)
+    elif args.command == 'audit':
+        report, over_budget = audit_site(pages=args.pages or None, budgets_path=args.budgets)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=1, sort_keys=True)
+                f.write('\n')
+            for page in report['over_budget']:
+                for violation in report['pages'][page]['violations']:
+                    print(f"{page}: {violation['metric']} {violation['value']} exceeds {violation['limit']}")
+        else:
+            json.dump(report, sys.stdout, indent=1, sort_keys=True)
+            print()
+        if over_budget:
+            sys.exit(1)
+    elif args.command == 'links':
+        report, broken = check_links(pages=args.pages or None, external=not args.local_only, cache_path=args.cache,
+                                     workers=args.jobs, per_host=args.per_host)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=1, sort_keys=True)
+                f.write('\n')
+            for page, page_report in report['pages'].items():
+                for link in page_report['broken']:
+                    print(f"{page}:{link['line']}: {link['url']} ({link.get('status') or link['error']})")
+                for line in page_report['placeholders']:
+                    print(f"{page}:{line}: [pdf] link points at #")
+            totals = report['totals']
+            print(f"{report['broken']} broken links and {report['placeholders']} placeholders in {totals['pages']} pages; "
+                  f"{totals['external_checked']} external URLs checked, {totals['external_cached']} from the cache")
+        else:
+            json.dump(report, sys.stdout, indent=1, sort_keys=True)
+            print()
+        if broken:
+            sys.exit(1)
+    elif args.command == 'dist':
+        build_dist(output_dir=args.output, critical_css=not args.no_critical_css,
+                   minify=not args.no_minify)
+    elif args.command == 'images':
+        if build_images(pages=args.pages or None, jobs=args.jobs, dry_run=args.dry_run) is None:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
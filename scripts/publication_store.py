@@ -0,0 +1,67 @@
+"""Import into, query and export the SQLite publication store that the
+publication update scripts write. Run from the repository root."""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from pubupdater.store import LAB_SOURCE, PublicationStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the publication store")
+    parser.add_argument('--store', default=None, help="database file (default: $PUBLICATION_STORE or _build/publications.db)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    load = subparsers.add_parser('import', help="import a JSON list of publication records in one transaction")
+    load.add_argument('file', help="JSON file with a list of publication dicts")
+    load.add_argument('--source', default=LAB_SOURCE, help="source (profile or member) the records belong to")
+    load.add_argument('--partial', action='store_true',
+                      help="only upsert; keep the source's publications missing from the file")
+
+    query = subparsers.add_parser('query', help="print matching publications as JSON, newest first")
+    query.add_argument('--year', type=int, default=None)
+    query.add_argument('--venue', default=None)
+    query.add_argument('--author', default=None)
+    query.add_argument('--source', default=None, help="publications listed by a source, e.g. a member")
+    query.add_argument('--limit', type=int, default=None)
+
+    export = subparsers.add_parser('export', help="export every publication, newest first")
+    export.add_argument('--format', choices=('json', 'bibtex'), default='json')
+    export.add_argument('--output', required=True, help="file to write")
+
+    args = parser.parse_args()
+    store = PublicationStore(args.store) if args.store else PublicationStore.from_env()
+
+    if args.command == 'import':
+        with open(args.file, 'r', encoding='utf-8') as f:
+            publications = json.load(f)
+        store.import_publications(publications, source=args.source, complete=not args.partial)
+    elif args.command == 'query':
+        if args.year is not None:
+            records = store.by_year(args.year, args.limit)
+        elif args.venue:
+            records = store.by_venue(args.venue, args.limit)
+        elif args.author:
+            records = store.by_author(args.author, args.limit)
+        elif args.source:
+            records = store.by_source(args.source, args.limit)
+        else:
+            records = store.newest(args.limit)
+        json.dump(records, sys.stdout, indent=1, ensure_ascii=False)
+        print()
+    elif args.command == 'export':
+        if args.format == 'bibtex':
+            store.export_bibtex(args.output)
+        else:
+            store.export_json(args.output)
+        print(f"Exported {len(store)} publications to {args.output}")
+
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Helpers shared by the publication update scripts in ``scripts/``."""
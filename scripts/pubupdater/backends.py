@@ -0,0 +1,69 @@
+"""Registry of the listing backends the updater chains as fallbacks.
+
+A backend takes ``{source: scholar id}`` and a publication cache and
+returns ``{source: records}``, with an empty list for every profile it
+could not scrape. Each one is registered by the module and function that
+implement it and imported only when a run actually reaches it, so the
+common HTTP-only run never loads selenium or scholarly:
+
+- ``http``: plain requests, profiles scraped concurrently (members.py)
+- ``selenium``: one headless Chrome session for every profile (browser.py)
+- ``scholarly``: the scholarly library (scholarly_backend.py)
+- ``replay``: the HTTP backend answered from the recorded cassette
+  (cassette.py)
+"""
+
+import importlib
+import os
+
+from pubupdater.metrics import span
+
+BACKENDS = {
+    'http': ('pubupdater.members', 'scrape_profiles'),
+    'selenium': ('pubupdater.browser', 'scrape_profiles_with_browser'),
+    'scholarly': ('pubupdater.scholarly_backend', 'scrape_profiles_with_scholarly'),
+    'replay': ('pubupdater.cassette', 'scrape_profiles_from_cassette'),
+}
+
+# Selenium needs a full Chrome install, so it is only in the default chain
+# when SCHOLAR_USE_SELENIUM=1
+DEFAULT_BACKENDS = os.getenv('SCHOLAR_BACKENDS') or ','.join(
+    ['http'] + (['selenium'] if os.getenv('SCHOLAR_USE_SELENIUM') == '1' else []) + ['scholarly'])
+
+
+def parse_backends(names):
+    """Split a comma-separated backend chain, rejecting unknown names"""
+    backends = [name.strip() for name in names.split(',') if name.strip()]
+    unknown = [name for name in backends if name not in BACKENDS]
+    if unknown:
+        raise ValueError(f"unknown backends: {', '.join(unknown)} (choose from {', '.join(BACKENDS)})")
+    return backends
+
+
+def load_backend(name):
+    """Import a backend's module and return its scrape function"""
+    module, function = BACKENDS[name]
+    return getattr(importlib.import_module(module), function)
+
+
+def scrape_with_fallbacks(profiles, backends, cache=None):
+    """Scrape profiles with each backend in turn, passing on only the ones still missing
+
+    Returns {source: records}; profiles no backend could scrape map to an
+    empty list. A backend whose dependencies are not installed is skipped.
+    """
+    listings = {source: [] for source in profiles}
+    for name in backends:
+        missing = {source: profiles[source] for source in profiles if not listings[source]}
+        if not missing:
+            break
+        if len(missing) < len(profiles):
+            print(f"Trying the {name} backend for {', '.join(missing)}...")
+        try:
+            with span(name):
+                scraped = load_backend(name)(missing, cache)
+        except ImportError as e:
+            print(f"Skipping the {name} backend: {e}")
+            continue
+        listings.update({source: records for source, records in scraped.items() if records})
+    return listings
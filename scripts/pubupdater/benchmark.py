@@ -0,0 +1,258 @@
+"""Offline benchmarks of the publication updater's stages.
+
+Synthetic Scholar profiles of a given size are generated from a seeded
+random vocabulary, so every run measures the same data without touching
+the network. For each scale the suite times:
+
+- extraction: parsing the listing as the HTTP backend sees it (pages of
+  ``PAGE_SIZE`` rows) and as the browser backend sees it (one expanded
+  ``page_source`` snapshot)
+- dedup, sorting, and the store's import and newest-first query
+- building the search index
+- rendering ``publication.html`` and ``aimslab.html`` in every render
+  mode (marker splicing, parser patching and full parser rebuilds), both
+  for a typical update of a previously rendered list and for a rerun
+  with nothing to change
+
+Targets are copies of the real pages with their lists pre-rendered from
+the synthetic data. Each benchmark reports the best of its repeats, and
+results can be compared against a stored baseline.
+"""
+
+import contextlib
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from pubupdater import render
+from pubupdater.dedup import dedupe_publications
+from pubupdater.http_backend import PAGE_SIZE, parse_publication_rows
+from pubupdater.render import FULL_VIEW, RECENT_COUNT, RECENT_VIEW, render_targets, sort_publications
+from pubupdater.search import build_search_index
+from pubupdater.splice import render_region, splice_region
+from pubupdater.store import PublicationStore
+
+SCALES = (100, 1000, 10000)
+
+BASELINE_PATH = os.path.join('scripts', 'benchmark_baseline.json')
+
+# A benchmark more than this much slower than its baseline is a regression,
+# unless it lost less than MIN_REGRESSION_SECONDS (timer noise on tiny runs)
+REGRESSION_TOLERANCE = 0.25
+MIN_REGRESSION_SECONDS = 0.01
+
+# (render mode, splice enabled) for each benchmarked way of rendering
+RENDER_MODES = {
+    'splice': ('patch', True),
+    'patch': ('patch', False),
+    'rebuild': ('rebuild', False),
+}
+
+VENUES = (
+    'IEEE INFOCOM', 'ACM MobiCom', 'IEEE Transactions on Mobile Computing', 'IEEE Access',
+    'IEEE International Conference on Communications', 'ACM SenSys', 'arXiv preprint',
+    'IEEE Internet of Things Journal', 'ACM/IEEE IPSN', 'IEEE Globecom',
+)
+
+
+def vocabulary(rng, size=3000):
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(4, 10))))
+    return sorted(words)
+
+
+def synthetic_publications(count, seed=1):
+    """Return count listing records, about 3% of them preprint twins of another"""
+    rng = random.Random(seed)
+    words = vocabulary(rng)
+    authors = [f"{rng.choice('ABCDEFGHJKLMNPRSTW')} {word.capitalize()}" for word in rng.sample(words, 400)]
+    publications = []
+    for i in range(count):
+        if publications and rng.random() < 0.03:
+            original = rng.choice(publications)
+            pub = dict(original, venue=f"arXiv preprint arXiv:{2000 + i % 500}.{i:05d}",
+                       title=original['title'] + rng.choice(('', ':', ' (extended)')))
+        else:
+            year = str(rng.randint(2012, 2025))
+            pub = {
+                'title': ' '.join(rng.choice(words) for _ in range(rng.randint(6, 12))).capitalize(),
+                'authors': ', '.join(rng.sample(authors, rng.randint(2, 6))) + ', S Baidya',
+                'venue': f"{rng.choice(VENUES)} {rng.randint(1, 40)}, {rng.randint(1, 900)}-{rng.randint(901, 999)}",
+                'year': year,
+            }
+        cid = f"SYNTH:{i:06d}"
+        pub.update({
+            'url': f"https://scholar.google.com/citations?view_op=view_citation&hl=en&user=SYNTH&citation_for_view={cid}",
+            'citation_id': cid,
+            'citations': str(rng.randint(0, 300)),
+            'pdf_link': f"https://example.org/papers/{i}.pdf" if rng.random() < 0.6 else '',
+        })
+        publications.append(pub)
+    return publications
+
+
+def profile_row_html(pub):
+    """Render a record as a Scholar ``gsc_a_tr`` listing row"""
+    href = pub['url'].replace('https://scholar.google.com', '').replace('&', '&amp;')
+    return (
+        f'<tr class="gsc_a_tr"><td class="gsc_a_t"><a href="{href}" class="gsc_a_at">{pub["title"]}</a>'
+        f'<div class="gs_gray">{pub["authors"]}</div>'
+        f'<div class="gs_gray">{pub["venue"]}<span class="gs_oph">, {pub["year"]}</span></div></td>'
+        f'<td class="gsc_a_c"><a href="#" class="gsc_a_ac gs_ibl">{pub["citations"]}</a></td>'
+        f'<td class="gsc_a_y"><span class="gsc_a_h gsc_a_hc gs_ibl">{pub["year"]}</span></td></tr>'
+    )
+
+
+def profile_page_html(publications, more=False):
+    """Render a profile listing page holding the given records"""
+    rows = ''.join(profile_row_html(pub) for pub in publications)
+    disabled = '' if more else ' disabled=""'
+    return (f'<html><body><table id="gsc_a_t"><tbody id="gsc_a_b">{rows}</tbody></table>'
+            f'<button type="button" id="gsc_bpf_more"{disabled}>Show more</button></body></html>')
+
+
+def previous_publications(publications, seed=2):
+    """The list as a previous run rendered it: a few new papers missing, a few records changed"""
+    rng = random.Random(seed)
+    new = max(1, len(publications) // 100)
+    previous = []
+    for pub in publications[new:]:
+        if rng.random() < 0.02:
+            pub = dict(pub, venue=pub['venue'] + ' (to appear)')
+        previous.append(pub)
+    return previous
+
+
+def write_targets(root, directory, publications):
+    """Copy the real target pages into directory with their lists rendered from publications"""
+    ordered = sort_publications(publications)
+    for page, view, limit in (('publication.html', FULL_VIEW, None), ('aimslab.html', RECENT_VIEW, RECENT_COUNT)):
+        with open(os.path.join(root, page), 'rb') as f:
+            data = f.read()
+        selected = ordered if limit is None else ordered[:limit]
+        data = splice_region(data, view['marker'], render_region(selected, view['format_entry']))
+        if data is None:
+            raise ValueError(f"{page} has no {view['marker']} region markers")
+        with open(os.path.join(directory, page), 'wb') as f:
+            f.write(data)
+
+
+def targets_in(directory):
+    return [
+        (os.path.join(directory, 'publication.html'), [(FULL_VIEW, None)]),
+        (os.path.join(directory, 'aimslab.html'), [(RECENT_VIEW, RECENT_COUNT)]),
+    ]
+
+
+def measure(func, repeat=3, setup=None):
+    """Best wall time of repeat runs of func(setup()), with its output silenced"""
+    best = None
+    for _ in range(repeat):
+        value = setup() if setup else None
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            func(value) if setup else func()
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+@contextlib.contextmanager
+def render_mode(mode, splice):
+    """Temporarily switch the renderer's configured mode"""
+    saved = render.RENDER_MODE, render.SPLICE_ENABLED
+    render.RENDER_MODE, render.SPLICE_ENABLED = mode, splice
+    try:
+        yield
+    finally:
+        render.RENDER_MODE, render.SPLICE_ENABLED = saved
+
+
+def benchmark_scale(count, root='.', repeat=3, only=None):
+    """Run every benchmark at one scale and return {name: result}"""
+    publications = synthetic_publications(count)
+    ordered = sort_publications(publications)
+    pages = [profile_page_html(publications[start:start + PAGE_SIZE], start + PAGE_SIZE < count)
+             for start in range(0, count, PAGE_SIZE)]
+    snapshot = profile_page_html(publications)
+    previous = previous_publications(ordered)
+
+    benchmarks = {
+        'extract_http': lambda: [parse_publication_rows(page) for page in pages],
+        'extract_snapshot': lambda: parse_publication_rows(snapshot),
+        'dedup': lambda: dedupe_publications(publications),
+        'sort': lambda: sort_publications(publications),
+        'store_import': lambda: PublicationStore(':memory:').import_publications(publications),
+        'search_index': lambda: build_search_index(ordered),
+    }
+
+    store = PublicationStore(':memory:')
+    with contextlib.redirect_stdout(io.StringIO()):
+        store.import_publications(publications)
+    benchmarks['store_newest'] = lambda: store.newest()
+
+    results = {}
+    for name, func in benchmarks.items():
+        if only and name not in only:
+            continue
+        results[name] = measure(func, repeat)
+
+    directory = tempfile.mkdtemp(prefix='pubbench-')
+    try:
+        for mode, (render_mode_name, splice) in RENDER_MODES.items():
+            for scenario, start_from in (('update', previous), ('unchanged', ordered)):
+                name = f'render_{mode}_{scenario}'
+                if only and name not in only:
+                    continue
+                with render_mode(render_mode_name, splice):
+                    results[name] = measure(
+                        lambda _: render_targets(ordered, targets_in(directory)), repeat,
+                        setup=lambda start_from=start_from: write_targets(root, directory, start_from))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    return {name: {'seconds': round(seconds, 6), 'per_item_us': round(seconds / count * 1e6, 3)}
+            for name, seconds in results.items()}
+
+
+def run_benchmarks(scales=SCALES, root='.', repeat=3, only=None):
+    """Run the suite at every scale and return the results document"""
+    results = {}
+    for count in scales:
+        print(f"Benchmarking {count} publications...")
+        # Large scales take a while per run, so they are repeated less
+        results[str(count)] = benchmark_scale(count, root, repeat if count < 10000 else 1, only)
+        for name, result in results[str(count)].items():
+            print(f"  {name}: {result['seconds'] * 1000:.1f} ms ({result['per_item_us']:.1f} us/publication)")
+    return {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': sys.version.split()[0],
+        'results': results,
+    }
+
+
+def compare(current, baseline, tolerance=REGRESSION_TOLERANCE):
+    """Compare results with a baseline and return the regressions
+
+    Each regression is (scale, benchmark, baseline seconds, current
+    seconds). Benchmarks missing from either side are skipped.
+    """
+    regressions = []
+    for scale, results in sorted(current['results'].items(), key=lambda item: int(item[0])):
+        for name, result in results.items():
+            before = baseline.get('results', {}).get(scale, {}).get(name)
+            if before is None or not before['seconds']:
+                continue
+            ratio = result['seconds'] / before['seconds']
+            slower = result['seconds'] - before['seconds'] >= MIN_REGRESSION_SECONDS
+            flag = ' REGRESSION' if ratio > 1 + tolerance and slower else ''
+            print(f"{scale:>6} {name:<26} {before['seconds'] * 1000:10.1f} ms -> "
+                  f"{result['seconds'] * 1000:10.1f} ms  {ratio:5.2f}x{flag}")
+            if flag:
+                regressions.append((scale, name, before['seconds'], result['seconds']))
+    return regressions
@@ -0,0 +1,212 @@
+"""Headless Chrome session for the Selenium fallback.
+
+The browser only fetches documents and scripts: images, fonts, stylesheets
+and media are blocked at the network layer, since only the listing's rows
+are read. One session is started lazily and reused for every profile of a
+run. Expanding the listing waits on the page itself rather than on fixed
+sleeps: each "Show more" click returns as soon as new ``gsc_a_tr`` rows
+appear or the button is disabled, and gives up after a timeout. Rows are
+then read from a single ``page_source`` snapshot with the HTTP backend's
+parser, so extraction costs the same two WebDriver calls however long the
+listing is, and yields the same dicts as the HTTP backend.
+
+Selenium is imported on first use, so the rest of the package works
+without it.
+"""
+
+import os
+from urllib.parse import urlparse
+
+from pubupdater.cassette import active_cassette
+from pubupdater.details import fetch_all_details
+from pubupdater.http_backend import IncompleteListing, parse_publication_rows, profile_url
+from pubupdater.metrics import span
+
+# Seconds to wait for a listing to load or grow after a click
+BROWSER_TIMEOUT = float(os.getenv('SCHOLAR_BROWSER_TIMEOUT', '15'))
+
+# Upper bound on "Show more" clicks per profile (100 rows each)
+MAX_CLICKS = 50
+
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+              '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+
+BLOCKED_URLS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico',
+    '*.css', '*.woff', '*.woff2', '*.ttf', '*.otf', '*.mp4', '*.webm',
+]
+
+HIDE_WEBDRIVER = "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+
+# Clicks "Show more" and resolves once the row count grows, the button is
+# disabled or removed, or the timeout (arguments[0], ms) passes. Resolves
+# with [row count, whether the listing is complete].
+EXPAND_SCRIPT = """
+var done = arguments[arguments.length - 1];
+var timeout = arguments[0];
+var rowCount = function () { return document.querySelectorAll('tr.gsc_a_tr').length; };
+var button = document.getElementById('gsc_bpf_more');
+var before = rowCount();
+if (!button || button.disabled) {
+  done([before, true]);
+  return;
+}
+var state = function () { return [rowCount(), !button.isConnected || button.disabled]; };
+var timer = null;
+var observer = new MutationObserver(function () {
+  var current = state();
+  if (current[0] > before || current[1]) {
+    observer.disconnect();
+    clearTimeout(timer);
+    done(current);
+  }
+});
+observer.observe(document.body, {childList: true, subtree: true, attributes: true, attributeFilter: ['disabled']});
+timer = setTimeout(function () {
+  observer.disconnect();
+  done(state());
+}, timeout);
+button.click();
+"""
+
+
+def browser_options():
+    """Chrome options for a headless browser that skips non-document resources"""
+    from selenium.webdriver.chrome.options import Options
+
+    options = Options()
+    options.add_argument('--headless=new')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--window-size=1280,800')
+    options.add_argument('--disable-blink-features=AutomationControlled')
+    options.add_argument('--disable-extensions')
+    options.add_argument('--blink-settings=imagesEnabled=false')
+    options.add_argument(f'--user-agent={USER_AGENT}')
+    options.add_experimental_option('excludeSwitches', ['enable-automation'])
+    options.add_experimental_option('useAutomationExtension', False)
+    options.add_experimental_option('prefs', {
+        'profile.managed_default_content_settings.images': 2,
+        'profile.managed_default_content_settings.fonts': 2,
+        'profile.managed_default_content_settings.stylesheets': 2,
+    })
+    # Return from get() once the DOM is parsed instead of waiting for every subresource
+    options.page_load_strategy = 'eager'
+    return options
+
+
+def create_driver():
+    """Start Chrome with resource blocking and the webdriver flag hidden on every page"""
+    from selenium import webdriver
+
+    with span('browser_start'):
+        driver = webdriver.Chrome(options=browser_options())
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URLS})
+        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': HIDE_WEBDRIVER})
+    return driver
+
+
+def expand_listing(driver, timeout=BROWSER_TIMEOUT, max_clicks=MAX_CLICKS):
+    """Click "Show more" until every row is loaded
+
+    Returns (row count, whether the listing was loaded to its end).
+    """
+    driver.set_script_timeout(timeout + 5)
+    rows = driver.execute_script("return document.querySelectorAll('tr.gsc_a_tr').length")
+    for clicks in range(max_clicks):
+        count, complete = driver.execute_async_script(EXPAND_SCRIPT, int(timeout * 1000))
+        if complete:
+            return count, True
+        if count <= rows:
+            print(f"No new rows within {timeout:g}s after {clicks} clicks, stopping at {count}")
+            return count, False
+        rows = count
+        print(f"Loaded {rows} rows")
+    print(f"Stopped after {max_clicks} clicks with {rows} rows")
+    return rows, False
+
+
+def listing_rows(html, url):
+    """Parse every loaded row of a page snapshot into publication dicts"""
+    location = urlparse(url)
+    return parse_publication_rows(html, f"{location.scheme}://{location.netloc}")
+
+
+class BrowserSession:
+    """A headless Chrome started on first use and reused across profiles"""
+
+    def __init__(self, timeout=BROWSER_TIMEOUT):
+        self.timeout = timeout
+        self.driver = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def load_listing(self, url):
+        """Open a profile and load every row of its listing, see expand_listing"""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        if self.driver is None:
+            self.driver = create_driver()
+        with span('browser_load', url=url):
+            self.driver.get(url)
+            WebDriverWait(self.driver, self.timeout).until(
+                EC.presence_of_element_located((By.CLASS_NAME, 'gsc_a_tr'))
+            )
+        with span('browser_expand', url=url):
+            return expand_listing(self.driver, self.timeout)
+
+    def scrape_listing(self, url):
+        """Load a profile's full listing and return its rows
+
+        When a cassette is replayed the recorded snapshot is parsed and no
+        browser is started. Raises IncompleteListing if the listing could
+        not be loaded to its end.
+        """
+        cassette = active_cassette()
+        if cassette is not None and cassette.replaying:
+            return listing_rows(cassette.page_source(url), url)
+        _, complete = self.load_listing(url)
+        with span('browser_extract', url=url):
+            html = self.driver.page_source
+            if cassette is not None:
+                cassette.record_page_source(url, html)
+            rows = listing_rows(html, self.driver.current_url)
+        if not complete:
+            raise IncompleteListing(f"only {len(rows)} rows loaded", rows)
+        return rows
+
+    def close(self):
+        if self.driver is not None:
+            self.driver.quit()
+            self.driver = None
+
+
+def scrape_profiles_with_browser(profiles, cache=None):
+    """Listing backend: scrape every profile in one browser session
+
+    Details are filled by the HTTP detail fetcher, as for the HTTP backend.
+    Raises ImportError up front when selenium is not installed.
+    """
+    import selenium
+
+    listings = {}
+    with BrowserSession() as browser:
+        for source, scholar_id in profiles.items():
+            url = profile_url(scholar_id)
+            try:
+                print(f"Accessing Google Scholar: {url}")
+                rows = browser.scrape_listing(url)
+                print(f"Successfully extracted {len(rows)} publications")
+            except Exception as e:
+                print(f"Error scraping with Selenium: {e}")
+                rows = []
+            listings[source] = fetch_all_details(rows, cache) if rows else []
+    return listings
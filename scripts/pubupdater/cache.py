@@ -0,0 +1,205 @@
+"""Persistent on-disk cache of scraped publication records.
+
+Entries are keyed by a stable publication id (the Scholar citation id, or
+the normalized title when there is none) and remember a hash of the
+listing row they were fetched for. A run only has to fetch details for
+rows that are new, changed or expired; everything else is served from a
+single JSON file that can be committed or restored in CI. Hits do not
+touch the file, so a quiet week leaves it byte-for-byte unchanged.
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pubupdater.metrics import count
+
+DEFAULT_CACHE_PATH = os.path.join('scripts', 'publication_cache.json')
+
+CACHE_VERSION = 1
+
+# Listing fields that identify a row's content. Citation counts are left
+# out on purpose: they change weekly and are always taken from the listing.
+LISTING_FIELDS = ('title', 'authors', 'venue', 'year')
+
+DAY = 24 * 60 * 60
+
+
+def normalize_title(title):
+    """Lowercase a title and strip punctuation and repeated whitespace"""
+    title = re.sub(r'[^\w\s]', ' ', (title or '').lower())
+    return ' '.join(title.split())
+
+
+def author_names(authors):
+    """Return the individual author names of an authors string"""
+    return [name.strip() for name in re.split(r',| and ', authors or '')
+            if name.strip() and name.strip() != '...']
+
+
+def publication_id(pub):
+    """Return the stable cache key for a publication dict"""
+    if pub.get('citation_id'):
+        return pub['citation_id']
+    return 'title:' + normalize_title(pub.get('title', ''))
+
+
+def listing_hash(pub):
+    """Hash the listing fields of a publication row"""
+    content = '\x1f'.join(str(pub.get(field) or '') for field in LISTING_FIELDS)
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+class PublicationCache:
+    """Single-file JSON cache of full publication records"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_age_days=90, evict_unseen=True, max_entries=0):
+        self.path = path
+        self.max_age = max_age_days * DAY if max_age_days else None
+        self.evict_unseen = evict_unseen
+        self.max_entries = max_entries or None
+        self.entries = {}
+        self.seen = set()
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+
+    @classmethod
+    def from_env(cls):
+        """Build a cache configured through PUBLICATION_CACHE* variables"""
+        cache = cls(
+            path=os.getenv('PUBLICATION_CACHE', DEFAULT_CACHE_PATH),
+            max_age_days=float(os.getenv('PUBLICATION_CACHE_MAX_AGE_DAYS', '90')),
+            evict_unseen=os.getenv('PUBLICATION_CACHE_EVICT_UNSEEN', '1') == '1',
+            max_entries=int(os.getenv('PUBLICATION_CACHE_MAX_ENTRIES', '0')),
+        )
+        cache.load()
+        return cache
+
+    def load(self):
+        """Load entries from disk, starting empty if the file is missing or stale"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable publication cache {self.path}: {e}")
+            return
+
+        if data.get('version') != CACHE_VERSION:
+            print(f"Ignoring publication cache {self.path} with unknown version")
+            return
+        self.entries = data.get('entries', {})
+        print(f"Loaded {len(self.entries)} cached publications from {self.path}")
+
+    def save(self):
+        """Write the cache back to disk if anything changed"""
+        if not self.dirty:
+            return False
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Write to a temporary file first so an interrupted run never
+        # leaves a truncated cache behind
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': CACHE_VERSION, 'entries': self.entries}, f,
+                      indent=1, sort_keys=True, ensure_ascii=False)
+            f.write('\n')
+        os.replace(tmp_path, self.path)
+
+        self.dirty = False
+        print(f"Saved {len(self.entries)} cached publications to {self.path}")
+        return True
+
+    def lookup(self, pub, now=None):
+        """Return the cached record for a listing row, or None if it must be fetched"""
+        now = now or time.time()
+        key = publication_id(pub)
+        self.seen.add(key)
+        entry = self.entries.get(key)
+
+        if (entry is None
+                or entry['hash'] != listing_hash(pub)
+                or (self.max_age and now - entry['fetched_at'] > self.max_age)):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        record = dict(entry['record'])
+        if pub.get('citations'):
+            record['citations'] = pub['citations']
+        return record
+
+    def store(self, pub, record, now=None):
+        """Remember the full record fetched for a listing row"""
+        key = publication_id(pub)
+        self.seen.add(key)
+        self.entries[key] = {
+            'hash': listing_hash(pub),
+            'fetched_at': int(now or time.time()),
+            'record': record,
+        }
+        self.dirty = True
+
+    def evict(self):
+        """Drop entries missing from this run's listing and trim to the size limit
+
+        Only call this after a complete listing was scraped, otherwise a
+        partial run would throw away perfectly good entries.
+        """
+        before = len(self.entries)
+
+        if self.evict_unseen and self.seen:
+            self.entries = {key: entry for key, entry in self.entries.items() if key in self.seen}
+
+        if self.max_entries and len(self.entries) > self.max_entries:
+            newest = sorted(self.entries.items(), key=lambda item: item[1]['fetched_at'], reverse=True)
+            self.entries = dict(newest[:self.max_entries])
+
+        evicted = before - len(self.entries)
+        if evicted:
+            self.dirty = True
+            print(f"Evicted {evicted} stale publications from the cache")
+        return evicted
+
+
+def refresh_publications(listing, fill, cache=None, max_workers=1):
+    """Return full records for listing rows, calling fill() only on cache misses
+
+    Misses are filled on a pool of max_workers threads; a row whose fill
+    fails or returns nothing keeps its listing data and is not cached.
+    """
+    records = []
+    pending = []
+    for i, pub in enumerate(listing):
+        record = cache.lookup(pub) if cache is not None else None
+        records.append(record)
+        if record is None:
+            pending.append(i)
+
+    def safe_fill(pub):
+        try:
+            return fill(pub)
+        except Exception as e:
+            print(f"Error fetching details for '{pub.get('title', '')[:50]}': {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        filled = pool.map(safe_fill, [listing[i] for i in pending])
+        for i, record in zip(pending, filled):
+            if record and cache is not None:
+                cache.store(listing[i], record)
+            records[i] = record or listing[i]
+
+    if cache is not None:
+        print(f"Publication cache: {cache.hits} hits, {cache.misses} fetched")
+    count('cache_hits', len(listing) - len(pending))
+    count('cache_misses', len(pending))
+    return records
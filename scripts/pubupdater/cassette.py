@@ -0,0 +1,209 @@
+"""Record and replay the updater's network traffic.
+
+With ``SCHOLAR_CASSETTE_MODE=record`` every HTTP response the scrapers
+receive (and the expanded page source of each profile the Selenium
+fallback loads) is captured into the gzip-compressed JSON cassette named
+by ``SCHOLAR_CASSETTE``, which is written when the run ends. With
+``SCHOLAR_CASSETTE_MODE=replay`` the same requests are answered from the
+cassette instead: nothing goes over the network, no browser is started
+and the rate limiter is bypassed, so a full run takes well under a second.
+A request missing from the cassette fails at once, as a connection error
+would, and is never retried. ``--backends replay`` replays a run without
+setting the mode.
+
+Requests are keyed by method and URL with the query parameters sorted.
+The scholarly fallback uses its own HTTP client and is not recorded.
+"""
+
+import atexit
+import gzip
+import json
+import os
+import threading
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+CASSETTE_PATH = os.getenv('SCHOLAR_CASSETTE', os.path.join('_build', 'scholar-cassette.json.gz'))
+
+# 'record', 'replay', or empty to use the network as usual
+CASSETTE_MODE = os.getenv('SCHOLAR_CASSETTE_MODE', '')
+
+CASSETTE_VERSION = 1
+
+_active = None
+_active_lock = threading.Lock()
+
+
+class CassetteMiss(requests.ConnectionError):
+    """Raised when a replayed request is not in the cassette"""
+
+
+def request_key(method, url):
+    """Cassette key of a request, independent of query parameter order"""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return f"{method.upper()} {urlunsplit((parts.scheme, parts.netloc, parts.path, query, ''))}"
+
+
+class Cassette:
+    """Recorded responses, keyed by request"""
+
+    def __init__(self, path=CASSETTE_PATH, mode='replay'):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"unknown cassette mode {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.dirty = False
+        if mode == 'replay' or os.path.exists(path):
+            self.load()
+
+    @property
+    def replaying(self):
+        return self.mode == 'replay'
+
+    def load(self):
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != CASSETTE_VERSION:
+            raise ValueError(f"{self.path} is not a version {CASSETTE_VERSION} cassette")
+        self.entries = data['entries']
+        print(f"Loaded {len(self.entries)} recorded responses from {self.path}")
+
+    def save(self):
+        """Write the cassette if anything was recorded"""
+        with self.lock:
+            if not self.dirty:
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            # mtime=0 keeps the file identical when the same traffic is recorded again
+            with open(tmp_path, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as f:
+                f.write(json.dumps({'version': CASSETTE_VERSION, 'entries': self.entries},
+                                   sort_keys=True, separators=(',', ':')).encode('utf-8'))
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+            print(f"Recorded {len(self.entries)} responses to {self.path}")
+
+    def record(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+            self.dirty = True
+
+    def lookup(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is None:
+            raise CassetteMiss(f"{key} is not in {self.path}")
+        return entry
+
+    def record_response(self, request, response):
+        self.record(request_key(request.method, request.url), {
+            'status': response.status_code,
+            'url': response.url,
+            'content_type': response.headers.get('Content-Type', ''),
+            'body': response.text,
+        })
+
+    def replay_response(self, request):
+        """Build the recorded response to a prepared request"""
+        entry = self.lookup(request_key(request.method, request.url))
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.url = entry['url']
+        response.headers = CaseInsensitiveDict({'Content-Type': entry['content_type']})
+        response._content = entry['body'].encode('utf-8')
+        response.encoding = 'utf-8'
+        response.request = request
+        response.reason = 'Replayed'
+        return response
+
+    def record_page_source(self, url, html):
+        self.record(request_key('SOURCE', url), {'body': html})
+
+    def page_source(self, url):
+        return self.lookup(request_key('SOURCE', url))['body']
+
+
+class RecordingAdapter(HTTPAdapter):
+    """HTTP adapter that copies every response into a cassette"""
+
+    def __init__(self, cassette, **kwargs):
+        self.cassette = cassette
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        self.cassette.record_response(request, response)
+        return response
+
+
+class ReplayAdapter(BaseAdapter):
+    """Adapter that answers every request from a cassette"""
+
+    def __init__(self, cassette):
+        super().__init__()
+        self.cassette = cassette
+
+    def send(self, request, **kwargs):
+        return self.cassette.replay_response(request)
+
+    def close(self):
+        pass
+
+
+def active_cassette():
+    """Return the cassette configured for this process, or None"""
+    global _active
+    if _active is None and not CASSETTE_MODE:
+        return None
+    with _active_lock:
+        if _active is None:
+            _active = Cassette(CASSETTE_PATH, CASSETTE_MODE)
+            if not _active.replaying:
+                atexit.register(_active.save)
+        return _active
+
+
+def use_cassette(mode, path=CASSETTE_PATH):
+    """Record to or replay from a cassette for the rest of the process
+
+    Must be called before the first session or rate limiter is created.
+    """
+    global _active
+    with _active_lock:
+        if _active is None or (_active.mode, _active.path) != (mode, path):
+            _active = Cassette(path, mode)
+            if not _active.replaying:
+                atexit.register(_active.save)
+        return _active
+
+
+def replaying():
+    """True when requests are served from a cassette"""
+    cassette = active_cassette()
+    return cassette is not None and cassette.replaying
+
+
+def create_adapter(**kwargs):
+    """Return an HTTP adapter for the scrapers, recording or replaying if configured"""
+    cassette = active_cassette()
+    if cassette is None:
+        return HTTPAdapter(**kwargs)
+    if cassette.replaying:
+        return ReplayAdapter(cassette)
+    return RecordingAdapter(cassette, **kwargs)
+
+
+def scrape_profiles_from_cassette(profiles, cache=None):
+    """Listing backend: the HTTP backend answered from the cassette only"""
+    from pubupdater.members import scrape_profiles
+
+    use_cassette('replay')
+    return scrape_profiles(profiles, cache)
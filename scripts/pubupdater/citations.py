@@ -0,0 +1,147 @@
+"""Citation-count refresh and citation history.
+
+Titles, authors and venues of published papers rarely change, but their
+citation counts do every week. The fast refresh fetches only the lab
+profile's listing pages, which carry each paper's count, and rewrites the
+citation figures of the rendered pages in place (see
+``render.refresh_citation_figures``) without fetching detail pages,
+deduplicating or re-rendering any entry.
+
+A run also appends the counts to ``scripts/citation_history.jsonl``, an
+append-only time series stored by column, unless they are the counts of
+its last row. A ``{"columns": [...]}`` line declares citation ids the
+first time they are seen; each recorded run adds one
+``{"date": ..., "counts": [...]}`` line whose counts line up with every
+column declared before it, null for a paper the run did not list.
+"""
+
+import json
+import os
+import time
+
+from pubupdater.http_backend import IncompleteListing, scrape_scholar_with_http
+from pubupdater.metrics import count, span
+from pubupdater.render import CITES_RE, citation_counts, refresh_citation_figures
+
+HISTORY_PATH = os.getenv('CITATION_HISTORY', os.path.join('scripts', 'citation_history.jsonl'))
+
+# Pages whose publication entries show citation figures
+CITATION_PAGES = ('publication.html',)
+
+
+def load_history(path=HISTORY_PATH):
+    """Return (columns, rows) of the history, rows as (date, counts) pairs"""
+    columns, rows = [], []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if 'columns' in entry:
+                    columns.extend(entry['columns'])
+                else:
+                    rows.append((entry['date'], entry['counts']))
+    except FileNotFoundError:
+        pass
+    return columns, rows
+
+
+def last_counts(columns, rows):
+    """Return {citation id: count} of the last history row"""
+    if not rows:
+        return None
+    return {cid: value for cid, value in zip(columns, rows[-1][1]) if value is not None}
+
+
+def append_history(counts, path=HISTORY_PATH, date=None):
+    """Append one run's citation counts, declaring any new citation ids first
+
+    Returns False without writing anything if the counts are those of the
+    last recorded row.
+    """
+    columns, rows = load_history(path)
+    if last_counts(columns, rows) == counts:
+        print(f"Citation counts are unchanged since the last entry of {path}")
+        return False
+    known = set(columns)
+    new = sorted(cid for cid in counts if cid not in known)
+    columns.extend(new)
+
+    lines = []
+    if new:
+        lines.append({'columns': new})
+    lines.append({'date': date or time.strftime('%Y-%m-%d', time.gmtime()),
+                  'counts': [counts.get(cid) for cid in columns]})
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        for line in lines:
+            f.write(json.dumps(line, separators=(',', ':')) + '\n')
+    print(f"Appended the counts of {len(counts)} publications to {path}")
+    return True
+
+
+def refresh_pages(paths, counts, dry_run=False):
+    """Update the citation figures of every page, writing only changed files
+
+    Returns (changed paths, citation ids found on the pages).
+    """
+    changed = []
+    seen = set()
+    for path in paths:
+        try:
+            with open(path, 'rb') as f:
+                original = f.read()
+        except OSError as e:
+            print(f"Error reading {path}: {e}")
+            continue
+        seen.update(match.group(2).decode('utf-8') for match in CITES_RE.finditer(original))
+        output, updated = refresh_citation_figures(original, counts)
+        count('citation_figures_updated', updated)
+        if output == original:
+            print(f"{path} citation counts are already up to date")
+            continue
+
+        changed.append(path)
+        if dry_run:
+            print(f"{path} would change ({updated} citation counts)")
+            continue
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(output)
+        os.replace(tmp_path, path)
+        print(f"Updated {updated} citation counts in {path}")
+    return changed, seen
+
+
+def refresh_citations(scholar_id, paths, store=None, history_path=HISTORY_PATH, dry_run=False):
+    """Refresh only the citation counts of a profile's publications
+
+    Returns (success, changed paths). Publications that are not on the
+    pages yet are only recorded in the history; a full update adds them.
+    An incomplete listing still refreshes the figures it has counts for,
+    but is not recorded in the history.
+    """
+    complete = True
+    with span('citation_listing'):
+        try:
+            publications = scrape_scholar_with_http(scholar_id)
+        except IncompleteListing as e:
+            print(f"Incomplete listing ({e}), refreshing only the counts it has")
+            publications, complete = e.publications, False
+    counts = citation_counts(publications)
+    if not counts:
+        print("No citation counts scraped, leaving the pages alone")
+        return False, []
+
+    with span('citation_pages'):
+        changed, seen = refresh_pages(paths, counts, dry_run)
+    missing = len(set(counts) - seen)
+    if missing:
+        print(f"{missing} listed publications are not on the pages yet, run a full update to add them")
+    if store is not None:
+        store.update_citations(counts)
+    if complete and not dry_run and append_history(counts, history_path):
+        changed.append(history_path)
+    return True, changed
@@ -0,0 +1,181 @@
+"""Command line entry point of the publication updater.
+
+``scripts/update_publications.py`` and ``scripts/updatepublication.py``
+both run ``main()``; they only differ in the pages they render. Profiles
+are scraped by a chain of backends (see backends.py), each one tried on
+the profiles the previous ones could not scrape. Modules that only some
+runs need, the fallback backends and the site builder, are imported when
+a run reaches them.
+"""
+
+import argparse
+import os
+
+from pubupdater.backends import DEFAULT_BACKENDS, parse_backends, scrape_with_fallbacks
+from pubupdater.cache import PublicationCache
+from pubupdater.cassette import CASSETTE_PATH, use_cassette
+from pubupdater.citations import CITATION_PAGES, HISTORY_PATH, append_history, refresh_citations
+from pubupdater.dedup import dedupe_publications
+from pubupdater.members import member_profiles, write_member_publications
+from pubupdater.metrics import METRICS_PATH, PROFILE_PATH, TRACE_PATH, count, run_instrumented, span
+from pubupdater.probe import PROBE_STATE_PATH, PROBE_UNCHANGED_STATUS, probe_profiles, save_fingerprints
+from pubupdater.render import DEFAULT_TARGETS, citation_counts, render_targets, report_changes
+from pubupdater.search import SEARCH_INDEX_PATH, write_search_index
+from pubupdater.store import LAB_SOURCE, SNAPSHOT_PATH, PublicationStore
+
+SCHOLAR_ID = os.getenv('SCHOLAR_ID', 'UY1UAKUAAAAJ')
+
+DESCRIPTION = "Update the publication lists from Google Scholar"
+
+
+def update(scholar_id=SCHOLAR_ID, backends=None, targets=DEFAULT_TARGETS, probe=False, citations_only=False):
+    """Scrape the lab's and members' profiles and update every generated page
+
+    backends is the list of listing backends to chain, by default the
+    configured DEFAULT_BACKENDS.
+    """
+    print("Starting publication update process...")
+    print(f"Target Scholar URL: https://scholar.google.com/citations?user={scholar_id}&hl=en")
+
+    # With --citations-only, only the listing pages are fetched and just
+    # the citation counts on the pages change
+    if citations_only:
+        with span('citations'):
+            store = PublicationStore.from_env()
+            store.load_snapshot()
+            success, changed = refresh_citations(scholar_id, CITATION_PAGES, store)
+            if success and store.save_snapshot():
+                changed.append(SNAPSHOT_PATH)
+        count('files_changed', len(changed))
+        report_changes(changed)
+        if not success:
+            exit(1)
+        return
+
+    members = member_profiles()
+    profiles = {LAB_SOURCE: scholar_id, **members}
+
+    # With --probe, the first listing page of each profile is fingerprinted
+    # and the run stops there if none changed since the last full update
+    fingerprints = None
+    if probe:
+        with span('probe'):
+            unchanged, fingerprints = probe_profiles(profiles)
+        if unchanged:
+            print("Skipping the update, no profile changed")
+            report_changes([])
+            exit(PROBE_UNCHANGED_STATUS)
+
+    # PDF links and full author lists are filled once per paper however
+    # many profiles list it
+    cache = PublicationCache.from_env()
+    with span('scrape'):
+        listings = scrape_with_fallbacks(profiles, backends or parse_backends(DEFAULT_BACKENDS), cache)
+    scraped_all = all(listings.values())
+    publications = listings.pop(LAB_SOURCE)
+
+    # Records are only evicted when every profile was scraped, so a failed
+    # member profile does not lose its cached details
+    with span('cache_save'):
+        if scraped_all:
+            cache.evict()
+        cache.save()
+
+    if not publications:
+        print("No publications found with any backend. Exiting.")
+        return
+
+    # Collapse preprint/published duplicates before anything is rendered
+    with span('dedup'):
+        publications = dedupe_publications(publications)
+
+    # Import each profile's listing into the store; pages are rendered
+    # from its indexed newest-first queries. The last run's snapshot goes
+    # in first so that profiles that failed keep their records, then the
+    # members, so that the lab's own listing has the last word on papers
+    # they share
+    with span('store'):
+        store = PublicationStore.from_env()
+        store.load_snapshot()
+        for member, records in listings.items():
+            if records:
+                store.import_publications(dedupe_publications(records), source=member)
+        store.import_publications(publications)
+        publications = store.by_source(LAB_SOURCE)
+
+    print(f"Found {len(publications)} publications")
+
+    # Print first few publications for verification
+    print("\nFirst 3 publications found:")
+    for i, pub in enumerate(publications[:3], 1):
+        print(f"{i}. {pub['title'][:60]}... ({pub['year']})")
+
+    # Render every target, writing only the files whose content changed
+    with span('render'):
+        success, changed = render_targets(publications, targets)
+    with span('search_index'):
+        if write_search_index(publications):
+            changed.append(SEARCH_INDEX_PATH)
+    if store.save_snapshot():
+        changed.append(SNAPSHOT_PATH)
+
+    # Member pages list the publications of their own profile
+    with span('member_pages'):
+        member_files = write_member_publications(store, [m for m in members if listings.get(m)])
+        if member_files:
+            from sitebuild.pages import build_pages
+
+            changed.extend(member_files)
+            changed.extend(build_pages() or [])
+
+    # The lab's citation counts go into the history when any of them changed
+    if success and append_history(citation_counts(publications)):
+        changed.append(HISTORY_PATH)
+
+    # Fingerprints are only stored once every profile made it into the pages
+    if success and fingerprints and scraped_all and save_fingerprints(fingerprints):
+        changed.append(PROBE_STATE_PATH)
+    count('files_changed', len(changed))
+    report_changes(changed)
+
+    if not success:
+        print("Failed to update one or more files")
+        exit(1)
+    if changed:
+        print(f"Publications updated successfully in {', '.join(changed)}!")
+    else:
+        print("Publications are already up to date, nothing written")
+
+
+def parse_args(argv=None, description=DESCRIPTION):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--scholar-id', default=SCHOLAR_ID, help="the lab's Scholar profile id (default: %(default)s)")
+    parser.add_argument('--backends', default=DEFAULT_BACKENDS,
+                        help="comma-separated listing backends, tried in order as fallbacks "
+                             "(http, selenium, scholarly, replay; default: %(default)s)")
+    parser.add_argument('--metrics', default=METRICS_PATH, help=f"run metrics JSON file (default: {METRICS_PATH})")
+    parser.add_argument('--trace', default=TRACE_PATH or None, help="also write a Chrome trace of the run here")
+    parser.add_argument('--profile', nargs='?', const=PROFILE_PATH, default=None, metavar='FILE',
+                        help=f"capture the run with cProfile (default file: {PROFILE_PATH})")
+    parser.add_argument('--citations-only', action='store_true',
+                        help="only refresh the citation counts on the pages from the listing")
+    parser.add_argument('--probe', action='store_true',
+                        help=f"exit with status {PROBE_UNCHANGED_STATUS} without scraping if no profile changed")
+    args = parser.parse_args(argv)
+    try:
+        args.backends = parse_backends(args.backends)
+    except ValueError as e:
+        parser.error(str(e))
+    if 'replay' in args.backends and not os.path.exists(CASSETTE_PATH):
+        parser.error(f"there is no cassette to replay at {CASSETTE_PATH} (see SCHOLAR_CASSETTE)")
+    return args
+
+
+def main(argv=None, targets=DEFAULT_TARGETS, description=DESCRIPTION):
+    """Parse the command line and run an instrumented update"""
+    args = parse_args(argv, description)
+    if 'replay' in args.backends:
+        # Replayed runs must never reach Scholar, probe included
+        use_cassette('replay')
+    run_instrumented(lambda: update(args.scholar_id, args.backends, targets, args.probe, args.citations_only),
+                     args.metrics, args.trace, args.profile)
@@ -0,0 +1,223 @@
+"""Fuzzy deduplication of scraped publication records.
+
+Scholar profiles often list a paper twice, e.g. as an arXiv preprint and as
+the conference version with a slightly different title. Titles are broken
+into character n-grams and summarized by MinHash signatures; signatures are
+split into bands and records that share a band bucket become candidate
+pairs (locality-sensitive hashing), so only likely duplicates are ever
+compared and the stage stays far from quadratic on large merged sets.
+Candidates are confirmed by the exact n-gram Jaccard similarity, and each
+cluster is collapsed to one canonical record chosen by ``DEDUP_PREFER``.
+A cluster never spans two different peer-reviewed venues, so journal
+extensions of conference papers stay separate entries.
+"""
+
+import hashlib
+import os
+import random
+import re
+
+from pubupdater.cache import normalize_title
+
+# Set to 0 to keep every scraped record as is
+DEDUP_ENABLED = os.getenv('PUBLICATION_DEDUP', '1') == '1'
+
+# Minimum n-gram Jaccard similarity of two titles to count as duplicates
+DEDUP_THRESHOLD = float(os.getenv('PUBLICATION_DEDUP_THRESHOLD', '0.7'))
+
+# Ordered rules for picking a cluster's canonical record, see PREFERENCES
+DEDUP_PREFER = os.getenv('PUBLICATION_DEDUP_PREFER', 'peer_reviewed,citations,pdf,year')
+
+SHINGLE_SIZE = 3
+
+# 24 bands of 5 rows put the LSH threshold near 0.53: a pair at the
+# default DEDUP_THRESHOLD of 0.7 becomes a candidate ~99% of the time,
+# while unrelated titles (similarity ~0.1) almost never share a bucket
+BANDS = 24
+ROWS = 5
+
+STOPWORDS = {'a', 'an', 'and', 'as', 'at', 'based', 'by', 'for', 'from', 'in', 'into', 'of', 'on', 'or',
+             'over', 'the', 'to', 'towards', 'using', 'via', 'with'}
+
+PREPRINT_VENUES = ('arxiv', 'biorxiv', 'medrxiv', 'techrxiv', 'ssrn', 'preprint', 'corr')
+
+# Title words that tell otherwise identical titles apart, e.g. "Part II"
+DISTINGUISHING_RE = re.compile(r'\b(?:\d+|i{1,3}|iv|vi{0,3}|ix|x)\b')
+
+# Fixed random order in which each empty signature slot looks for a filled one
+_rng = random.Random(20240101)
+PROBES = [_rng.sample(range(BANDS * ROWS), BANDS * ROWS) for _ in range(BANDS * ROWS)]
+
+
+def is_preprint(pub):
+    """Return True for records whose venue is a preprint server or missing"""
+    venue = (pub.get('venue') or '').lower()
+    return not venue.strip() or any(name in venue for name in PREPRINT_VENUES)
+
+
+def venue_key(pub):
+    """Normalized venue name without years, volumes and pages"""
+    return ' '.join(re.sub(r'\d+', ' ', normalize_title(pub.get('venue', ''))).split())
+
+
+def citation_count(pub):
+    try:
+        return int(str(pub.get('citations') or '0').strip() or 0)
+    except ValueError:
+        return 0
+
+
+def year_value(pub):
+    try:
+        return int(pub.get('year'))
+    except (TypeError, ValueError):
+        return 0
+
+
+# Each rule maps a record to a sort key where higher is preferred
+PREFERENCES = {
+    'peer_reviewed': lambda pub: not is_preprint(pub),
+    'citations': citation_count,
+    'pdf': lambda pub: bool(pub.get('pdf_link')),
+    'year': year_value,
+}
+
+
+def preference_key(prefer=DEDUP_PREFER):
+    """Return a sort key implementing a comma-separated list of rules"""
+    rules = [PREFERENCES[name.strip()] for name in prefer.split(',') if name.strip()]
+    return lambda pub: tuple(rule(pub) for rule in rules)
+
+
+def shingles(title):
+    """Return the set of character n-grams of a normalized title
+
+    Stopwords are left out: they occur in most titles and would otherwise
+    put unrelated papers into the same LSH buckets.
+    """
+    words = [word for word in normalize_title(title).split() if word not in STOPWORDS]
+    text = f" {' '.join(words)} "
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def base_hashes(grams, memo):
+    """Return stable 64-bit hashes of n-grams, memoized across titles"""
+    hashes = []
+    for gram in grams:
+        value = memo.get(gram)
+        if value is None:
+            value = int.from_bytes(hashlib.blake2b(gram.encode('utf-8'), digest_size=8).digest(), 'big')
+            memo[gram] = value
+        hashes.append(value)
+    return hashes
+
+
+def minhash(hashes):
+    """One-permutation MinHash signature of a set of n-gram hashes
+
+    Each hash is used once: its low bits pick one of the signature slots
+    and the rest is min-reduced into it, so a title costs one pass over
+    its n-grams rather than one per slot. An empty slot copies the first
+    filled slot in its own fixed random probe order (optimal
+    densification), which keeps the rows of a band independent.
+    """
+    size = BANDS * ROWS
+    signature = [None] * size
+    for value in hashes:
+        slot = value % size
+        rest = value // size
+        if signature[slot] is None or rest < signature[slot]:
+            signature[slot] = rest
+    if not hashes:
+        return signature
+    filled = list(signature)
+    for i in range(size):
+        if filled[i] is None:
+            signature[i] = next(filled[j] for j in PROBES[i] if filled[j] is not None)
+    return signature
+
+
+def candidate_pairs(signatures):
+    """Return index pairs that share at least one LSH band bucket"""
+    pairs = set()
+    for band in range(BANDS):
+        buckets = {}
+        start = band * ROWS
+        for i, signature in enumerate(signatures):
+            buckets.setdefault(tuple(signature[start:start + ROWS]), []).append(i)
+        for members in buckets.values():
+            for a in range(len(members)):
+                for b in range(a + 1, len(members)):
+                    pairs.add((members[a], members[b]))
+    return pairs
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def same_distinguishers(a, b):
+    """Titles that differ only in a number or part numeral are distinct papers"""
+    return set(DISTINGUISHING_RE.findall(normalize_title(a))) == set(DISTINGUISHING_RE.findall(normalize_title(b)))
+
+
+def find_clusters(publications, threshold=DEDUP_THRESHOLD):
+    """Group the indexes of near-duplicate publications"""
+    memo = {}
+    grams = [shingles(pub.get('title', '')) for pub in publications]
+    signatures = [minhash(base_hashes(g, memo)) for g in grams]
+
+    parent = list(range(len(publications)))
+    # Peer-reviewed venues per cluster root: a journal extension of a
+    # conference paper is a separate publication, however similar the title
+    venues = [{venue_key(pub)} if not is_preprint(pub) else set() for pub in publications]
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for a, b in sorted(candidate_pairs(signatures)):
+        if (jaccard(grams[a], grams[b]) >= threshold
+                and same_distinguishers(publications[a].get('title', ''), publications[b].get('title', ''))):
+            root_a, root_b = find(a), find(b)
+            if root_a != root_b and len(venues[root_a] | venues[root_b]) <= 1:
+                parent[root_a] = root_b
+                venues[root_b] |= venues[root_a]
+
+    clusters = {}
+    for i in range(len(publications)):
+        clusters.setdefault(find(i), []).append(i)
+    return sorted(clusters.values())
+
+
+def merge_cluster(records, prefer=DEDUP_PREFER):
+    """Return the canonical record of a cluster, filling its gaps from the others"""
+    ranked = sorted(records, key=preference_key(prefer), reverse=True)
+    canonical = dict(ranked[0])
+    for other in ranked[1:]:
+        for field, value in other.items():
+            if value and not canonical.get(field):
+                canonical[field] = value
+    return canonical
+
+
+def dedupe_publications(publications, threshold=DEDUP_THRESHOLD, prefer=DEDUP_PREFER):
+    """Collapse near-duplicate records, keeping the listing order of the first of each"""
+    if not DEDUP_ENABLED or len(publications) < 2:
+        return publications
+
+    merged = []
+    for cluster in find_clusters(publications, threshold):
+        records = [publications[i] for i in cluster]
+        merged.append((cluster[0], merge_cluster(records, prefer) if len(records) > 1 else records[0]))
+        if len(records) > 1:
+            print(f"Merged {len(records)} records of '{records[0].get('title', '')[:60]}'")
+
+    merged.sort(key=lambda item: item[0])
+    if len(merged) < len(publications):
+        print(f"Deduplicated {len(publications)} records into {len(merged)} publications")
+    return [pub for _, pub in merged]
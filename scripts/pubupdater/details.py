@@ -0,0 +1,167 @@
+"""Concurrent fetching of per-publication detail pages.
+
+Every request made by a run draws from one process-wide token bucket, so
+the number of worker threads only bounds how many requests are in flight
+while the overall request rate stays under Scholar's limit. Retries of
+429 and 5xx responses go through with_retries and draw from the same
+bucket; the HTTP adapter itself never retries a response.
+"""
+
+import os
+import random
+import threading
+import time
+
+import requests
+from bs4 import BeautifulSoup
+
+from pubupdater.cache import refresh_publications
+from pubupdater.cassette import CassetteMiss, replaying
+from pubupdater.http_backend import create_session
+from pubupdater.metrics import count, span
+
+# Sustained requests per second and burst size of the shared limiter
+REQUEST_RATE = float(os.getenv('SCHOLAR_REQUEST_RATE', '2'))
+REQUEST_BURST = int(os.getenv('SCHOLAR_REQUEST_BURST', '4'))
+
+# Maximum number of detail pages fetched at the same time
+DETAIL_WORKERS = int(os.getenv('SCHOLAR_DETAIL_WORKERS', '8'))
+
+RETRIES = 3
+BACKOFF = 1.0
+
+# Response statuses worth retrying; any other HTTP error fails at once
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_shared_limiter = None
+_shared_limiter_lock = threading.Lock()
+
+
+class TokenBucket:
+    """Thread-safe token bucket rate limiter"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available and take it"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class Unlimited:
+    """Limiter for replayed runs, which never reach Scholar"""
+
+    def acquire(self):
+        pass
+
+
+def shared_limiter():
+    """Return the token bucket shared by every request of this process"""
+    global _shared_limiter
+    with _shared_limiter_lock:
+        if _shared_limiter is None:
+            _shared_limiter = Unlimited() if replaying() else TokenBucket(REQUEST_RATE, REQUEST_BURST)
+        return _shared_limiter
+
+
+def retryable(error):
+    """Whether a failed attempt may succeed when repeated"""
+    # A response missing from a replayed cassette will not appear on retry
+    if isinstance(error, CassetteMiss):
+        return False
+    response = getattr(error, 'response', None)
+    if isinstance(error, requests.HTTPError) and response is not None:
+        return response.status_code in RETRY_STATUSES
+    return True
+
+
+def with_retries(func, limiter=None, retries=None, backoff=None, retry_on=(requests.RequestException,)):
+    """Call func(), retrying with exponential backoff and jitter on failure
+
+    A token is taken from the limiter before every attempt, so retries are
+    charged against the same rate budget as first attempts. HTTP errors
+    are only retried for the statuses in RETRY_STATUSES.
+    """
+    retries = RETRIES if retries is None else retries
+    backoff = BACKOFF if backoff is None else backoff
+    for attempt in range(retries + 1):
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            return func()
+        except retry_on as e:
+            if attempt == retries or not retryable(e):
+                raise
+            delay = backoff * (2 ** attempt) * (1 + random.random() / 2)
+            count('retries')
+            print(f"Request failed ({e}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def parse_publication_details(html):
+    """Extract the PDF/eprint link and full author list from a detail page"""
+    soup = BeautifulSoup(html, 'html.parser')
+    details = {}
+
+    # The right-hand "[PDF] host" link is the eprint; fall back to the
+    # publisher link on the title
+    eprint = soup.select_one('.gsc_oci_title_ggi a, .gsc_vcd_title_ggi a')
+    title_link = soup.select_one('a.gsc_oci_title_link, a.gsc_vcd_title_link')
+    if eprint and eprint.get('href'):
+        details['pdf_link'] = eprint['href']
+    elif title_link and title_link.get('href'):
+        details['pdf_link'] = title_link['href']
+
+    for field in soup.select('.gsc_oci_field, .gsc_vcd_field'):
+        value = field.find_next_sibling('div')
+        if value is not None and field.get_text(strip=True) in ('Authors', 'Inventors'):
+            details['authors'] = value.get_text(' ', strip=True)
+            break
+
+    return details
+
+
+def fetch_publication_details(session, pub, limiter=None, timeout=30):
+    """Fetch a publication's detail page and return the merged record"""
+    def fetch():
+        response = session.get(pub['url'], timeout=timeout)
+        response.raise_for_status()
+        return response.text
+
+    with span('detail_page'):
+        html = with_retries(fetch, limiter)
+    record = dict(pub)
+    record.update(parse_publication_details(html))
+    return record
+
+
+def fetch_all_details(publications, cache=None, session=None, limiter=None, max_workers=DETAIL_WORKERS):
+    """Fill PDF links and full author lists for every publication concurrently"""
+    limiter = limiter or shared_limiter()
+    own_session = session is None
+    session = session or create_session(pool_size=max_workers)
+
+    def fill(pub):
+        if not pub.get('url'):
+            return None
+        return fetch_publication_details(session, pub, limiter)
+
+    try:
+        print(f"Fetching publication details with {max_workers} workers...")
+        return refresh_publications(publications, fill, cache, max_workers)
+    finally:
+        if own_session:
+            session.close()
@@ -0,0 +1,210 @@
+"""Browserless Google Scholar profile scraper.
+
+Fetches the paginated publication listing of a profile directly over a
+pooled HTTP session and parses the ``gsc_a_tr`` rows from the raw HTML,
+so no browser has to be started for the common path. A listing that
+stops before its last page raises IncompleteListing rather than passing
+for the whole profile, since callers delete what a listing lacks.
+"""
+
+import os
+import re
+from urllib.parse import parse_qs, urljoin, urlparse
+
+import requests
+from bs4 import BeautifulSoup
+from urllib3.util.retry import Retry
+
+from pubupdater.cassette import create_adapter
+from pubupdater.metrics import count, span
+
+# Override to point the scraper at a local fixture server
+SCHOLAR_BASE_URL = os.getenv('SCHOLAR_BASE_URL', 'https://scholar.google.com')
+
+# Largest page size the profile listing accepts
+PAGE_SIZE = 100
+
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+              '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+
+
+class IncompleteListing(Exception):
+    """A profile listing that stopped before its last page
+
+    publications holds the rows of the pages fetched before it stopped.
+    """
+
+    def __init__(self, message, publications):
+        super().__init__(message)
+        self.publications = publications
+
+
+class CountingRetry(Retry):
+    """Retry policy that counts every retry in the run metrics"""
+
+    def increment(self, *args, **kwargs):
+        count('retries')
+        return super().increment(*args, **kwargs)
+
+
+def record_response(response, *args, **kwargs):
+    """Response hook counting requests and bytes fetched"""
+    count('requests')
+    count('bytes_fetched', len(response.content))
+
+
+def create_session(pool_size=4, retries=3):
+    """Create a requests session with a pooled HTTP adapter
+
+    The adapter only retries connections that could not be established,
+    which never reach Scholar. Error responses such as 429 are retried by
+    details.with_retries instead, which takes a token from the shared
+    limiter for every attempt.
+    """
+    retry = CountingRetry(total=retries, connect=retries, read=0, status=0, other=0, backoff_factor=1)
+    adapter = create_adapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({
+        'User-Agent': USER_AGENT,
+        'Accept-Language': 'en-US,en;q=0.9',
+    })
+    session.hooks['response'].append(record_response)
+    return session
+
+
+def profile_url(scholar_id, base_url=None):
+    """Return the profile listing URL for a scholar id"""
+    base_url = (base_url or SCHOLAR_BASE_URL).rstrip('/')
+    return f"{base_url}/citations?user={scholar_id}&hl=en"
+
+
+def fetch_profile_page(session, scholar_id, cstart=0, page_size=PAGE_SIZE, base_url=None, timeout=30, sortby=None):
+    """Fetch one page of a profile's publication listing and return its HTML
+
+    The listing is sorted by citations unless sortby is given, e.g.
+    'pubdate' for the newest publications first.
+    """
+    base_url = (base_url or SCHOLAR_BASE_URL).rstrip('/')
+    params = {
+        'user': scholar_id,
+        'hl': 'en',
+        'cstart': cstart,
+        'pagesize': page_size,
+    }
+    if sortby:
+        params['sortby'] = sortby
+    response = session.get(f"{base_url}/citations", params=params, timeout=timeout)
+    response.raise_for_status()
+    return response.text
+
+
+def parse_publication_row(row, base_url=None):
+    """Turn a single ``gsc_a_tr`` row into a publication dict"""
+    title_element = row.find('a', class_='gsc_a_at')
+    if title_element is None:
+        return None
+    title = title_element.get_text(' ', strip=True)
+    if not title:
+        return None
+
+    # The first grey line holds the authors, the second the venue. The
+    # venue carries a phone-only ", <year>" suffix that browsers hide.
+    gray = row.find_all('div', class_='gs_gray')
+    authors = gray[0].get_text(' ', strip=True) if len(gray) > 0 else ""
+    venue = ""
+    if len(gray) > 1:
+        for hidden in gray[1].find_all('span', class_='gs_oph'):
+            hidden.decompose()
+        venue = gray[1].get_text(' ', strip=True)
+
+    year_element = row.find(class_='gsc_a_y')
+    year = year_element.get_text(strip=True) if year_element else ""
+
+    citation_element = row.find(class_='gsc_a_c')
+    citations = ""
+    if citation_element:
+        citations = re.sub(r'\D', '', citation_element.get_text(strip=True))
+
+    url = title_element.get('href', '')
+    citation_id = ""
+    if url:
+        url = urljoin((base_url or SCHOLAR_BASE_URL).rstrip('/') + '/', url)
+        citation_id = parse_qs(urlparse(url).query).get('citation_for_view', [""])[0]
+
+    return {
+        'title': title,
+        'authors': authors,
+        'venue': venue,
+        'year': year or "N/A",
+        'url': url,
+        'pdf_link': "",
+        'citations': citations or "0",
+        'citation_id': citation_id,
+    }
+
+
+def parse_publication_rows(html, base_url=None):
+    """Parse every ``gsc_a_tr`` row of a profile page into publication dicts"""
+    soup = BeautifulSoup(html, 'html.parser')
+    publications = []
+    for row in soup.find_all('tr', class_='gsc_a_tr'):
+        pub = parse_publication_row(row, base_url)
+        if pub:
+            publications.append(pub)
+    count('rows_parsed', len(publications))
+    return publications
+
+
+def has_more_pages(html):
+    """Return True if the page's "Show more" button is still enabled"""
+    match = re.search(r'<button[^>]*id="gsc_bpf_more"[^>]*>', html)
+    return bool(match) and 'disabled' not in match.group(0)
+
+
+def scrape_scholar_with_http(scholar_id, base_url=None, session=None, page_size=PAGE_SIZE,
+                             max_pages=50, limiter=None):
+    """Scrape Google Scholar publications over plain HTTP
+
+    Each page request, retries included, takes a token from the limiter
+    (by default the process-wide one shared with the detail fetcher). Returns an empty
+    list if the first page cannot be fetched, and raises IncompleteListing
+    if a later page fails or the listing runs past max_pages.
+    """
+    from pubupdater.details import shared_limiter, with_retries
+
+    limiter = limiter or shared_limiter()
+    base_url = base_url or SCHOLAR_BASE_URL
+    own_session = session is None
+    session = session or create_session()
+    publications = []
+
+    try:
+        print(f"Fetching Google Scholar profile over HTTP: {profile_url(scholar_id, base_url)}")
+        for page in range(max_pages):
+            cstart = page * page_size
+            with span('listing_page', user=scholar_id, page=page + 1):
+                html = with_retries(lambda: fetch_profile_page(session, scholar_id, cstart, page_size, base_url),
+                                    limiter)
+                rows = parse_publication_rows(html, base_url)
+            publications.extend(rows)
+            print(f"Fetched page {page + 1}: {len(rows)} publications (total {len(publications)})")
+
+            if len(rows) < page_size or not has_more_pages(html):
+                break
+        else:
+            raise IncompleteListing(f"the listing has more than {max_pages} pages", publications)
+
+    except requests.RequestException as e:
+        if publications:
+            raise IncompleteListing(f"page {page + 1} failed: {e}", publications) from e
+        print(f"Error scraping over HTTP: {e}")
+
+    finally:
+        if own_session:
+            session.close()
+
+    print(f"Successfully extracted {len(publications)} publications")
+    return publications
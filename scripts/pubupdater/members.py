@@ -0,0 +1,132 @@
+"""Scraping the Scholar profiles of individual lab members.
+
+A member opts in by adding ``"scholar_id"`` to their page data file
+``_data/pages/<member>.json``. Their profile is scraped alongside the
+lab's, each listing on its own thread; every request still draws from the
+shared rate limiter, so a run takes about as long as the slowest profile
+rather than the sum of all of them, without sending Scholar more traffic
+per second. A paper listed on several profiles has its detail page
+fetched once, through the shared publication cache, and is stored as one
+record linked to every profile that lists it. Each member's publications
+are written to ``_data/publications/<member>.json``, from which the
+member page build renders its Publications section.
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from pubupdater.cache import normalize_title
+from pubupdater.details import fetch_all_details, shared_limiter
+from pubupdater.http_backend import IncompleteListing, scrape_scholar_with_http
+from pubupdater.metrics import span
+from pubupdater.render import escape_attr, escape_text, pdf_href
+
+PAGES_DIR = os.path.join('_data', 'pages')
+PUBLICATIONS_DIR = os.path.join('_data', 'publications')
+
+# Maximum number of profile listings scraped at the same time
+PROFILE_WORKERS = int(os.getenv('SCHOLAR_PROFILE_WORKERS', '4'))
+
+
+def member_profiles(pages_dir=PAGES_DIR):
+    """Return {member: scholar id} for every page data file that has one"""
+    profiles = {}
+    if not os.path.isdir(pages_dir):
+        return profiles
+    for name in sorted(os.listdir(pages_dir)):
+        if not name.endswith('.json'):
+            continue
+        with open(os.path.join(pages_dir, name), 'r', encoding='utf-8') as f:
+            scholar_id = json.load(f).get('scholar_id')
+        if scholar_id:
+            profiles[os.path.splitext(name)[0]] = scholar_id
+    return profiles
+
+
+def scrape_profiles(profiles, cache=None, max_workers=PROFILE_WORKERS):
+    """Scrape several profiles concurrently and fetch their details once
+
+    profiles maps a source name to a scholar id. Rows with the same
+    normalized title on different profiles share one detail fetch and the
+    resulting citation id, so the store links them to a single record.
+    Returns {source: records} in listing order; a profile that could not
+    be scraped in full maps to an empty list.
+    """
+    if not profiles:
+        return {}
+    limiter = shared_limiter()
+    sources = list(profiles)
+    def scrape(source):
+        with span('profile', source=source):
+            try:
+                return scrape_scholar_with_http(profiles[source], limiter=limiter)
+            except IncompleteListing as e:
+                print(f"Dropping the incomplete listing of {source}: {e}")
+                return []
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(sources)))) as pool:
+        listings = dict(zip(sources, pool.map(scrape, sources)))
+
+    # One representative row per title, taken from the first source listing it
+    groups = {}
+    for source in sources:
+        for pub in listings[source]:
+            groups.setdefault(normalize_title(pub.get('title', '')), pub)
+    total = sum(len(rows) for rows in listings.values())
+    print(f"Scraped {total} rows from {len(sources)} profiles, {len(groups)} distinct titles")
+    if not groups:
+        return {source: [] for source in sources}
+
+    keys = list(groups)
+    with span('details'):
+        details = dict(zip(keys, fetch_all_details([groups[key] for key in keys], cache, limiter=limiter)))
+
+    results = {}
+    for source in sources:
+        records = []
+        for pub in listings[source]:
+            record = dict(details[normalize_title(pub.get('title', ''))])
+            # Citation counts are per listing; everything else is shared
+            if pub.get('citations') is not None:
+                record['citations'] = pub['citations']
+            records.append(record)
+        results[source] = records
+    return results
+
+
+def page_record(pub):
+    """Escaped fields of a publication as the member template expects them"""
+    return {
+        'title': escape_text(pub.get('title', '')),
+        'href': escape_attr(pdf_href(pub)),
+        'authors': escape_text(pub.get('authors', '')),
+        'venue': escape_text(pub.get('venue', '')),
+        'year': escape_text(pub.get('year', '')),
+    }
+
+
+def write_member_publications(store, members, directory=PUBLICATIONS_DIR, dry_run=False):
+    """Write each member's stored publications for their page
+
+    Returns the paths whose content changed (or would change).
+    """
+    changed = []
+    for member in members:
+        path = os.path.join(directory, member + '.json')
+        records = [page_record(pub) for pub in store.by_source(member)]
+        text = json.dumps(records, indent=1, ensure_ascii=False) + '\n'
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                unchanged = f.read() == text
+        except FileNotFoundError:
+            unchanged = False
+        if unchanged:
+            continue
+        changed.append(path)
+        if not dry_run:
+            os.makedirs(directory, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            print(f"Wrote {len(records)} publications of {member} to {path}")
+    return changed
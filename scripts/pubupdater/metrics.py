@@ -0,0 +1,144 @@
+"""Phase timings and counters for a publication update run.
+
+Every phase of a run is wrapped in ``span(name)`` and notable events are
+tallied with ``count(name)``; both are thread-safe and go to one
+process-wide recorder. At the end of the run the recorder is written as a
+JSON summary (total time and calls per phase, plus every counter) and,
+optionally, as a Chrome trace (``chrome://tracing`` or Perfetto) with one
+row per thread, so concurrent profile and detail fetches show up side by
+side.
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+METRICS_PATH = os.getenv('PUBLICATION_METRICS', os.path.join('_build', 'update-metrics.json'))
+
+# Empty disables the trace file
+TRACE_PATH = os.getenv('PUBLICATION_TRACE', '')
+
+PROFILE_PATH = os.path.join('_build', 'update.prof')
+
+
+class Recorder:
+    """Collects timed spans and counters"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started = time.perf_counter()
+            self.started_at = time.time()
+            self.spans = []
+            self.counters = {}
+
+    @contextmanager
+    def span(self, name, **args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self.lock:
+                self.spans.append((name, start - self.started, end - start, threading.get_ident(), args))
+
+    def count(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def summary(self):
+        """Total seconds and calls per phase, and every counter"""
+        with self.lock:
+            phases = {}
+            for name, _, duration, _, _ in self.spans:
+                phase = phases.setdefault(name, {'calls': 0, 'seconds': 0.0})
+                phase['calls'] += 1
+                phase['seconds'] += duration
+            return {
+                'started_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(self.started_at)),
+                'duration_seconds': round(time.perf_counter() - self.started, 3),
+                'phases': {name: {'calls': phase['calls'], 'seconds': round(phase['seconds'], 3)}
+                           for name, phase in sorted(phases.items())},
+                'counters': dict(sorted(self.counters.items())),
+            }
+
+    def trace_events(self):
+        """Spans as Chrome trace-event "complete" events (microseconds)"""
+        with self.lock:
+            threads = {threading.main_thread().ident: 0}
+            events = []
+            for name, start, duration, thread, args in self.spans:
+                tid = threads.setdefault(thread, len(threads))
+                events.append({'name': name, 'ph': 'X', 'pid': 1, 'tid': tid,
+                               'ts': round(start * 1e6), 'dur': round(duration * 1e6), 'args': args})
+            return sorted(events, key=lambda event: event['ts'])
+
+
+recorder = Recorder()
+
+
+def span(name, **args):
+    """Time a block as a phase of the run"""
+    return recorder.span(name, **args)
+
+
+def count(name, value=1):
+    """Add to a run counter"""
+    recorder.count(name, value)
+
+
+def write_json_file(path, data):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=1)
+        f.write('\n')
+
+
+def write_metrics(path=METRICS_PATH, trace_path=TRACE_PATH):
+    """Write the run summary and, if a path is given, the Chrome trace"""
+    summary = recorder.summary()
+    if path:
+        write_json_file(path, summary)
+        print(f"Wrote run metrics to {path}")
+    if trace_path:
+        write_json_file(trace_path, {'traceEvents': recorder.trace_events(), 'displayTimeUnit': 'ms'})
+        print(f"Wrote trace to {trace_path}")
+    return summary
+
+
+def run_instrumented(func, metrics_path=METRICS_PATH, trace_path=TRACE_PATH, profile_path=None):
+    """Run func() as one "total" span, writing metrics even if it exits early
+
+    With a profile_path the run is also captured with cProfile; the stats
+    are saved there and the slowest functions are printed.
+    """
+    profiler = cProfile.Profile() if profile_path else None
+    try:
+        with span('total'):
+            if profiler is not None:
+                profiler.enable()
+            try:
+                return func()
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+    finally:
+        summary = write_metrics(metrics_path, trace_path)
+        for name, phase in summary['phases'].items():
+            print(f"{name}: {phase['seconds']:.2f}s ({phase['calls']} calls)")
+        if profiler is not None:
+            directory = os.path.dirname(profile_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            profiler.dump_stats(profile_path)
+            print(f"Wrote profile to {profile_path}")
+            pstats.Stats(profiler).sort_stats('cumulative').print_stats(20)
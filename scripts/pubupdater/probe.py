@@ -0,0 +1,101 @@
+"""Cheap check of whether any scraped profile changed since the last run.
+
+The probe fetches only the first listing page of each profile, sorted by
+publication date so that a new paper lands on it however few citations it
+has, and reduces it to a fingerprint: the number of rows on the page and
+whether more pages follow, the citation statistics in the profile's
+sidebar (citations, h-index and i10-index) and the citation id, year and
+citation count of every row on the page. Citation changes of older papers
+past the first page still show in the sidebar totals. Fingerprints of the
+last successful update are kept in ``scripts/profile_fingerprint.json``;
+when every profile still matches, the update can stop after one request
+per profile.
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from bs4 import BeautifulSoup
+
+from pubupdater.details import shared_limiter, with_retries
+from pubupdater.http_backend import create_session, fetch_profile_page, has_more_pages, parse_publication_rows
+from pubupdater.members import PROFILE_WORKERS
+
+PROBE_STATE_PATH = os.getenv('SCHOLAR_PROBE_STATE', os.path.join('scripts', 'profile_fingerprint.json'))
+
+# Exit status of an update that stopped because nothing changed
+PROBE_UNCHANGED_STATUS = 3
+
+# Listing order of the probed page: newest publications first
+PROBE_SORT = 'pubdate'
+
+
+def profile_fingerprint(html):
+    """Return the fingerprint of a profile's first listing page"""
+    rows = parse_publication_rows(html)
+    stats = [cell.get_text(strip=True) for cell in BeautifulSoup(html, 'html.parser').select('#gsc_rsb_st td.gsc_rsb_std')]
+    content = {
+        'rows': len(rows),
+        'more': has_more_pages(html),
+        'stats': stats,
+        'entries': [[pub['citation_id'] or pub['title'], pub['year'], pub['citations']] for pub in rows],
+    }
+    return hashlib.sha1(json.dumps(content, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def load_fingerprints(path=PROBE_STATE_PATH):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_fingerprints(fingerprints, path=PROBE_STATE_PATH):
+    """Store the fingerprints of a successful update, if they changed"""
+    if load_fingerprints(path) == fingerprints:
+        return False
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(fingerprints, f, indent=1, sort_keys=True)
+        f.write('\n')
+    print(f"Saved profile fingerprints to {path}")
+    return True
+
+
+def probe_profiles(profiles, path=PROBE_STATE_PATH, max_workers=PROFILE_WORKERS):
+    """Fingerprint the first page of every profile, concurrently
+
+    profiles maps a source name to a scholar id. Returns (unchanged,
+    fingerprints), where unchanged is True only if every profile could be
+    fetched and matches its stored fingerprint; a profile that could not
+    be fetched has no fingerprint.
+    """
+    stored = load_fingerprints(path)
+    limiter = shared_limiter()
+    session = create_session()
+
+    def probe(source):
+        try:
+            return profile_fingerprint(with_retries(
+                lambda: fetch_profile_page(session, profiles[source], sortby=PROBE_SORT), limiter))
+        except requests.RequestException as e:
+            print(f"Could not probe {source}: {e}")
+            return None
+
+    sources = list(profiles)
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(sources)))) as pool:
+            fingerprints = {source: fingerprint for source, fingerprint in zip(sources, pool.map(probe, sources))
+                            if fingerprint is not None}
+    finally:
+        session.close()
+
+    changed = [source for source in sources if source not in fingerprints or stored.get(source) != fingerprints[source]]
+    if changed:
+        print(f"Profiles changed since the last update: {', '.join(changed)}")
+    else:
+        print(f"None of the {len(sources)} profiles changed since the last update")
+    return not changed, fingerprints
@@ -0,0 +1,638 @@
+"""Parse-once, multi-target renderer for the publication pages.
+
+Each target file is read and parsed once, every view configured for it is
+rendered from the same sorted publication list, and the file is only
+rewritten when the serialized output differs from what is on disk. Lists
+are patched entry by entry rather than rebuilt, so the per-run diff only
+touches publications that actually changed.
+
+When a list is wrapped in sentinel comments (see pubupdater.splice) the
+parser is skipped altogether and only the bytes between the markers are
+replaced. The splice path keeps the entry-by-entry patch: an entry whose
+data-pub hash still matches its publication is carried over byte for
+byte, and only new or changed publications are rendered. The parser path
+adds the markers so later runs can take the fast path, and both paths
+write the same bytes between them.
+"""
+
+import bisect
+import hashlib
+import html
+import os
+import re
+
+from bs4 import BeautifulSoup, Comment, NavigableString
+
+from pubupdater.cache import normalize_title
+from pubupdater.metrics import count, span
+from pubupdater.splice import entry_digest, find_region, join_region, marker_text, region_entries, with_digest
+
+# Number of publications shown on the lab page
+RECENT_COUNT = 3
+
+# 'patch' applies only the changed entries to the existing lists, while
+# 'rebuild' clears and re-renders them from scratch
+RENDER_MODE = os.getenv('PUBLICATION_RENDER_MODE', 'patch')
+
+# Set to 0 to always go through the HTML parser, even when markers exist
+SPLICE_ENABLED = os.getenv('PUBLICATION_SPLICE', '1') == '1'
+
+# 'compact' renders entries with the shared pub-* classes from
+# css/style.css, 'inline' with the historical nested inline styles
+ENTRY_STYLE = os.getenv('PUBLICATION_ENTRY_STYLE', 'compact')
+
+# A rendered citation figure; its count is refreshed in place, keyed by
+# the publication's Scholar citation id, without re-rendering the entry
+CITES_RE = re.compile(rb'(<span class="pub-cites" data-cid=")([^"]*)(">)([^<]*)(</span>)')
+
+
+def get_sort_year(pub):
+    """Return a publication's year as an int, or 0 when it is unknown"""
+    try:
+        return int(pub['year']) if pub['year'] != 'N/A' else 0
+    except (KeyError, ValueError, TypeError):
+        return 0
+
+
+def sort_publications(publications):
+    """Return publications sorted newest first, keeping listing order within a year"""
+    return sorted(publications, key=get_sort_year, reverse=True)
+
+
+def select_publications(publications, limit=None):
+    """Return the first limit publications (all if None) of a sorted list or a store"""
+    if hasattr(publications, 'newest'):
+        return publications.newest(limit)
+    return publications if limit is None else publications[:limit]
+
+
+def find_publication_list(soup):
+    """Find the <ol> following the 'Journals & Conference Proceedings' heading"""
+    for h2 in soup.find_all('h2'):
+        h2_text = h2.get_text()
+        if 'Journals' in h2_text and 'Conference' in h2_text:
+            return h2.find_next('ol')
+    print("Could not find 'Journals & Conference Proceedings' heading")
+    return None
+
+
+def find_recent_list(soup):
+    """Find the publications <ul> of the lab page"""
+    heading = soup.find('h2', id='anchor-publications')
+    if heading is None:
+        print("Could not find the Publications heading")
+        return None
+    return heading.find_next('ul', {'style': 'width: 100%; font-family: Times New Roman,Times,serif;'})
+
+
+def pdf_href(pub):
+    """Return the best link for a publication's [pdf] anchor"""
+    return pub.get('pdf_link') or pub.get('url') or '#'
+
+
+def escape_text(value):
+    """Escape text content the way BeautifulSoup serializes it"""
+    return html.escape(str(value), quote=False)
+
+
+def escape_attr(value):
+    """Escape a double-quoted attribute value"""
+    return html.escape(str(value), quote=False).replace('"', '&quot;')
+
+
+def entry_hash(pub):
+    """Short hash of the fields a rendered entry is built from"""
+    # The entry style is part of the hash so switching it re-renders every
+    # entry. Citation counts are not: their figures are refreshed in place
+    content = '\x1f'.join(str(value) for value in (
+        pub.get('title', ''), pub.get('authors', ''), pub.get('venue', ''),
+        pub.get('year', ''), pdf_href(pub), ENTRY_STYLE, pub.get('citation_id') or '',
+    ))
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()[:12]
+
+
+def citation_count(pub):
+    try:
+        return int(str(pub.get('citations') or 0).replace(',', ''))
+    except ValueError:
+        return 0
+
+
+def cites_text(citations):
+    """Text of a citation figure, empty for uncited publications"""
+    return f"Cited by {citations}" if citations else ''
+
+
+def format_cites(pub):
+    """Format a publication's citation figure, or '' if it has no citation id"""
+    if not pub.get('citation_id'):
+        return ''
+    return (f'<span class="pub-cites" data-cid="{escape_attr(pub["citation_id"])}">'
+            f'{cites_text(citation_count(pub))}</span>')
+
+
+def citation_counts(publications):
+    """Map the citation id of each publication to its citation count"""
+    return {pub['citation_id']: citation_count(pub) for pub in publications if pub.get('citation_id')}
+
+
+def refresh_citation_figures(data, counts):
+    """Set the citation figures in a page's bytes to counts
+
+    Returns (new bytes, number of figures changed); figures whose citation
+    id is not in counts are left alone.
+    """
+    changed = 0
+
+    def replace(match):
+        nonlocal changed
+        cid = html.unescape(match.group(2).decode('utf-8'))
+        if cid not in counts:
+            return match.group(0)
+        text = cites_text(counts[cid]).encode('utf-8')
+        if text == match.group(4):
+            return match.group(0)
+        changed += 1
+        return b''.join((match.group(1), match.group(2), match.group(3), text, match.group(5)))
+
+    return CITES_RE.sub(replace, data), changed
+
+
+def entry_key(li):
+    """Return the normalized title an existing <li> is keyed by"""
+    title = (li.find(class_='pub-title') or li.find(style=lambda style: style and '153, 0, 0' in style)
+             or li.find('b') or li)
+    return normalize_title(title.get_text(' '))
+
+
+def entry_nodes(li):
+    """Return an entry's <li> followed by its trailing <br> and whitespace"""
+    nodes = [li]
+    sibling = li.next_sibling
+    while sibling is not None and (
+            getattr(sibling, 'name', None) == 'br'
+            or (isinstance(sibling, NavigableString) and not sibling.strip())):
+        nodes.append(sibling)
+        sibling = sibling.next_sibling
+    return nodes
+
+
+def new_entry_nodes(soup, li):
+    """Return a freshly rendered entry with its separator, one entry per line"""
+    return [li, soup.new_tag('br'), NavigableString('\n')]
+
+
+def stable_positions(positions):
+    """Return the indexes of a longest increasing subsequence of positions
+
+    Entries on this subsequence are already in the right relative order and
+    can stay where they are; only the rest need to move.
+    """
+    tails = []
+    tail_index = []
+    previous = [-1] * len(positions)
+    for i, position in enumerate(positions):
+        j = bisect.bisect_left(tails, position)
+        if j == len(tails):
+            tails.append(position)
+            tail_index.append(i)
+        else:
+            tails[j] = position
+            tail_index[j] = i
+        previous[i] = tail_index[j - 1] if j else -1
+
+    stable = set()
+    i = tail_index[-1] if tail_index else -1
+    while i != -1:
+        stable.add(i)
+        i = previous[i]
+    return stable
+
+
+def rebuild_list(soup, pub_list, publications, render_entry):
+    """Clear the list and render every entry from scratch"""
+    # Keep trailing non-entry content, such as the lab page's
+    # "complete list" paragraph, in place
+    footer = [child.extract() for child in pub_list.find_all('p', recursive=False)]
+    pub_list.clear()
+    for pub in publications:
+        li = render_entry(soup, pub)
+        li['data-pub'] = entry_hash(pub)
+        for node in new_entry_nodes(soup, li):
+            pub_list.append(node)
+    for child in footer:
+        pub_list.append(child)
+    return {'inserted': len(publications), 'updated': 0, 'moved': 0, 'deleted': 0}
+
+
+def patch_list(soup, pub_list, publications, render_entry, marker_name=None):
+    """Apply the minimal set of inserts, updates, moves and deletes to a list
+
+    Existing entries are keyed by normalized title. An entry is only
+    re-rendered when the hash of its publication data differs from the
+    data-pub attribute it was rendered with, so hand-curated markup on an
+    unchanged entry is left alone.
+    """
+    stats = {'inserted': 0, 'updated': 0, 'moved': 0, 'deleted': 0}
+
+    existing = {}
+    order = {}
+    stale = []
+    for position, li in enumerate(pub_list.find_all('li', recursive=False)):
+        key = entry_key(li)
+        if key in existing:
+            stale.append(li)
+            continue
+        existing[key] = li
+        order[id(li)] = position
+
+    # Delete duplicates and entries that are no longer published
+    wanted = {normalize_title(pub['title']) for pub in publications}
+    for key, li in list(existing.items()):
+        if key not in wanted:
+            stale.append(existing.pop(key))
+    for li in stale:
+        for node in entry_nodes(li):
+            node.extract()
+        stats['deleted'] += 1
+
+    # Update changed entries in place and render new ones detached
+    entries = []
+    for pub in publications:
+        key = normalize_title(pub['title'])
+        digest = entry_hash(pub)
+        li = existing.pop(key, None)
+        if li is None:
+            li = render_entry(soup, pub)
+            li['data-pub'] = digest
+            entries.append((li, None))
+            stats['inserted'] += 1
+            continue
+        if li.get('data-pub') != digest:
+            fresh = render_entry(soup, pub)
+            fresh['data-pub'] = digest
+            li.replace_with(fresh)
+            order[id(fresh)] = order[id(li)]
+            li = fresh
+            stats['updated'] += 1
+        entries.append((li, order[id(li)]))
+
+    # Entries on the longest run already in order stay put; everything
+    # else is moved (or inserted) right after its predecessor
+    kept = [i for i, (li, position) in enumerate(entries) if position is not None]
+    stable = {kept[i] for i in stable_positions([entries[i][1] for i in kept])}
+
+    anchor = find_marker(pub_list, marker_name, 'begin') if marker_name else None
+    if anchor is not None and isinstance(anchor.next_sibling, NavigableString) and not anchor.next_sibling.strip():
+        anchor = anchor.next_sibling
+    for i, (li, position) in enumerate(entries):
+        if i not in stable:
+            if position is None:
+                nodes = new_entry_nodes(soup, li)
+            else:
+                nodes = [node.extract() for node in entry_nodes(li)]
+                stats['moved'] += 1
+            for node in nodes:
+                if anchor is None:
+                    pub_list.insert(0, node)
+                else:
+                    anchor.insert_after(node)
+                anchor = node
+        else:
+            anchor = entry_nodes(li)[-1]
+
+    return stats
+
+
+def normalize_whitespace(tag):
+    """Collapse whitespace between a tag's children the way the parser does
+
+    html.parser reduces whitespace-only text to a single newline or space,
+    so doing the same here keeps re-rendering an unchanged page a no-op.
+    """
+    tag.smooth()
+    for child in list(tag.contents):
+        if type(child) is NavigableString and not child.strip():
+            collapsed = '\n' if '\n' in child else ' '
+            if child != collapsed:
+                child.replace_with(collapsed)
+
+
+def find_marker(pub_list, name, edge):
+    """Return a list's region marker comment, or None"""
+    text = marker_text(name, edge)
+    for child in pub_list.children:
+        if isinstance(child, Comment) and child == text:
+            return child
+    return None
+
+
+def ensure_markers(pub_list, name):
+    """Wrap a list's entries in region markers if they are not there yet"""
+    if find_marker(pub_list, name, 'begin') is not None and find_marker(pub_list, name, 'end') is not None:
+        return
+
+    for edge in ('begin', 'end'):
+        marker = find_marker(pub_list, name, edge)
+        if marker is not None:
+            marker.extract()
+
+    entries = pub_list.find_all('li', recursive=False)
+    begin = Comment(marker_text(name, 'begin'))
+    end = Comment(marker_text(name, 'end'))
+    if entries:
+        entries[0].insert_before(begin)
+        entry_nodes(entries[-1])[-1].insert_after(end)
+    else:
+        pub_list.insert(0, begin)
+        begin.insert_after(end)
+    begin.insert_after(NavigableString('\n'))
+
+
+def update_list(soup, pub_list, publications, render_entry, marker_name=None):
+    """Bring a publication list up to date using the configured render mode"""
+    if RENDER_MODE == 'rebuild':
+        stats = rebuild_list(soup, pub_list, publications, render_entry)
+    else:
+        stats = patch_list(soup, pub_list, publications, render_entry, marker_name)
+    if marker_name:
+        ensure_markers(pub_list, marker_name)
+    normalize_whitespace(pub_list)
+    print("List entries: {inserted} inserted, {updated} updated, {moved} moved, {deleted} deleted".format(**stats))
+    for name, value in stats.items():
+        count(f'entries_{name}', value)
+    return stats
+
+
+def parse_entry(markup):
+    """Parse the markup of a single formatted entry into its <li>"""
+    return BeautifulSoup(markup, 'html.parser').li
+
+
+def render_full_entry(soup, pub):
+    """Build the <li> for one publication on publication.html"""
+    if ENTRY_STYLE == 'compact':
+        return parse_entry(format_full_entry(pub))
+    li = soup.new_tag('li')
+
+    # Add title with red color
+    title_span = soup.new_tag('span', attrs={'style': 'color: rgb(153, 0, 0);'})
+    title_span.string = pub['title']
+    li.append(title_span)
+
+    # Add PDF link
+    li.append(' [')
+    pdf_link = soup.new_tag('a', href=pdf_href(pub), target='_blank')
+    pdf_link.string = 'pdf'
+    li.append(pdf_link)
+    li.append(']')
+    li.append(soup.new_tag('br'))
+
+    # Add authors
+    authors = soup.new_tag('span', attrs={'style': 'font-family: Times New Roman;'})
+    authors.string = pub['authors']
+    li.append(authors)
+    li.append(soup.new_tag('br'))
+
+    # Add venue and year
+    venue = soup.new_tag('span', attrs={'style': 'font-family: Times New Roman,Times,serif;'})
+    venue.string = f"{pub['venue']}, {pub['year']}"
+    li.append(venue)
+    if pub.get('citation_id'):
+        cites = soup.new_tag('span', attrs={'class': 'pub-cites', 'data-cid': pub['citation_id']})
+        cites.string = cites_text(citation_count(pub))
+        li.append(cites)
+    return li
+
+
+def format_full_entry(pub):
+    """Format the <li> for one publication on publication.html as a string"""
+    if ENTRY_STYLE == 'compact':
+        return (
+            f'<li class="pub" data-pub="{entry_hash(pub)}">'
+            f'<span class="pub-title">{escape_text(pub["title"])}</span>'
+            f' [<a href="{escape_attr(pdf_href(pub))}" target="_blank">pdf</a>]<br/>'
+            f'{escape_text(pub["authors"])}<br/>'
+            f'{escape_text(pub["venue"])}, {escape_text(pub["year"])}{format_cites(pub)}</li>'
+        )
+    return (
+        f'<li data-pub="{entry_hash(pub)}">'
+        f'<span style="color: rgb(153, 0, 0);">{escape_text(pub["title"])}</span>'
+        f' [<a href="{escape_attr(pdf_href(pub))}" target="_blank">pdf</a>]<br/>'
+        f'<span style="font-family: Times New Roman;">{escape_text(pub["authors"])}</span><br/>'
+        f'<span style="font-family: Times New Roman,Times,serif;">'
+        f'{escape_text(pub["venue"])}, {escape_text(pub["year"])}</span>{format_cites(pub)}</li>'
+    )
+
+
+def render_recent_entry(soup, pub):
+    """Build the <li> for one publication on aimslab.html"""
+    if ENTRY_STYLE == 'compact':
+        return parse_entry(format_recent_entry(pub))
+    li = soup.new_tag('li')
+
+    # Add title
+    title = soup.new_tag('b')
+    title.string = pub['title']
+    li.append(title)
+    li.append(soup.new_tag('br'))
+
+    # Add authors
+    authors = soup.new_tag('span', attrs={'style': 'font-family: Times New Roman;'})
+    authors.string = pub['authors']
+    li.append(authors)
+    li.append(soup.new_tag('br'))
+
+    # Add venue and year
+    venue = soup.new_tag('span', attrs={'style': 'font-family: Times New Roman,Times,serif;'})
+    venue.string = f"{pub['venue']}, {pub['year']}"
+    li.append(venue)
+
+    # Add PDF and GitHub links
+    li.append(soup.new_tag('br'))
+    pdf_link = soup.new_tag('a', href=pdf_href(pub), attrs={'style': 'color:brown;'})
+    pdf_link.string = '[PDF]'
+    li.append(pdf_link)
+    li.append(' | ')
+    github_link = soup.new_tag('a', href='#', attrs={'style': 'color:brown;'})
+    github_link.string = '[View on GitHub]'
+    li.append(github_link)
+    return li
+
+
+def format_recent_entry(pub):
+    """Format the <li> for one publication on aimslab.html as a string"""
+    if ENTRY_STYLE == 'compact':
+        return (
+            f'<li class="pub" data-pub="{entry_hash(pub)}">'
+            f'<b>{escape_text(pub["title"])}</b><br/>'
+            f'{escape_text(pub["authors"])}<br/>'
+            f'{escape_text(pub["venue"])}, {escape_text(pub["year"])}<br/>'
+            f'<a class="pub-link" href="{escape_attr(pdf_href(pub))}">[PDF]</a> | '
+            f'<a class="pub-link" href="#">[View on GitHub]</a></li>'
+        )
+    return (
+        f'<li data-pub="{entry_hash(pub)}">'
+        f'<b>{escape_text(pub["title"])}</b><br/>'
+        f'<span style="font-family: Times New Roman;">{escape_text(pub["authors"])}</span><br/>'
+        f'<span style="font-family: Times New Roman,Times,serif;">'
+        f'{escape_text(pub["venue"])}, {escape_text(pub["year"])}</span><br/>'
+        f'<a href="{escape_attr(pdf_href(pub))}" style="color:brown;">[PDF]</a> | '
+        f'<a href="#" style="color:brown;">[View on GitHub]</a></li>'
+    )
+
+
+# A view describes one generated list: the sentinel marker name of its
+# region, how to find the list when parsing, and how to render an entry
+# both as a tag (parser path) and as a string (splice path).
+FULL_VIEW = {
+    'marker': 'pubs',
+    'find': find_publication_list,
+    'render_entry': render_full_entry,
+    'format_entry': format_full_entry,
+}
+
+RECENT_VIEW = {
+    'marker': 'recent-pubs',
+    'find': find_recent_list,
+    'render_entry': render_recent_entry,
+    'format_entry': format_recent_entry,
+}
+
+# Each target maps a file to the views rendered into it as (view, limit)
+# pairs; a limit of None renders every publication.
+DEFAULT_TARGETS = [
+    ('publication.html', [(FULL_VIEW, None)]),
+    ('aimslab.html', [(RECENT_VIEW, RECENT_COUNT)]),
+]
+
+
+def render_view(soup, view, publications):
+    """Render a view into a parsed page, adding its region markers"""
+    pub_list = view['find'](soup)
+    if pub_list is None:
+        print("Could not find publications list in HTML")
+        return False
+    update_list(soup, pub_list, publications, view['render_entry'], view['marker'])
+    return True
+
+
+def patch_region(content, publications, format_entry):
+    """Return the new content of a marked region and its entry stats
+
+    Existing entries are keyed by the data-pub hash they were rendered
+    with. A publication whose hash matches an entry keeps that entry's
+    markup, hand-curated edits included, and only the others are rendered
+    with format_entry. Entries no publication matches are dropped.
+    """
+    found = region_entries(content)
+    existing = {}
+    if RENDER_MODE != 'rebuild':
+        for entry in found:
+            existing.setdefault(entry_digest(entry), entry)
+        existing.pop(None, None)
+
+    entries = []
+    rendered = 0
+    for pub in publications:
+        digest = entry_hash(pub)
+        entry = existing.pop(digest, None)
+        if entry is None:
+            entry = with_digest(format_entry(pub).encode('utf-8'), digest)
+            rendered += 1
+        entries.append(entry)
+    kept = len(entries) - rendered
+
+    # Carried-over entries keep their citation figures, so refresh them
+    output, _ = refresh_citation_figures(join_region(entries), citation_counts(publications))
+    return output, {'kept': kept, 'rendered': rendered, 'dropped': len(found) - kept}
+
+
+def splice_file(original, views, publications, report=True):
+    """Render views by splicing their marked regions, or None if a marker is missing"""
+    output = original
+    for view, limit in views:
+        region = find_region(output, view['marker'])
+        if region is None:
+            return None
+        start, end = region
+        content, stats = patch_region(output[start:end], select_publications(publications, limit),
+                                      view['format_entry'])
+        output = b''.join((output[:start], content, output[end:]))
+        if not report:
+            continue
+        print("Spliced entries: {kept} kept, {rendered} rendered, {dropped} dropped".format(**stats))
+        for name, value in stats.items():
+            count(f'entries_{name}', value)
+    return output
+
+
+def render_file(html_file_path, views, publications):
+    """Render views into one file and return (success, new bytes, old bytes)"""
+    with open(html_file_path, 'rb') as f:
+        original = f.read()
+
+    # Fast path: splice the marked regions without parsing the page
+    if SPLICE_ENABLED:
+        output = splice_file(original, views, publications)
+        if output is not None:
+            return True, output, original
+        print(f"No region markers in {html_file_path}, falling back to the HTML parser")
+
+    soup = BeautifulSoup(original.decode('utf-8'), 'html.parser')
+    for view, limit in views:
+        if not render_view(soup, view, select_publications(publications, limit)):
+            return False, None, original
+
+    # Every entry now carries its current data-pub hash, so splicing the
+    # serialized page keeps each one and only lays out the regions (and
+    # refreshes the citation figures) exactly as the splice path does
+    output = splice_file(str(soup).encode('utf-8'), views, publications, report=False)
+    return True, output, original
+
+
+def render_targets(publications, targets=DEFAULT_TARGETS, dry_run=False):
+    """Render sorted publications (or a PublicationStore) into every target, writing only changed files
+
+    Returns (success, changed) where changed lists the files whose content
+    differs from what was on disk.
+    """
+    success = True
+    changed = []
+
+    for html_file_path, views in targets:
+        try:
+            with span('render_file', file=html_file_path):
+                ok, output, original = render_file(html_file_path, views, publications)
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"Error updating {html_file_path}: {e}")
+            ok = False
+        if not ok:
+            success = False
+            continue
+
+        if output == original:
+            print(f"{html_file_path} is already up to date")
+            continue
+
+        changed.append(html_file_path)
+        if dry_run:
+            print(f"{html_file_path} would change")
+            continue
+
+        # Replace the file atomically so a failed write never truncates a page
+        tmp_path = html_file_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(output)
+        os.replace(tmp_path, html_file_path)
+        print(f"Successfully updated {html_file_path}")
+
+    return success, changed
+
+
+def report_changes(changed):
+    """Expose whether any page changed to GitHub Actions, if running there"""
+    output_path = os.getenv('GITHUB_OUTPUT')
+    if output_path:
+        with open(output_path, 'a', encoding='utf-8') as f:
+            f.write(f"changed={'true' if changed else 'false'}\n")
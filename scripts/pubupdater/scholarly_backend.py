@@ -0,0 +1,64 @@
+"""Listing backend built on the scholarly library.
+
+scholarly brings its own HTTP client and a large dependency tree, so this
+module is only imported when a run falls back to it (see backends.py).
+Each profile is looked up by its scholar id; the expensive
+``scholarly.fill()`` of a publication is only called for rows the
+publication cache has no current record of.
+"""
+
+from scholarly import scholarly
+
+from pubupdater.cache import publication_id, refresh_publications
+from pubupdater.details import DETAIL_WORKERS, shared_limiter, with_retries
+from pubupdater.metrics import span
+
+
+def scrape_scholar_with_scholarly(scholar_id, cache=None):
+    """Return the full records of one profile's publications using scholarly"""
+    try:
+        print(f"Looking up scholar id {scholar_id} with scholarly")
+        with span('scholarly_author', user=scholar_id):
+            author = scholarly.fill(scholarly.search_author_id(scholar_id), sections=['publications'])
+
+        # Describe each unfilled publication by its listing row so the cache
+        # can tell which ones actually need the expensive scholarly.fill()
+        listing = []
+        unfilled = {}
+        for pub in author.get('publications', []):
+            bib = pub.get('bib', {})
+            row = {
+                'citation_id': pub.get('author_pub_id', ''),
+                'title': bib.get('title', ''),
+                'venue': bib.get('citation', ''),
+                'year': str(bib.get('pub_year', 'N/A')),
+                'citations': str(pub.get('num_citations', '')),
+            }
+            listing.append(row)
+            unfilled[publication_id(row)] = pub
+
+        def fill(row):
+            pub = unfilled[publication_id(row)]
+            with span('scholarly_fill'):
+                pub_filled = with_retries(lambda: scholarly.fill(pub), shared_limiter(), retry_on=(Exception,))
+            bib = pub_filled.get('bib', {})
+            return {
+                'citation_id': row['citation_id'],
+                'title': bib.get('title', row['title']),
+                'authors': bib.get('author', '').replace(' and ', ', '),
+                'venue': bib.get('venue', '') or bib.get('journal', '') or bib.get('conference', ''),
+                'year': str(bib.get('pub_year', row['year'])),
+                'pdf_link': pub_filled.get('eprint_url', ''),
+                'citations': row['citations'],
+            }
+
+        return refresh_publications(listing, fill, cache, DETAIL_WORKERS)
+
+    except Exception as e:
+        print(f"Error with scholarly: {e}")
+        return []
+
+
+def scrape_profiles_with_scholarly(profiles, cache=None):
+    """Listing backend: scrape each profile in turn with scholarly"""
+    return {source: scrape_scholar_with_scholarly(scholar_id, cache) for source, scholar_id in profiles.items()}
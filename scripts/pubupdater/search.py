@@ -0,0 +1,132 @@
+"""Prebuilt client-side search index for publication.html.
+
+The index is a small JSON file served next to the page and lazy-loaded by
+``js/publication-search.js``. Documents are the entries of the generated
+publication list, numbered in page order. It holds:
+
+- ``terms``: the sorted title, author and venue tokens, so the client can
+  binary-search for prefixes while the user types
+- ``postings``: for each term, the ids of the documents containing it,
+  delta-encoded (the first id, then the gap to each following id)
+- ``facets``: year, venue and author values mapped to delta-encoded ids
+
+``fingerprint`` hashes the entries the index was built from; when it
+matches, the existing file is left alone, so the index is only rebuilt and
+rewritten when the publication list actually changes. The rebuild is a
+full one: document ids follow page order, so a single new entry shifts the
+ids of the entries after it and every posting list is built again rather
+than patched. At a few hundred entries this takes milliseconds.
+"""
+
+import hashlib
+import json
+import os
+import re
+import unicodedata
+
+from pubupdater.cache import author_names
+from pubupdater.render import entry_hash
+
+SEARCH_INDEX_PATH = os.getenv('PUBLICATION_SEARCH_INDEX', 'publication-search.json')
+INDEX_VERSION = 1
+
+STOPWORDS = {'a', 'an', 'and', 'for', 'in', 'of', 'on', 'the', 'to', 'with', 'via', 'by', 'at', 'from'}
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# A venue's name ends where its volume, issue or page numbers start
+VENUE_DETAILS_RE = re.compile(r'(\s+\d|,|\s+\().*$')
+
+
+def tokenize(text):
+    """Lowercase, accent-folded search tokens of a string"""
+    text = unicodedata.normalize('NFKD', str(text)).encode('ascii', 'ignore').decode('ascii').lower()
+    return [token for token in TOKEN_RE.findall(text) if token not in STOPWORDS]
+
+
+def venue_name(venue):
+    """Return a venue without its volume, issue and page details"""
+    return VENUE_DETAILS_RE.sub('', venue or '').strip()
+
+
+def delta_encode(ids):
+    """Encode sorted ids as the first id followed by the gaps between them"""
+    encoded, previous = [], 0
+    for doc_id in ids:
+        encoded.append(doc_id - previous)
+        previous = doc_id
+    return encoded
+
+
+def index_fingerprint(publications):
+    """Hash of the entries, in order, that an index is built from"""
+    digest = hashlib.sha1()
+    for pub in publications:
+        digest.update(entry_hash(pub).encode('ascii'))
+    return digest.hexdigest()[:16]
+
+
+def build_search_index(publications):
+    """Build the index for a sorted publication list"""
+    postings = {}
+    facets = {'year': {}, 'venue': {}, 'author': {}}
+    for doc_id, pub in enumerate(publications):
+        text = ' '.join((pub.get('title', ''), pub.get('authors', ''), pub.get('venue', '')))
+        for token in set(tokenize(text)):
+            postings.setdefault(token, []).append(doc_id)
+
+        year = str(pub.get('year', ''))
+        if year and year != 'N/A':
+            facets['year'].setdefault(year, []).append(doc_id)
+        venue = venue_name(pub.get('venue', ''))
+        if venue:
+            facets['venue'].setdefault(venue, []).append(doc_id)
+        for name in set(author_names(pub.get('authors', ''))):
+            facets['author'].setdefault(name, []).append(doc_id)
+
+    terms = sorted(postings)
+    return {
+        'version': INDEX_VERSION,
+        'fingerprint': index_fingerprint(publications),
+        'count': len(publications),
+        'terms': terms,
+        'postings': [delta_encode(postings[term]) for term in terms],
+        'facets': {
+            name: {value: delta_encode(ids) for value, ids in sorted(values.items())}
+            for name, values in facets.items()
+        },
+    }
+
+
+def load_search_index(path=SEARCH_INDEX_PATH):
+    """Return the index on disk, or None if it is missing or unreadable"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_search_index(publications, path=SEARCH_INDEX_PATH, dry_run=False):
+    """Rebuild and write the index if the publications changed
+
+    Returns True when the file on disk changed (or would change).
+    """
+    previous = load_search_index(path)
+    if (previous and previous.get('version') == INDEX_VERSION
+            and previous.get('fingerprint') == index_fingerprint(publications)):
+        print(f"{path} is already up to date")
+        return False
+
+    index = build_search_index(publications)
+    if dry_run:
+        print(f"{path} would change")
+        return True
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+        f.write('\n')
+    os.replace(tmp_path, path)
+    print(f"Wrote search index for {index['count']} publications ({len(index['terms'])} terms) to {path}")
+    return True
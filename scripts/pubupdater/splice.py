@@ -0,0 +1,100 @@
+"""Byte-level splicing of generated regions delimited by sentinel comments.
+
+A generated region looks like::
+
+    <!-- pubs:begin -->
+    ...generated markup...
+    <!-- pubs:end -->
+
+Only the bytes between the two markers are replaced; everything else in
+the file is streamed through untouched, so hand-written parts of a page
+stay byte-for-byte stable and no HTML parser is needed. Inside a region
+the top-level ``<li>`` entries are found by scanning their tags, so the
+markup of entries that did not change can be carried over as is.
+"""
+
+import re
+
+# Opening and closing <li> tags, told apart by the slash group
+LI_TAG_RE = re.compile(rb'<(/?)li\b[^>]*>', re.IGNORECASE)
+
+DATA_PUB_RE = re.compile(rb'\sdata-pub="([^"]*)"')
+
+
+def marker_text(name, edge):
+    """Return the comment body of a region marker, e.g. ' pubs:begin '"""
+    return f" {name}:{edge} "
+
+
+def marker_bytes(name, edge):
+    """Return the full comment of a region marker as bytes"""
+    return f"<!--{marker_text(name, edge)}-->".encode('ascii')
+
+
+def find_region(data, name):
+    """Return the (start, end) byte offsets of a region's content, or None"""
+    begin = marker_bytes(name, 'begin')
+    start = data.find(begin)
+    if start == -1:
+        return None
+    start += len(begin)
+
+    end = data.find(marker_bytes(name, 'end'), start)
+    if end == -1:
+        return None
+    return start, end
+
+
+def splice_region(data, name, content):
+    """Replace the content of a region, returning None if its markers are missing"""
+    region = find_region(data, name)
+    if region is None:
+        return None
+    start, end = region
+    return b''.join((data[:start], content, data[end:]))
+
+
+def region_entries(content):
+    """Return the top-level <li> elements of a region's content as bytes"""
+    entries = []
+    depth = 0
+    start = None
+    for match in LI_TAG_RE.finditer(content):
+        if not match.group(1):
+            if depth == 0:
+                start = match.start()
+            depth += 1
+        elif depth:
+            depth -= 1
+            if depth == 0:
+                entries.append(content[start:match.end()])
+    return entries
+
+
+def entry_digest(entry):
+    """Return the data-pub hash an entry was rendered with, or None"""
+    match = DATA_PUB_RE.search(entry, 0, entry.find(b'>') + 1)
+    return match.group(1).decode('ascii', 'replace') if match else None
+
+
+def with_digest(entry, digest):
+    """Add a data-pub attribute to an entry's <li> tag if it has none
+
+    The attribute goes last, where BeautifulSoup puts an added attribute.
+    """
+    if entry_digest(entry) is not None:
+        return entry
+    end = entry.find(b'>')
+    if entry[end - 1:end] == b'/':
+        end -= 1
+    return b''.join((entry[:end], f' data-pub="{digest}"'.encode('ascii'), entry[end:]))
+
+
+def join_region(entries, separator=b'<br/>'):
+    """Join rendered entries into the content of a region, one entry per line"""
+    return b'\n' + b''.join(entry + separator + b'\n' for entry in entries)
+
+
+def render_region(publications, format_entry, separator='<br/>'):
+    """Render the content of a region, one entry per line"""
+    return join_region([format_entry(pub).encode('utf-8') for pub in publications], separator.encode('utf-8'))
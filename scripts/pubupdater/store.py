@@ -0,0 +1,358 @@
+"""SQLite-backed store of publication records.
+
+Scrapers import their listing into the store in one transaction per
+source (the lab's profile, or a member's), and the renderers read it back
+through indexed queries instead of sorting dicts in Python. Records go in
+and come out in the same dict shape the scrapers produce, so the store can
+stand in for a publication list anywhere one is expected.
+
+Each publication is linked to the sources that listed it; a complete
+import of a source drops its links to publications it no longer lists,
+and publications left without any source are deleted.
+
+The database itself lives in the ignored ``_build/`` directory, so CI
+starts every run without it. What persists between runs is its snapshot,
+``scripts/publication_store.json``: every source's listing in order. The
+updater imports the snapshot before it imports fresh listings and writes
+it back afterwards. As a result, a member profile that fails to scrape
+keeps last week's records. A publication only disappears once a complete
+listing of every source that had it no longer includes it.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import time
+
+from pubupdater.cache import author_names, normalize_title, publication_id
+
+DEFAULT_STORE_PATH = os.path.join('_build', 'publications.db')
+
+# Committed copy of every source's listing, re-imported at the start of a run
+SNAPSHOT_PATH = os.getenv('PUBLICATION_SNAPSHOT', os.path.join('scripts', 'publication_store.json'))
+SNAPSHOT_VERSION = 1
+
+# Source name for the lab's own Scholar profile
+LAB_SOURCE = 'lab'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS publications (
+    id TEXT PRIMARY KEY,
+    citation_id TEXT,
+    title TEXT NOT NULL,
+    title_key TEXT NOT NULL,
+    authors TEXT NOT NULL DEFAULT '',
+    venue TEXT NOT NULL DEFAULT '',
+    venue_key TEXT NOT NULL DEFAULT '',
+    year INTEGER NOT NULL DEFAULT 0,
+    year_text TEXT NOT NULL DEFAULT '',
+    url TEXT NOT NULL DEFAULT '',
+    pdf_link TEXT NOT NULL DEFAULT '',
+    citations INTEGER NOT NULL DEFAULT 0,
+    position INTEGER NOT NULL DEFAULT 0,
+    updated_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS publications_year ON publications (year DESC, position);
+CREATE INDEX IF NOT EXISTS publications_venue ON publications (venue_key);
+CREATE INDEX IF NOT EXISTS publications_citation_id ON publications (citation_id);
+
+CREATE TABLE IF NOT EXISTS publication_authors (
+    publication_id TEXT NOT NULL REFERENCES publications (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    name_key TEXT NOT NULL,
+    PRIMARY KEY (publication_id, position)
+);
+CREATE INDEX IF NOT EXISTS publication_authors_name ON publication_authors (name_key);
+
+CREATE TABLE IF NOT EXISTS publication_sources (
+    source TEXT NOT NULL,
+    publication_id TEXT NOT NULL REFERENCES publications (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (source, publication_id)
+);
+CREATE INDEX IF NOT EXISTS publication_sources_publication ON publication_sources (publication_id);
+"""
+
+COLUMNS = ('citation_id', 'title', 'authors', 'venue', 'year_text', 'url', 'pdf_link', 'citations')
+
+# Newest first, keeping listing order within a year; unknown years are
+# stored as 0 so they sort last and the ordering can come from the index
+ORDER_BY = "ORDER BY p.year DESC, p.position"
+
+# A publication listed by several sources has a position in each listing
+SOURCE_ORDER_BY = "ORDER BY p.year DESC, s.position"
+
+BIBTEX_SPECIAL_RE = re.compile(r'([&%$#_{}])')
+
+
+def key_text(value):
+    """Normalized lookup key for venues and author names"""
+    return normalize_title(value)
+
+
+def parse_int(value):
+    try:
+        return int(str(value).replace(',', '').strip())
+    except (TypeError, ValueError):
+        return None
+
+
+class PublicationStore:
+    """Publication records in a SQLite database"""
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        if path != ':memory:' and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        self.connection.executescript(SCHEMA)
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(publication_sources)")]
+        if 'position' not in columns:
+            self.connection.execute(
+                "ALTER TABLE publication_sources ADD COLUMN position INTEGER NOT NULL DEFAULT 0")
+
+    @classmethod
+    def from_env(cls):
+        """Open the store configured through PUBLICATION_STORE"""
+        return cls(os.getenv('PUBLICATION_STORE', DEFAULT_STORE_PATH))
+
+    def close(self):
+        self.connection.close()
+
+    def _upsert(self, pub, position, now):
+        key = publication_id(pub)
+        year = parse_int(pub.get('year')) or 0
+        self.connection.execute(
+            """
+            INSERT INTO publications (id, citation_id, title, title_key, authors, venue, venue_key,
+                                      year, year_text, url, pdf_link, citations, position, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET
+                citation_id = excluded.citation_id, title = excluded.title, title_key = excluded.title_key,
+                authors = excluded.authors, venue = excluded.venue, venue_key = excluded.venue_key,
+                year = excluded.year, year_text = excluded.year_text, url = excluded.url,
+                pdf_link = excluded.pdf_link, citations = excluded.citations, position = excluded.position,
+                updated_at = excluded.updated_at
+            """,
+            (key, pub.get('citation_id') or None, pub.get('title', ''), normalize_title(pub.get('title', '')),
+             pub.get('authors') or '', pub.get('venue') or '', key_text(pub.get('venue')),
+             year, str(pub.get('year') or ''), pub.get('url') or '', pub.get('pdf_link') or '',
+             parse_int(pub.get('citations')) or 0, position, now),
+        )
+        self.connection.execute("DELETE FROM publication_authors WHERE publication_id = ?", (key,))
+        self.connection.executemany(
+            "INSERT INTO publication_authors (publication_id, position, name, name_key) VALUES (?, ?, ?, ?)",
+            [(key, i, name, key_text(name)) for i, name in enumerate(author_names(pub.get('authors')))],
+        )
+        return key
+
+    def upsert(self, pub, source=LAB_SOURCE):
+        """Insert or update a single record and link it to a source"""
+        with self.connection:
+            key = self._upsert(pub, 0, int(time.time()))
+            self.connection.execute(
+                "INSERT OR IGNORE INTO publication_sources (source, publication_id) VALUES (?, ?)", (source, key))
+        return key
+
+    def update_citations(self, counts):
+        """Set the citation counts of known publications from {citation id: count}"""
+        now = int(time.time())
+        with self.connection:
+            updated = self.connection.executemany(
+                "UPDATE publications SET citations = ?, updated_at = ? WHERE citation_id = ? AND citations != ?",
+                [(citations, now, cid, citations) for cid, citations in counts.items()],
+            ).rowcount
+        return updated
+
+    def import_publications(self, publications, source=LAB_SOURCE, complete=True):
+        """Upsert a source's listing in one transaction
+
+        With complete=True the listing is taken as everything the source
+        has, so its links to other publications are dropped and records
+        no source lists any more are deleted. Returns (upserted, deleted).
+        """
+        now = int(time.time())
+        keys = []
+        positions = []
+        seen = set()
+        with self.connection:
+            for position, pub in enumerate(publications):
+                # The first of several records with the same id keeps its place
+                if publication_id(pub) not in seen:
+                    seen.add(publication_id(pub))
+                    keys.append(self._upsert(pub, position, now))
+                    positions.append(position)
+            self.connection.executemany(
+                """
+                INSERT INTO publication_sources (source, publication_id, position) VALUES (?, ?, ?)
+                ON CONFLICT (source, publication_id) DO UPDATE SET position = excluded.position
+                """,
+                [(source, key, position) for key, position in zip(keys, positions)],
+            )
+            deleted = 0
+            if complete:
+                self.connection.execute("CREATE TEMP TABLE IF NOT EXISTS imported (id TEXT PRIMARY KEY)")
+                self.connection.execute("DELETE FROM imported")
+                self.connection.executemany("INSERT OR IGNORE INTO imported (id) VALUES (?)", [(k,) for k in keys])
+                self.connection.execute(
+                    "DELETE FROM publication_sources WHERE source = ? AND publication_id NOT IN (SELECT id FROM imported)",
+                    (source,))
+                deleted = self.connection.execute(
+                    "DELETE FROM publications WHERE id NOT IN (SELECT publication_id FROM publication_sources)"
+                ).rowcount
+        print(f"Stored {len(keys)} publications from {source} in {self.path}"
+              + (f", deleted {deleted}" if deleted else ""))
+        return len(keys), deleted
+
+    def _records(self, where='', params=(), limit=None, join='', order_by=ORDER_BY):
+        sql = f"SELECT DISTINCT p.* FROM publications p {join} {where} {order_by}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params = tuple(params) + (limit,)
+        return [self._record(row) for row in self.connection.execute(sql, params)]
+
+    @staticmethod
+    def _record(row):
+        record = {column: row[column] or '' for column in COLUMNS}
+        record['year'] = record.pop('year_text') or 'N/A'
+        record['citations'] = str(row['citations'])
+        return record
+
+    def newest(self, limit=None):
+        """All publications newest first, or only the first limit of them"""
+        return self._records(limit=limit)
+
+    def by_source(self, source, limit=None):
+        """Publications listed by one source (e.g. a member), newest first in its listing order"""
+        return self._records("WHERE s.source = ?", (source,), limit,
+                             join="JOIN publication_sources s ON s.publication_id = p.id",
+                             order_by=SOURCE_ORDER_BY)
+
+    def by_author(self, name, limit=None):
+        """Publications with an author of the given name, newest first"""
+        return self._records("WHERE a.name_key = ?", (key_text(name),), limit,
+                             join="JOIN publication_authors a ON a.publication_id = p.id")
+
+    def by_venue(self, venue, limit=None):
+        return self._records("WHERE p.venue_key = ?", (key_text(venue),), limit)
+
+    def by_year(self, year, limit=None):
+        return self._records("WHERE p.year = ?", (int(year),), limit)
+
+    def listing(self, source):
+        """Publications listed by one source, in its listing order"""
+        return self._records("WHERE s.source = ?", (source,),
+                             join="JOIN publication_sources s ON s.publication_id = p.id",
+                             order_by="ORDER BY s.position")
+
+    def load_snapshot(self, path=SNAPSHOT_PATH):
+        """Import every source's listing from a snapshot, if there is one
+
+        Returns the number of sources imported.
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return 0
+        if data.get('version') != SNAPSHOT_VERSION:
+            print(f"Ignoring {path}, it is not a version {SNAPSHOT_VERSION} snapshot")
+            return 0
+        for source, publications in sorted(data['sources'].items()):
+            self.import_publications(publications, source=source)
+        return len(data['sources'])
+
+    def save_snapshot(self, path=SNAPSHOT_PATH):
+        """Write every source's listing to a snapshot if it changed
+
+        Returns True when the file was written.
+        """
+        data = {'version': SNAPSHOT_VERSION, 'sources': {source: self.listing(source) for source in self.sources()}}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                if json.load(f) == data:
+                    return False
+        except (OSError, ValueError):
+            pass
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=1, sort_keys=True, ensure_ascii=False)
+            f.write('\n')
+        os.replace(tmp_path, path)
+        print(f"Saved the listings of {len(data['sources'])} sources to {path}")
+        return True
+
+    def get(self, citation_id):
+        """Return the record with a Scholar citation id, or None"""
+        records = self._records("WHERE p.citation_id = ?", (citation_id,), 1)
+        return records[0] if records else None
+
+    def sources(self):
+        return [row[0] for row in self.connection.execute(
+            "SELECT DISTINCT source FROM publication_sources ORDER BY source")]
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM publications").fetchone()[0]
+
+    def export_json(self, path, publications=None):
+        """Write publications (default: all, newest first) as a JSON list"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(publications if publications is not None else self.newest(), f, indent=1, ensure_ascii=False)
+            f.write('\n')
+
+    def export_bibtex(self, path, publications=None):
+        """Write publications (default: all, newest first) as BibTeX"""
+        entries = []
+        used = set()
+        for pub in publications if publications is not None else self.newest():
+            entries.append(bibtex_entry(pub, used))
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(entries))
+
+
+def bibtex_escape(value):
+    return BIBTEX_SPECIAL_RE.sub(r'\\\1', str(value))
+
+
+def bibtex_type(venue):
+    """Guess the BibTeX entry type of a venue"""
+    venue = venue.lower()
+    if any(word in venue for word in ('arxiv', 'preprint', 'e-prints')):
+        return 'misc'
+    if any(word in venue for word in ('conference', 'proceedings', 'workshop', 'symposium', 'congress')):
+        return 'inproceedings'
+    if any(word in venue for word in ('journal', 'transactions', 'letters', 'magazine', 'access')):
+        return 'article'
+    return 'misc'
+
+
+def bibtex_entry(pub, used):
+    """Format one record as a BibTeX entry with a citation key unique within used"""
+    authors = author_names(pub.get('authors'))
+    surname = re.sub(r'\W', '', authors[0].split()[-1]).lower() if authors else 'anon'
+    year = pub.get('year') if str(pub.get('year', '')).isdigit() else ''
+    words = [w for w in normalize_title(pub.get('title', '')).split() if len(w) > 3]
+    key = base = f"{surname}{year}{words[0] if words else ''}"
+    suffix = ord('a')
+    while key in used:
+        key = f"{base}{chr(suffix)}"
+        suffix += 1
+    used.add(key)
+
+    kind = bibtex_type(pub.get('venue', ''))
+    venue_field = {'inproceedings': 'booktitle', 'article': 'journal'}.get(kind, 'howpublished')
+    fields = [
+        ('title', '{' + bibtex_escape(pub.get('title', '')) + '}'),
+        ('author', bibtex_escape(' and '.join(authors))),
+        (venue_field, bibtex_escape(pub.get('venue', ''))),
+        ('year', year),
+        ('url', pub.get('pdf_link') or pub.get('url') or ''),
+    ]
+    body = ',\n'.join(f"  {name} = {{{value}}}" for name, value in fields if value)
+    return f"@{kind}{{{key},\n{body}\n}}\n"
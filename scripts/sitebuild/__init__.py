@@ -0,0 +1 @@
+"""Build stages for the static site, driven by ``scripts/build_site.py``."""
@@ -0,0 +1,264 @@
+"""Page-weight and request-count audit for every top-level page.
+
+Each page's ``img``, ``link``, ``script`` and ``@import`` references (plus
+``url()`` references inside local stylesheets) are resolved against the
+tree to estimate what a first visit transfers. For images with a
+``srcset``, on the ``<img>`` itself or on a ``<source>`` of its
+``<picture>``, the candidate a WebP-capable browser at
+``DEVICE_PIXEL_RATIO`` would pick is counted instead of ``src``.
+PDFs linked from the page are reported separately since they are only
+fetched on click. Pages are checked against the budgets in
+``_data/budgets.json`` and the report is emitted as JSON.
+"""
+
+import json
+import os
+import re
+from html.parser import HTMLParser
+
+from sitebuild.html import is_local, local_path, site_pages
+from sitebuild.images import Image, display_size
+
+BUDGETS_PATH = os.path.join('_data', 'budgets.json')
+
+# An image is oversized when its natural width exceeds its displayed
+# width (times the highest density we serve) by this factor
+OVERSIZE_FACTOR = 2.0
+MAX_DENSITY = 2
+
+LARGEST_ASSETS = 5
+
+# The visit the audit estimates: a browser that supports these image
+# types, with this viewport width and device pixel ratio
+SUPPORTED_IMAGE_TYPES = ('image/webp', 'image/jpeg', 'image/png', 'image/gif', 'image/svg+xml')
+VIEWPORT_WIDTH = 1280
+DEVICE_PIXEL_RATIO = 1
+
+CSS_URL_RE = re.compile(r'url\(\s*[\'"]?([^\'")]+)[\'"]?\s*\)|@import\s+[\'"]([^\'"]+)[\'"]', re.I)
+
+
+def parse_srcset(value):
+    """Return the (url, descriptor) candidates of a srcset, descriptor lowercased"""
+    candidates = []
+    for candidate in (value or '').split(','):
+        parts = candidate.split()
+        if parts:
+            candidates.append((parts[0], parts[1].lower() if len(parts) > 1 else '1x'))
+    return candidates
+
+
+def slot_width(attrs):
+    """Return the CSS width an image's sizes attribute gives it"""
+    # The last entry of sizes is the one without a media condition
+    size = (attrs.get('sizes') or '').split(',')[-1].strip().lower()
+    try:
+        if size.endswith('px'):
+            return float(size[:-2])
+        if size.endswith('vw'):
+            return VIEWPORT_WIDTH * float(size[:-2]) / 100
+    except ValueError:
+        pass
+    return display_size(attrs)[0] or VIEWPORT_WIDTH
+
+
+def pick_candidate(srcset, attrs):
+    """Return the srcset URL a browser would fetch, or None if it has none"""
+    candidates = parse_srcset(srcset)
+    widths = sorted((float(d[:-1]), url) for url, d in candidates if d.endswith('w') and d[:-1].isdigit())
+    if widths:
+        needed = slot_width(attrs) * DEVICE_PIXEL_RATIO
+        return next((url for width, url in widths if width >= needed), widths[-1][1])
+    densities = []
+    for url, descriptor in candidates:
+        try:
+            densities.append((float(descriptor[:-1]), url))
+        except ValueError:
+            continue
+    if densities:
+        densities.sort()
+        return next((url for density, url in densities if density >= DEVICE_PIXEL_RATIO), densities[-1][1])
+    return None
+
+
+class PageReferences(HTMLParser):
+    """Collects the asset references of a page"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.assets = []
+        self.images = []
+        self.pdfs = []
+        self.in_style = False
+        self.style_text = []
+        self.picture_source = None
+        self.in_picture = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'picture':
+            self.in_picture = True
+            self.picture_source = None
+        elif tag == 'source' and self.in_picture:
+            # The first <source> of a supported type wins
+            supported = not attrs.get('type') or attrs['type'].lower() in SUPPORTED_IMAGE_TYPES
+            if self.picture_source is None and supported and attrs.get('srcset'):
+                self.picture_source = attrs
+        elif tag == 'img':
+            url = None
+            if self.in_picture and self.picture_source is not None:
+                url = pick_candidate(self.picture_source['srcset'], {**attrs, **self.picture_source})
+            if url is None and attrs.get('srcset'):
+                url = pick_candidate(attrs['srcset'], attrs)
+            url = url or attrs.get('src')
+            if url:
+                self.assets.append(url)
+                self.images.append((url, attrs))
+        elif tag == 'link' and attrs.get('href'):
+            rel = (attrs.get('rel') or '').lower()
+            if 'stylesheet' in rel or 'icon' in rel or 'preload' in rel:
+                self.assets.append(attrs['href'])
+        elif tag == 'script' and attrs.get('src'):
+            self.assets.append(attrs['src'])
+        elif tag == 'a' and local_path(attrs.get('href') or '').lower().endswith('.pdf'):
+            self.pdfs.append(attrs['href'])
+        elif tag == 'style':
+            self.in_style = True
+
+    def handle_endtag(self, tag):
+        if tag == 'style':
+            self.in_style = False
+        elif tag == 'picture':
+            self.in_picture = False
+            self.picture_source = None
+
+    def handle_data(self, data):
+        if self.in_style:
+            self.style_text.append(data)
+
+
+def css_references(text):
+    """Return the url() and @import targets in a stylesheet"""
+    return [a or b for a, b in CSS_URL_RE.findall(text)]
+
+
+def target_path(base, url):
+    """Return the site-relative path a local reference points at"""
+    return os.path.normpath(os.path.join(os.path.dirname(base), local_path(url)))
+
+
+def resolve(root, base, url):
+    """Resolve a local reference, returning None if the file does not exist"""
+    path = target_path(base, url)
+    return path if os.path.isfile(os.path.join(root, path)) else None
+
+
+def natural_width(path):
+    """Return an image's natural width, or None if it cannot be read"""
+    if Image is None:
+        return None
+    try:
+        with Image.open(path) as image:
+            return image.width
+    except OSError:
+        return None
+
+
+def audit_page(root, page):
+    """Return the weight report for one page"""
+    with open(os.path.join(root, page), 'r', encoding='utf-8', errors='replace') as f:
+        text = f.read()
+    parser = PageReferences()
+    parser.feed(text)
+
+    sizes = {}
+    missing = []
+    queue = [(page, url) for url in parser.assets + css_references(''.join(parser.style_text))]
+    while queue:
+        base, url = queue.pop()
+        if not is_local(url):
+            continue
+        path = resolve(root, base, url)
+        if path is None:
+            missing.append(target_path(base, url))
+            continue
+        if path in sizes:
+            continue
+        sizes[path] = os.path.getsize(os.path.join(root, path))
+        if path.endswith('.css'):
+            with open(os.path.join(root, path), 'r', encoding='utf-8', errors='replace') as f:
+                queue.extend((path, ref) for ref in css_references(f.read()))
+
+    oversized = []
+    for url, attrs in parser.images:
+        path = resolve(root, page, url) if is_local(url) else None
+        width, _ = display_size(attrs)
+        if path is None or not width:
+            continue
+        natural = natural_width(os.path.join(root, path))
+        if natural and natural > width * MAX_DENSITY * OVERSIZE_FACTOR:
+            oversized.append({
+                'path': path,
+                'bytes': sizes[path],
+                'natural_width': natural,
+                'display_width': width,
+            })
+
+    pdfs = {}
+    for url in parser.pdfs:
+        path = resolve(root, page, url) if is_local(url) else None
+        if path is not None:
+            pdfs[path] = os.path.getsize(os.path.join(root, path))
+
+    html_bytes = len(text.encode('utf-8'))
+    largest = sorted(sizes.items(), key=lambda item: item[1], reverse=True)[:LARGEST_ASSETS]
+    return {
+        'html_bytes': html_bytes,
+        'transfer_bytes': html_bytes + sum(sizes.values()),
+        'requests': 1 + len(sizes),
+        'largest_assets': [{'path': path, 'bytes': size} for path, size in largest],
+        'oversized_images': oversized,
+        'linked_pdf_bytes': sum(pdfs.values()),
+        'missing': sorted(set(missing)),
+    }
+
+
+def load_budgets(root, path=None):
+    """Load the budget config, returning an empty one when there is none"""
+    try:
+        with open(os.path.join(root, path or BUDGETS_PATH), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def check_budgets(page, report, budgets):
+    """Return the budget violations of one page report"""
+    limits = dict(budgets.get('default', {}))
+    limits.update(budgets.get('pages', {}).get(page, {}))
+
+    violations = []
+    for metric, limit in sorted(limits.items()):
+        value = len(report[metric]) if isinstance(report.get(metric), list) else report.get(metric)
+        if value is not None and value > limit:
+            violations.append({'metric': metric, 'value': value, 'limit': limit})
+    return violations
+
+
+def audit_site(root='.', pages=None, budgets_path=None):
+    """Audit every page and return (report, number of pages over budget)"""
+    budgets = load_budgets(root, budgets_path)
+    report = {'pages': {}, 'over_budget': []}
+
+    for page in pages or site_pages(root):
+        page_report = audit_page(root, page)
+        page_report['violations'] = check_budgets(page, page_report, budgets)
+        if page_report['violations']:
+            report['over_budget'].append(page)
+        report['pages'][page] = page_report
+
+    report['totals'] = {
+        'pages': len(report['pages']),
+        'transfer_bytes': sum(page['transfer_bytes'] for page in report['pages'].values()),
+        'requests': sum(page['requests'] for page in report['pages'].values()),
+    }
+    return report, len(report['over_budget'])
@@ -0,0 +1,325 @@
+"""Per-page critical CSS, unused-rule purge and minification.
+
+Used by the dist stage. For each page the classes, ids and tag names that
+actually occur are collected, and every rule of a linked stylesheet whose
+selectors need something the page does not have is dropped. Rules that
+match elements near the top of the page are inlined into ``<head>`` as
+critical CSS, and the purged, minified stylesheet is loaded asynchronously.
+
+The asynchronous stylesheet holds every used rule, not just the ones left
+over after the critical subset, so the cascade order is the same as with
+the original stylesheet once it has loaded.
+
+Matching is deliberately conservative: a selector is kept when every
+class, id and tag it names occurs somewhere on the page (or in the first
+part of it, for the critical subset), without checking how they nest.
+"""
+
+import re
+from html.parser import HTMLParser
+
+from sitebuild.html import is_local, parse_tag
+
+# Elements starting within this many bytes of <body> count as above the fold
+ABOVE_FOLD_BYTES = 8 * 1024
+
+# Tokens every page has, whether or not they are written out
+IMPLICIT_TOKENS = {'html', 'head', 'body'}
+
+LINK_RE = re.compile(r'<link\b[^>]*>', re.I)
+BODY_RE = re.compile(r'<body\b[^>]*>', re.I)
+HEAD_END_RE = re.compile(r'</head\s*>', re.I)
+
+# Pieces of a selector that never have to be present on the page
+SELECTOR_NOISE_RE = re.compile(r'"[^"]*"|\'[^\']*\'|\[[^\]]*\]|::?[\w-]+(\([^)]*\))?')
+SELECTOR_TOKEN_RE = re.compile(r'([.#]?)(-?[_a-zA-Z][\w-]*)')
+FONT_FAMILY_RE = re.compile(r'font(?:-family)?\s*:([^;}]*)', re.I)
+ANIMATION_RE = re.compile(r'animation(?:-name)?\s*:([^;}]*)', re.I)
+
+# Blocks that hold rules rather than declarations
+GROUPING_RULES = ('@media', '@supports', '@document', '@layer')
+
+
+class PageTokens(HTMLParser):
+    """Collects the tag names, classes and ids used by a page"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tokens = set(IMPLICIT_TOKENS)
+
+    def handle_starttag(self, tag, attrs):
+        self.tokens.add(tag)
+        for attr, value in attrs:
+            if attr == 'class' and value:
+                self.tokens.update('.' + name for name in value.split())
+            elif attr == 'id' and value:
+                self.tokens.add('#' + value.strip())
+
+    handle_startendtag = handle_starttag
+
+
+def page_tokens(text):
+    """Return the set of tokens ('div', '.class', '#id') used in markup"""
+    parser = PageTokens()
+    parser.feed(text)
+    parser.close()
+    return parser.tokens
+
+
+def above_fold(text):
+    """Return the markup that starts within ABOVE_FOLD_BYTES of <body>"""
+    body = BODY_RE.search(text)
+    start = body.end() if body else 0
+    return text[:start + ABOVE_FOLD_BYTES]
+
+
+def split_top_level(text, separator):
+    """Split text on a separator that is not nested in brackets or strings"""
+    parts, depth, quote, start = [], 0, None, 0
+    for i, char in enumerate(text):
+        if quote:
+            if char == quote and text[i - 1] != '\\':
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char == separator and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return parts
+
+
+def strip_comments(text):
+    """Remove comments from a stylesheet, leaving strings untouched"""
+    out, i, quote = [], 0, None
+    while i < len(text):
+        char = text[i]
+        if quote:
+            out.append(char)
+            if char == '\\' and i + 1 < len(text):
+                out.append(text[i + 1])
+                i += 1
+            elif char == quote:
+                quote = None
+        elif char in '"\'':
+            quote = char
+            out.append(char)
+        elif text.startswith('/*', i):
+            end = text.find('*/', i + 2)
+            i = len(text) if end < 0 else end + 2
+            continue
+        else:
+            out.append(char)
+        i += 1
+    return ''.join(out)
+
+
+def parse_stylesheet(text):
+    """Parse a stylesheet into a list of rules
+
+    Each rule is a dict with a 'prelude' (selectors or at-rule header)
+    and either 'declarations' (a string), 'rules' (nested rules of a
+    grouping at-rule) or neither (statements such as @import).
+    """
+    return _parse_rules(strip_comments(text))
+
+
+def _parse_rules(text):
+    rules, i, quote, start = [], 0, None, 0
+    while i < len(text):
+        char = text[i]
+        if quote:
+            if char == '\\':
+                i += 1
+            elif char == quote:
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char == ';' and text[start:i].strip().startswith('@'):
+            rules.append({'prelude': ' '.join(text[start:i].split())})
+            start = i + 1
+        elif char == '{':
+            end = _block_end(text, i)
+            prelude = ' '.join(text[start:i].split())
+            body = text[i + 1:end]
+            if prelude.lower().startswith(GROUPING_RULES):
+                rules.append({'prelude': prelude, 'rules': _parse_rules(body)})
+            else:
+                rules.append({'prelude': prelude, 'declarations': body})
+            i = start = end + 1
+            continue
+        i += 1
+    return rules
+
+
+def _block_end(text, start):
+    """Return the index of the brace closing the block opened at start"""
+    depth, quote = 0, None
+    for i in range(start, len(text)):
+        char = text[i]
+        if quote:
+            if char == quote and text[i - 1] != '\\':
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return i
+    return len(text)
+
+
+def selector_tokens(selector):
+    """Return the tokens a selector needs to be present on the page"""
+    selector = SELECTOR_NOISE_RE.sub(' ', selector)
+    tokens = set()
+    for prefix, name in SELECTOR_TOKEN_RE.findall(selector):
+        tokens.add(prefix + (name if prefix else name.lower()))
+    return tokens
+
+
+def used_selectors(prelude, tokens):
+    """Return the selectors of a rule that can match the page"""
+    return [selector.strip() for selector in split_top_level(prelude, ',')
+            if selector.strip() and selector_tokens(selector) <= tokens]
+
+
+def _names(pattern, declarations):
+    names = set()
+    for value in pattern.findall(declarations):
+        names.update(name.strip(' \'"').lower() for name in re.split(r'[,\s]+', value) if name.strip(' \'"'))
+    return names
+
+
+def purge(rules, tokens):
+    """Return the rules (and their selectors) that can match the page
+
+    @font-face and @keyframes blocks are kept only if a kept rule refers
+    to their font family or animation name.
+    """
+    kept = _purge_rules(rules, tokens)
+    declarations = ''.join(_declarations(kept))
+    families = _names(FONT_FAMILY_RE, declarations)
+    animations = _names(ANIMATION_RE, declarations)
+    return _drop_unused_resources(kept, families, animations)
+
+
+def _purge_rules(rules, tokens):
+    kept = []
+    for rule in rules:
+        prelude = rule['prelude']
+        if 'rules' in rule:
+            children = _purge_rules(rule['rules'], tokens)
+            if children:
+                kept.append({'prelude': prelude, 'rules': children})
+        elif prelude.startswith('@'):
+            kept.append(rule)
+        else:
+            selectors = used_selectors(prelude, tokens)
+            if selectors:
+                kept.append({'prelude': ','.join(selectors), 'declarations': rule['declarations']})
+    return kept
+
+
+def _declarations(rules):
+    for rule in rules:
+        if 'rules' in rule:
+            yield from _declarations(rule['rules'])
+        elif 'declarations' in rule and not rule['prelude'].lower().startswith(('@font-face', '@keyframes')):
+            yield rule['declarations'] + ';'
+
+
+def _drop_unused_resources(rules, families, animations):
+    kept = []
+    for rule in rules:
+        prelude = rule['prelude'].lower()
+        if 'rules' in rule:
+            children = _drop_unused_resources(rule['rules'], families, animations)
+            if children:
+                kept.append({'prelude': rule['prelude'], 'rules': children})
+        elif prelude.startswith('@font-face'):
+            if _names(re.compile(r'font-family\s*:([^;}]*)', re.I), rule['declarations']) & families:
+                kept.append(rule)
+        elif re.match(r'@(-\w+-)?keyframes\b', prelude):
+            if prelude.split()[-1].strip('\'"') in animations:
+                kept.append(rule)
+        else:
+            kept.append(rule)
+    return kept
+
+
+def collapse_whitespace(text):
+    """Collapse runs of whitespace outside strings to a single space"""
+    pieces = re.split(r'("(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\')', text)
+    for i in range(0, len(pieces), 2):
+        pieces[i] = re.sub(r'\s+', ' ', pieces[i])
+    return ''.join(pieces).strip()
+
+
+def minify_declarations(declarations):
+    """Collapse whitespace in a declaration block, keeping strings intact"""
+    parts = []
+    for declaration in split_top_level(declarations, ';'):
+        declaration = collapse_whitespace(declaration)
+        if not declaration:
+            continue
+        name, colon, value = declaration.partition(':')
+        parts.append(f"{name.strip()}{colon}{value.strip()}" if colon else declaration)
+    return ';'.join(parts)
+
+
+def serialize(rules):
+    """Serialize parsed rules as minified CSS"""
+    out = []
+    for rule in rules:
+        if 'rules' in rule:
+            out.append(f"{rule['prelude']}{{{serialize(rule['rules'])}}}")
+        elif 'declarations' in rule:
+            if re.match(r'@(-\w+-)?keyframes\b', rule['prelude'].lower()):
+                body = serialize(_parse_rules(rule['declarations']))
+            else:
+                body = minify_declarations(rule['declarations'])
+            out.append(f"{rule['prelude']}{{{body}}}")
+        else:
+            out.append(rule['prelude'] + ';')
+    return ''.join(out)
+
+
+def minify(text):
+    """Minify a stylesheet without dropping any rules"""
+    return serialize(parse_stylesheet(text))
+
+
+def stylesheet_links(text):
+    """Return the <link rel=stylesheet> tags of a page's <head> as (match, href)"""
+    head_end = HEAD_END_RE.search(text)
+    limit = head_end.start() if head_end else len(text)
+    links = []
+    for match in LINK_RE.finditer(text, 0, limit):
+        _, attrs = parse_tag(match.group(0))
+        attrs = dict(attrs)
+        rel = (attrs.get('rel') or '').lower().split()
+        href = attrs.get('href')
+        media = (attrs.get('media') or 'all').lower()
+        if 'stylesheet' in rel and href and is_local(href) and media in ('all', 'screen'):
+            links.append((match, href))
+    return links
+
+
+def async_link(href):
+    """Markup that loads a stylesheet without blocking the first paint"""
+    return (f'<link rel="preload" href="{href}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">'
+            f'<noscript><link rel="stylesheet" href="{href}"></noscript>')
+
+
+def split_page_css(text, stylesheet):
+    """Return (critical CSS, purged CSS) of a stylesheet for one page"""
+    rules = parse_stylesheet(stylesheet)
+    return (serialize(purge(rules, page_tokens(above_fold(text)))),
+            serialize(purge(rules, page_tokens(text))))
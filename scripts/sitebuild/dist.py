@@ -0,0 +1,308 @@
+"""Deployable copy of the site with fingerprinted, precompressed assets.
+
+The pages are copied to an output directory (``_site/`` by default). Every
+stylesheet, script and image referenced from a page or stylesheet is
+written once under ``assets/`` with a content hash in its name, e.g.
+``assets/css/style.3f2a9c41d0.css``, and all references are rewritten to
+match, so ``/assets/*`` can be served with immutable, year-long cache
+headers. Text assets and large PDFs get ``.gz`` and ``.br`` siblings for
+servers that serve precompressed files. PDFs keep their names since other
+sites link to them. Render-blocking stylesheets are replaced by per-page
+critical CSS and an asynchronously loaded purged copy (see ``css.py``),
+and pages are minified (see ``minify.py``). Nothing else of the tree is
+published: only the local files pages link to that are not fingerprinted,
+the documents under ``PUBLISHED_DIRS`` and the ``PUBLISHED_FILES``, so
+sources, backups and unhashed copies of assets stay out of ``_site/``.
+
+Hashed names double as a cache: an asset whose content did not change
+maps to an existing file and is neither copied nor compressed again.
+"""
+
+import gzip
+import hashlib
+import os
+import re
+import shutil
+
+from sitebuild.css import async_link, split_page_css, stylesheet_links
+from sitebuild.html import is_local, local_path, site_pages
+from sitebuild.minify import minify_html
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+OUTPUT_DIR = '_site'
+ASSETS_DIR = 'assets'
+
+FINGERPRINT_EXTENSIONS = ('.css', '.js', '.png', '.jpg', '.jpeg', '.gif', '.webp', '.svg', '.ico',
+                          '.woff', '.woff2', '.ttf', '.eot')
+COMPRESS_EXTENSIONS = ('.html', '.css', '.js', '.svg', '.json', '.txt', '.xml')
+PDF_COMPRESS_MIN_BYTES = 100 * 1024
+
+# Published under their own names whether or not a page links to them:
+# documents other sites link to, and files fetched by convention or by a
+# script rather than through a page's attributes
+PUBLISHED_DIRS = ('files',)
+PUBLISHED_FILES = ('favicon.ico', 'publication-search.json', 'robots.txt', 'CNAME')
+
+HEADERS = """/assets/*
+  Cache-Control: public, max-age=31536000, immutable
+"""
+
+ATTR_RE = re.compile(r'''(\b(?:src|href|srcset|poster)\s*=\s*)("[^"]*"|'[^']*')''', re.I)
+CSS_URL_RE = re.compile(r'''(url\(\s*)(['"]?)([^'")]+)(\2\s*\))|(@import\s+)(['"])([^'"]+)(\6)''', re.I)
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:10]
+
+
+def fingerprinted_name(path, data):
+    """Return the assets/ path of a file for the given content"""
+    stem, extension = os.path.splitext(path)
+    return os.path.join(ASSETS_DIR, f"{stem}.{content_hash(data)}{extension}")
+
+
+def relative_url(target, base):
+    """Return the URL of target relative to the file base"""
+    return os.path.relpath(target, os.path.dirname(base) or '.').replace(os.sep, '/')
+
+
+class Fingerprinter:
+    """Maps source assets to their fingerprinted output names"""
+
+    def __init__(self, root, output_dir):
+        self.root = root
+        self.output_dir = output_dir
+        self.names = {}
+        self.written = set()
+        self.referenced = set()
+
+    def asset(self, path):
+        """Return the fingerprinted path of a source asset, writing it if needed"""
+        if path in self.names:
+            return self.names[path]
+
+        with open(os.path.join(self.root, path), 'rb') as f:
+            data = f.read()
+        if path.endswith('.css'):
+            # Stylesheets are hashed after their own references are rewritten
+            data = self.rewrite_css(data.decode('utf-8', errors='replace'), path).encode('utf-8')
+
+        self.names[path] = self.write_asset(path, data)
+        return self.names[path]
+
+    def write_asset(self, path, data):
+        """Write the content of a source asset under its fingerprinted name"""
+        name = fingerprinted_name(path, data)
+        target = os.path.join(self.output_dir, name)
+        if not os.path.exists(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as f:
+                f.write(data)
+        self.written.add(name)
+        return name
+
+    def map_url(self, url, base, output_base):
+        """Rewrite one local reference found in base (written to output_base)"""
+        if not is_local(url):
+            return url
+        path = os.path.normpath(os.path.join(os.path.dirname(base), local_path(url)))
+        suffix = url[len(url.split('#', 1)[0].split('?', 1)[0]):]
+        if not path.lower().endswith(FINGERPRINT_EXTENSIONS) or not os.path.isfile(os.path.join(self.root, path)):
+            # Keep the original target, rebased if the reference moved, and
+            # publish it under its own name
+            if os.path.isfile(os.path.join(self.root, path)) and not path.startswith('..'):
+                self.referenced.add(path)
+            if os.path.dirname(base) == os.path.dirname(output_base):
+                return url
+            return relative_url(path, output_base) + suffix
+        return relative_url(self.asset(path), output_base) + suffix
+
+    def rewrite_css(self, text, path, output_base=None):
+        """Rewrite url() and @import references in a stylesheet
+
+        References are resolved against path and written relative to
+        output_base, which defaults to the stylesheet's own assets/ copy.
+        """
+        output_base = output_base or fingerprinted_name(path, b'')
+
+        def replace(match):
+            if match.group(1):
+                return match.group(1) + match.group(2) + self.map_url(match.group(3), path, output_base) + match.group(4)
+            return match.group(5) + match.group(6) + self.map_url(match.group(7), path, output_base) + match.group(8)
+
+        return CSS_URL_RE.sub(replace, text)
+
+    def inline_critical_css(self, text, page):
+        """Replace a page's stylesheet links with critical CSS and an async purged copy"""
+        for match, href in reversed(stylesheet_links(text)):
+            path = os.path.normpath(os.path.join(os.path.dirname(page), local_path(href)))
+            if not os.path.isfile(os.path.join(self.root, path)):
+                continue
+            with open(os.path.join(self.root, path), 'r', encoding='utf-8', errors='replace') as f:
+                critical, purged = split_page_css(text, f.read())
+            purged = self.write_asset(path, self.rewrite_css(purged, path).encode('utf-8'))
+            critical = self.rewrite_css(critical, path, output_base=page)
+            replacement = f"<style>{critical}</style>{async_link(relative_url(purged, page))}"
+            text = text[:match.start()] + replacement + text[match.end():]
+        return text
+
+    def rewrite_html(self, text, page):
+        """Rewrite asset references in a page's attributes and inline styles"""
+        def replace_attr(match):
+            quote = match.group(2)[0]
+            value = match.group(2)[1:-1]
+            if match.group(1).strip().lower().startswith('srcset'):
+                candidates = []
+                for candidate in value.split(','):
+                    parts = candidate.strip().split(None, 1)
+                    if parts:
+                        parts[0] = self.map_url(parts[0], page, page)
+                        candidates.append(' '.join(parts))
+                value = ', '.join(candidates)
+            else:
+                value = self.map_url(value, page, page)
+            return f"{match.group(1)}{quote}{value}{quote}"
+
+        text = ATTR_RE.sub(replace_attr, text)
+        return self.rewrite_css(text, page, output_base=page) if 'url(' in text or '@import' in text else text
+
+
+def compress(path):
+    """Write .gz and .br siblings of a file unless they are already current"""
+    mtime = os.path.getmtime(path)
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    written = []
+    variants = [('.gz', lambda raw: gzip.compress(raw, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', lambda raw: brotli.compress(raw, quality=11)))
+    for extension, encode in variants:
+        target = path + extension
+        if os.path.exists(target) and os.path.getmtime(target) >= mtime:
+            written.append(target)
+            continue
+        compressed = encode(data)
+        if len(compressed) < len(data):
+            with open(target, 'wb') as f:
+                f.write(compressed)
+            written.append(target)
+    return written
+
+
+def copy_if_changed(source, target):
+    """Copy a file unless the target already has the same size and mtime"""
+    stat = os.stat(source)
+    try:
+        current = os.stat(target)
+        if current.st_size == stat.st_size and int(current.st_mtime) == int(stat.st_mtime):
+            return False
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+    shutil.copy2(source, target)
+    return True
+
+
+def write_if_changed(target, data):
+    """Write bytes to a file unless it already holds exactly them"""
+    try:
+        with open(target, 'rb') as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    with open(target, 'wb') as f:
+        f.write(data)
+    return True
+
+
+def published_files(root, referenced=()):
+    """Return the files published under their own names, relative to root
+
+    These are the referenced local files that are not fingerprinted, the
+    files of PUBLISHED_DIRS other than fingerprintable assets, and the
+    PUBLISHED_FILES that exist.
+    """
+    paths = set(referenced)
+    for published in PUBLISHED_DIRS:
+        for directory, dirnames, filenames in os.walk(os.path.join(root, published)):
+            dirnames[:] = sorted(name for name in dirnames if not name.startswith('.'))
+            for name in filenames:
+                # Skip dotfiles and macOS AppleDouble (._*) metadata
+                if not name.startswith('.') and not name.lower().endswith(FINGERPRINT_EXTENSIONS):
+                    paths.add(os.path.relpath(os.path.join(directory, name), root))
+    paths.update(name for name in PUBLISHED_FILES if os.path.isfile(os.path.join(root, name)))
+    return sorted(paths)
+
+
+def build_dist(root='.', output_dir=None, critical_css=True, minify=True):
+    """Write the fingerprinted, precompressed copy of the site
+
+    Returns a summary dict of what was written.
+    """
+    output_dir = os.path.join(root, output_dir or OUTPUT_DIR)
+    os.makedirs(output_dir, exist_ok=True)
+    fingerprinter = Fingerprinter(root, output_dir)
+    produced = set()
+    stats = {'pages': 0, 'assets': 0, 'copied': 0, 'compressed': 0}
+
+    pages = site_pages(root)
+    for page in pages:
+        with open(os.path.join(root, page), 'r', encoding='utf-8', errors='replace') as f:
+            text = f.read()
+        if critical_css:
+            text = fingerprinter.inline_critical_css(text, page)
+        text = fingerprinter.rewrite_html(text, page)
+        if minify:
+            text = minify_html(text)
+        if write_if_changed(os.path.join(output_dir, page), text.encode('utf-8')):
+            stats['pages'] += 1
+        produced.add(page)
+
+    # Documents and other unfingerprinted files keep their names so
+    # existing links keep working
+    for path in published_files(root, fingerprinter.referenced):
+        if path in produced:
+            continue
+        if copy_if_changed(os.path.join(root, path), os.path.join(output_dir, path)):
+            stats['copied'] += 1
+        produced.add(path)
+
+    produced |= fingerprinter.written
+    stats['assets'] = len(fingerprinter.written)
+
+    write_if_changed(os.path.join(output_dir, '_headers'), HEADERS.encode('ascii'))
+    produced.add('_headers')
+
+    for path in sorted(produced):
+        full_path = os.path.join(output_dir, path)
+        compressible = path.lower().endswith(COMPRESS_EXTENSIONS) or (
+            path.lower().endswith('.pdf') and os.path.getsize(full_path) >= PDF_COMPRESS_MIN_BYTES)
+        if compressible:
+            for variant in compress(full_path):
+                produced.add(os.path.relpath(variant, output_dir))
+                stats['compressed'] += 1
+
+    # Drop outputs of earlier builds that are no longer produced
+    removed = 0
+    for directory, _, filenames in os.walk(output_dir):
+        for name in filenames:
+            path = os.path.relpath(os.path.join(directory, name), output_dir)
+            if path not in produced:
+                os.remove(os.path.join(directory, name))
+                removed += 1
+    for directory, _, _ in os.walk(output_dir, topdown=False):
+        if directory != output_dir and not os.listdir(directory):
+            os.rmdir(directory)
+    stats['removed'] = removed
+
+    if brotli is None:
+        print("brotli is not installed, skipping .br variants: pip install brotli")
+    print(f"Wrote {stats['pages']} pages and {stats['assets']} fingerprinted assets to {output_dir}, "
+          f"copied {stats['copied']} files, {stats['compressed']} precompressed variants, removed {removed}")
+    return stats
@@ -0,0 +1,62 @@
+"""Small helpers shared by the build stages that read or rewrite pages."""
+
+import glob
+import html
+import os
+import re
+from html.parser import HTMLParser
+from urllib.parse import unquote
+
+
+def site_pages(root='.'):
+    """Return the site's top-level HTML pages, sorted"""
+    return sorted(os.path.relpath(path, root) for path in glob.glob(os.path.join(root, '*.html')))
+
+
+class _TagParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tag = None
+        self.attrs = []
+
+    def handle_starttag(self, tag, attrs):
+        if self.tag is None:
+            self.tag = tag
+            self.attrs = attrs
+
+    handle_startendtag = handle_starttag
+
+
+def parse_tag(text):
+    """Parse a single start tag into (name, [(attr, value), ...])"""
+    parser = _TagParser()
+    parser.feed(text)
+    parser.close()
+    return parser.tag, parser.attrs
+
+
+def format_tag(name, attrs):
+    """Serialize a start tag from (attr, value) pairs"""
+    parts = [name]
+    for attr, value in attrs:
+        if value is None:
+            parts.append(attr)
+        else:
+            value = html.escape(value, quote=False).replace('"', '&quot;')
+            parts.append(f'{attr}="{value}"')
+    return '<' + ' '.join(parts) + '>'
+
+
+def is_local(url):
+    """Return True for a reference into the site itself"""
+    return bool(url) and not url.startswith(('http:', 'https:', '//', 'mailto:', 'tel:', 'data:', '#', 'javascript:'))
+
+
+def local_path(url):
+    """Strip the query and fragment from a local reference
+
+    Tabs and newlines are dropped the way browsers do, since several
+    hand-written pages wrap long src attributes across lines.
+    """
+    url = re.sub(r'[\t\r\n]', '', url).strip()
+    return unquote(url.split('#', 1)[0].split('?', 1)[0])
@@ -0,0 +1,264 @@
+"""Responsive image pipeline for the gallery and profile pages.
+
+For every local ``<img>`` with a known display size the original is
+resized to 1x and 2x that size as JPEG (PNG when it has transparency) and
+WebP, and the tag is rewritten into a ``<picture>`` with ``srcset``,
+``sizes``, ``width``/``height``, ``loading="lazy"`` and
+``decoding="async"``. Variant names include a hash of the source content,
+so unchanged images are never re-encoded; encoding runs on a process pool.
+The original source is kept in ``data-orig`` so rewriting is repeatable.
+Besides the top-level pages, the partials in ``_templates/partials/`` are
+rewritten too: the page build splices the shared header logos from them,
+so they must carry the same tags as the pages.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from sitebuild.html import format_tag, is_local, local_path, parse_tag, site_pages
+from sitebuild.pages import TEMPLATE_DIR
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+OUTPUT_DIR = os.path.join('images', 'resized')
+MANIFEST_PATH = os.path.join('_build', 'images.json')
+PARTIALS_DIR = os.path.join(TEMPLATE_DIR, 'partials')
+
+SOURCE_DIRS = ('images/', 'photos/')
+RASTER_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+DENSITIES = (1, 2)
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+
+# Images this close to the top of a page are usually above the fold and
+# are left to load eagerly
+EAGER_IMAGES = 2
+
+PICTURE_RE = re.compile(
+    r'<picture\b[^>]*data-generated[^>]*>\s*<source\b[^>]*>\s*(<img\b[^>]*>)\s*</picture>'
+    r'|<img\b[^>]*>',
+    re.I,
+)
+STYLE_SIZE_RE = re.compile(r'(?<![-\w])(width|height)\s*:\s*(\d+(?:\.\d+)?)px', re.I)
+
+
+def display_size(attrs):
+    """Return the (width, height) an <img> is displayed at, None where unknown"""
+    size = {'width': None, 'height': None}
+    for attr in ('width', 'height'):
+        value = attrs.get(attr) or ''
+        if value.isdigit():
+            size[attr] = int(value)
+    for attr, value in STYLE_SIZE_RE.findall(attrs.get('style') or ''):
+        size[attr.lower()] = int(float(value))
+    return size['width'], size['height']
+
+
+def source_hash(path, manifest):
+    """Return a source image's content hash, reusing it while size and mtime match"""
+    stat = os.stat(path)
+    entry = manifest.get(path)
+    if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+        return entry['hash']
+    with open(path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:12]
+    manifest[path] = {'size': stat.st_size, 'mtime': stat.st_mtime, 'hash': digest}
+    return digest
+
+
+def variant_path(source, digest, width, extension):
+    """Return where a resized variant of a source image is written"""
+    stem = re.sub(r'[^\w.-]+', '_', os.path.splitext(os.path.basename(source))[0])
+    return f"{OUTPUT_DIR}/{stem}-{digest}-{width}w{extension}"
+
+
+def image_has_alpha(image):
+    """True if an opened image has transparency, by alpha channel or colour key"""
+    return image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+
+
+def encode_variants(source, jobs, has_alpha):
+    """Resize one source image into every requested (width, path) variant
+
+    has_alpha is the planned value, which also chose PNG or JPEG for the
+    fallback paths in jobs.
+    """
+    with Image.open(source) as image:
+        image.load()
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+        for width, path in jobs:
+            height = max(1, round(image.height * width / image.width))
+            resized = image.resize((width, height), Image.LANCZOS) if width < image.width else image
+            if path.endswith('.webp'):
+                resized.save(path, 'WEBP', quality=WEBP_QUALITY, method=6)
+            elif path.endswith('.png'):
+                resized.save(path, 'PNG', optimize=True)
+            else:
+                resized.save(path, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return source
+
+
+def image_info(path, cache):
+    """Return (width, height, has_alpha) of a source image, memoized per run"""
+    if path not in cache:
+        with Image.open(path) as image:
+            cache[path] = (image.width, image.height, image_has_alpha(image))
+    return cache[path]
+
+
+def plan_image(root, attrs, manifest, info_cache):
+    """Work out the variants for one <img>, or None if it cannot be resized"""
+    source = local_path(attrs.get('data-orig') or attrs.get('src') or '')
+    if not is_local(source) or not source.startswith(SOURCE_DIRS):
+        return None
+    if not source.lower().endswith(RASTER_EXTENSIONS):
+        return None
+    path = os.path.join(root, source)
+    if not os.path.isfile(path):
+        return None
+
+    width, height = display_size(attrs)
+    if not width and not height:
+        return None
+
+    natural_width, natural_height, has_alpha = image_info(path, info_cache)
+    if not width:
+        width = round(height * natural_width / natural_height)
+    if not height:
+        height = round(width * natural_height / natural_width)
+
+    digest = source_hash(path, manifest)
+    fallback = '.png' if has_alpha else '.jpg'
+    variants = {}
+    for density in DENSITIES:
+        target = min(width * density, natural_width)
+        if target in variants:
+            continue
+        variants[target] = (
+            variant_path(source, digest, target, fallback),
+            variant_path(source, digest, target, '.webp'),
+        )
+    return {'source': source, 'width': width, 'height': height, 'has_alpha': has_alpha, 'variants': variants}
+
+
+def rewrite_tag(attrs, plan, eager):
+    """Build the <picture> markup for a planned image"""
+    sizes = f"{plan['width']}px"
+    fallback_srcset = ', '.join(f"{paths[0]} {w}w" for w, paths in sorted(plan['variants'].items()))
+    webp_srcset = ', '.join(f"{paths[1]} {w}w" for w, paths in sorted(plan['variants'].items()))
+    smallest = plan['variants'][min(plan['variants'])][0]
+
+    managed = {'src', 'srcset', 'sizes', 'width', 'height', 'loading', 'decoding', 'data-orig'}
+    img_attrs = [(attr, value) for attr, value in attrs if attr not in managed]
+    img_attrs[0:0] = [('src', smallest)]
+    img_attrs += [
+        ('srcset', fallback_srcset),
+        ('sizes', sizes),
+        ('width', str(plan['width'])),
+        ('height', str(plan['height'])),
+        ('loading', 'eager' if eager else 'lazy'),
+        ('decoding', 'async'),
+        ('data-orig', plan['source']),
+    ]
+    source_tag = format_tag('source', [('type', 'image/webp'), ('srcset', webp_srcset), ('sizes', sizes)])
+    return f'<picture data-generated>{source_tag}{format_tag("img", img_attrs)}</picture>'
+
+
+def rewrite_page(root, page, manifest, info_cache, jobs):
+    """Rewrite one page's images, collecting encode jobs; returns new text or None"""
+    with open(os.path.join(root, page), 'r', encoding='utf-8') as f:
+        text = f.read()
+
+    count = 0
+
+    def replace(match):
+        nonlocal count
+        tag_text = match.group(1) or match.group(0)
+        name, attr_list = parse_tag(tag_text)
+        if name != 'img':
+            return match.group(0)
+        attrs = dict(attr_list)
+        count += 1
+        try:
+            plan = plan_image(root, attrs, manifest, info_cache)
+        except OSError as e:
+            print(f"{page}: cannot read image for {tag_text[:60]}: {e}")
+            return match.group(0)
+        if plan is None:
+            return match.group(0)
+        job = jobs.setdefault(plan['source'], {'has_alpha': plan['has_alpha'], 'variants': {}})
+        for width, paths in plan['variants'].items():
+            for variant in paths:
+                job['variants'][variant] = width
+        return rewrite_tag(attr_list, plan, count <= EAGER_IMAGES)
+
+    output = PICTURE_RE.sub(replace, text)
+    return output if output != text else None
+
+
+def image_pages(root='.'):
+    """Return the top-level pages and shared partials, sorted"""
+    partials = glob.glob(os.path.join(root, PARTIALS_DIR, '*.html'))
+    return site_pages(root) + sorted(os.path.relpath(path, root) for path in partials)
+
+
+def build_images(root='.', pages=None, jobs=None, dry_run=False):
+    """Generate responsive variants and rewrite <img> tags across pages
+
+    Returns the list of rewritten pages, or None if Pillow is missing.
+    """
+    if Image is None:
+        print("Pillow is required for the image stage: pip install pillow")
+        return None
+
+    manifest_path = os.path.join(root, MANIFEST_PATH)
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        manifest = {}
+
+    info_cache = {}
+    encode = {}
+    rewritten = {}
+    for page in pages or image_pages(root):
+        output = rewrite_page(root, page, manifest, info_cache, encode)
+        if output is not None:
+            rewritten[page] = output
+
+    # Only encode variants that are not on disk yet
+    pending = {}
+    for source, job in encode.items():
+        missing = [(width, os.path.join(root, path)) for path, width in sorted(job['variants'].items())
+                   if not os.path.exists(os.path.join(root, path))]
+        if missing:
+            pending[os.path.join(root, source)] = (missing, job['has_alpha'])
+
+    total = sum(len(job['variants']) for job in encode.values())
+    print(f"{total} image variants referenced, {sum(len(missing) for missing, _ in pending.values())} to encode")
+    if dry_run:
+        return sorted(rewritten)
+
+    os.makedirs(os.path.join(root, OUTPUT_DIR), exist_ok=True)
+    if pending:
+        with ProcessPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+            for source in pool.map(encode_variants, list(pending), *zip(*pending.values())):
+                print(f"Encoded {os.path.relpath(source, root)}")
+
+    for page, output in rewritten.items():
+        with open(os.path.join(root, page), 'w', encoding='utf-8') as f:
+            f.write(output)
+        print(f"Rewrote images in {page}")
+
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+        f.write('\n')
+    return sorted(rewritten)
@@ -0,0 +1,267 @@
+"""Link check of every top-level page.
+
+Every ``href`` and ``src`` of a page is collected. Local references are
+resolved against the tree. External ones are checked over HTTP, each
+distinct URL once however many pages link to it. The requests run on a
+thread pool over one pooled session, at most ``PER_HOST`` at a time to any
+one host. Each URL is first requested with HEAD and, for servers that
+refuse or mishandle HEAD, again with a streamed GET of which only the
+headers are read. Results are kept in ``_build/link-cache.json``: a URL
+is only requested again once its result is older than ``LINK_TTL_HOURS``
+(``LINK_FAILURE_TTL_HOURS`` for failures), so reruns are mostly served
+from the cache. ``[pdf]`` links the publication renderer left pointing at
+``#`` are reported as placeholders.
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+from sitebuild.html import is_local, local_path, site_pages
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+except ImportError:
+    requests = None
+
+CACHE_PATH = os.path.join('_build', 'link-cache.json')
+
+LINK_TTL_HOURS = float(os.getenv('LINK_TTL_HOURS', '168'))
+LINK_FAILURE_TTL_HOURS = float(os.getenv('LINK_FAILURE_TTL_HOURS', '24'))
+
+LINK_WORKERS = int(os.getenv('LINK_WORKERS', '16'))
+PER_HOST = int(os.getenv('LINK_PER_HOST', '2'))
+LINK_TIMEOUT = float(os.getenv('LINK_TIMEOUT', '15'))
+
+# Connection pools kept open by the session, one per host
+HOST_POOLS = 100
+
+USER_AGENT = 'Mozilla/5.0 (compatible; aimslab-link-check)'
+
+# Statuses after which a HEAD request is retried as GET
+HEAD_FALLBACK_STATUSES = {400, 403, 404, 405, 429, 501}
+
+PLACEHOLDER_TEXTS = {'pdf', '[pdf]'}
+
+
+class PageLinks(HTMLParser):
+    """Collects every href and src of a page, with its line number"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links = []
+        self.placeholders = []
+        self.anchor = None
+        self.anchor_text = []
+
+    def handle_starttag(self, tag, attrs):
+        for attr, value in attrs:
+            if attr in ('href', 'src') and value and value.strip():
+                self.links.append((value.strip(), self.getpos()[0]))
+        if tag == 'a':
+            self.anchor = (dict(attrs).get('href'), self.getpos()[0])
+            self.anchor_text = []
+
+    def handle_endtag(self, tag):
+        if tag == 'a' and self.anchor is not None:
+            href, line = self.anchor
+            if href == '#' and ''.join(self.anchor_text).strip().lower() in PLACEHOLDER_TEXTS:
+                self.placeholders.append(line)
+            self.anchor = None
+
+    def handle_data(self, data):
+        if self.anchor is not None:
+            self.anchor_text.append(data)
+
+
+def page_links(root, page):
+    """Return (links, placeholder lines) of a page, links as (url, line)"""
+    parser = PageLinks()
+    with open(os.path.join(root, page), 'r', encoding='utf-8', errors='replace') as f:
+        parser.feed(f.read())
+    parser.close()
+    return parser.links, parser.placeholders
+
+
+def external_url(url):
+    """Return the http(s) URL a reference fetches, or None if it is not external"""
+    if url.startswith('//'):
+        return 'https:' + url
+    if url.startswith(('http://', 'https://')):
+        return url.split('#', 1)[0]
+    return None
+
+
+def local_target(root, page, url):
+    """Return the tree path a local reference resolves to"""
+    path = local_path(url)
+    if path.startswith('/'):
+        return os.path.normpath(os.path.join(root, path.lstrip('/')))
+    return os.path.normpath(os.path.join(root, os.path.dirname(page), path))
+
+
+def local_exists(path):
+    if os.path.isdir(path):
+        return os.path.exists(os.path.join(path, 'index.html'))
+    return os.path.exists(path)
+
+
+def load_cache(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(path, cache):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+        f.write('\n')
+    os.replace(tmp_path, path)
+
+
+def is_ok(result):
+    return result.get('status') is not None and result['status'] < 400
+
+
+def is_fresh(result, now):
+    ttl = LINK_TTL_HOURS if is_ok(result) else LINK_FAILURE_TTL_HOURS
+    return now - result.get('checked_at', 0) < ttl * 3600
+
+
+def interleave_hosts(urls):
+    """Order URLs round-robin by host, so workers are not all queued on one host"""
+    by_host = {}
+    for url in urls:
+        by_host.setdefault(urlsplit(url).netloc.lower(), []).append(url)
+    queues = list(by_host.values())
+    ordered = []
+    for i in range(max((len(queue) for queue in queues), default=0)):
+        ordered.extend(queue[i] for queue in queues if i < len(queue))
+    return ordered
+
+
+class LinkChecker:
+    """Checks external URLs concurrently over one pooled session"""
+
+    def __init__(self, workers=LINK_WORKERS, per_host=PER_HOST, timeout=LINK_TIMEOUT):
+        self.workers = max(1, workers)
+        self.per_host = max(1, per_host)
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=HOST_POOLS, pool_maxsize=self.per_host)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.hosts = {}
+        self.lock = threading.Lock()
+
+    def host_slot(self, url):
+        """Semaphore bounding the concurrent requests to a URL's host"""
+        host = urlsplit(url).netloc.lower()
+        with self.lock:
+            if host not in self.hosts:
+                self.hosts[host] = threading.Semaphore(self.per_host)
+            return self.hosts[host]
+
+    def request(self, method, url):
+        response = self.session.request(method, url, timeout=self.timeout, allow_redirects=True, stream=True)
+        response.close()
+        return response.status_code
+
+    def check(self, url):
+        """Return the result of checking one URL: status, method and error"""
+        result = {'status': None, 'method': 'HEAD', 'error': '', 'checked_at': int(time.time())}
+        with self.host_slot(url):
+            try:
+                result['status'] = self.request('HEAD', url)
+            except requests.RequestException as e:
+                result['error'] = str(e)
+            if result['status'] is None or result['status'] in HEAD_FALLBACK_STATUSES:
+                result['method'] = 'GET'
+                try:
+                    result['status'] = self.request('GET', url)
+                    result['error'] = ''
+                except requests.RequestException as e:
+                    result['status'] = None
+                    result['error'] = str(e)
+        return result
+
+    def check_all(self, urls):
+        """Check URLs concurrently and return {url: result}"""
+        urls = interleave_hosts(urls)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return dict(zip(urls, pool.map(self.check, urls)))
+
+    def close(self):
+        self.session.close()
+
+
+def check_links(root='.', pages=None, external=True, cache_path=None, workers=LINK_WORKERS,
+                per_host=PER_HOST, timeout=LINK_TIMEOUT):
+    """Check every link of the pages and return (report, number of broken links)
+
+    External results are read from and written back to the link cache;
+    only URLs without a fresh cached result are requested.
+    """
+    cache_path = cache_path or os.path.join(root, CACHE_PATH)
+    report = {'pages': {}, 'broken': 0, 'placeholders': 0}
+    references = {}
+    for page in pages or site_pages(root):
+        links, placeholders = page_links(root, page)
+        page_report = {'links': len(links), 'broken': [], 'placeholders': placeholders}
+        for url, line in links:
+            target = external_url(url)
+            if target is not None:
+                references.setdefault(target, []).append((page, line))
+            elif is_local(url) and not local_exists(local_target(root, page, url)):
+                page_report['broken'].append({'url': url, 'line': line, 'error': 'missing file'})
+        report['pages'][page] = page_report
+
+    checked = 0
+    if external and requests is None:
+        print("requests is required to check external links: pip install requests")
+        external = False
+    if external and references:
+        cache = load_cache(cache_path)
+        now = time.time()
+        stale = sorted(url for url in references if url not in cache or not is_fresh(cache[url], now))
+        if stale:
+            checker = LinkChecker(workers, per_host, timeout)
+            try:
+                cache.update(checker.check_all(stale))
+            finally:
+                checker.close()
+            save_cache(cache_path, cache)
+        checked = len(stale)
+        for url, uses in references.items():
+            result = cache[url]
+            if is_ok(result):
+                continue
+            for page, line in uses:
+                report['pages'][page]['broken'].append({
+                    'url': url, 'line': line, 'status': result['status'], 'error': result['error'],
+                })
+
+    for page_report in report['pages'].values():
+        page_report['broken'].sort(key=lambda link: link['line'])
+        report['broken'] += len(page_report['broken'])
+        report['placeholders'] += len(page_report['placeholders'])
+    report['totals'] = {
+        'pages': len(report['pages']),
+        'links': sum(page['links'] for page in report['pages'].values()),
+        'external_urls': len(references),
+        'external_checked': checked,
+        'external_cached': len(references) - checked if external else 0,
+    }
+    return report, report['broken']
@@ -0,0 +1,46 @@
+"""Conservative HTML minification for the dist stage.
+
+Comments are dropped (except conditional comments), runs of whitespace in
+text are collapsed to a single space or newline, and inline ``<style>``
+blocks are minified. Whitespace is never removed outright, since it is
+significant between inline elements, and the contents of ``<pre>``,
+``<textarea>`` and ``<script>`` are left untouched.
+"""
+
+import re
+
+from sitebuild.css import minify
+
+TOKEN_RE = re.compile(
+    r'<!--.*?-->'
+    r'|<(pre|textarea|script|style)\b[^>]*>.*?</\1\s*>'
+    r'|<[^>]*>'
+    r'|[^<]+'
+    r'|<',
+    re.I | re.S)
+STYLE_RE = re.compile(r'(<style\b[^>]*>)(.*?)(</style\s*>)', re.I | re.S)
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def collapse(match):
+    return '\n' if '\n' in match.group(0) else ' '
+
+
+def minify_html(text):
+    """Return minified markup"""
+    out = []
+    for match in TOKEN_RE.finditer(text):
+        token = match.group(0)
+        if token.startswith('<!--'):
+            # Conditional comments are markup for old IE, not comments
+            if token.startswith(('<!--[if', '<!--<![endif]')):
+                out.append(token)
+        elif match.group(1):
+            if match.group(1).lower() == 'style':
+                token = STYLE_RE.sub(lambda m: m.group(1) + minify(m.group(2)) + m.group(3), token)
+            out.append(token)
+        elif token.startswith('<'):
+            out.append(token)
+        else:
+            out.append(WHITESPACE_RE.sub(collapse, token))
+    return ''.join(out)
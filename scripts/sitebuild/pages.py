@@ -0,0 +1,217 @@
+"""Incremental build of templated pages.
+
+Every page is described by a data file ``_data/pages/<page>.json``. A page
+with a ``template`` is rendered whole and written to ``<page>.html`` at the
+site root. A member's scraped publications, if any, are read from
+``_data/publications/<page>.json`` into ``publications``.
+
+The hand-written top-level pages instead name ``regions``: a map from the
+name of a marked region of the page (``<!-- site-head:begin -->`` ...
+``<!-- site-head:end -->``, see pubupdater.splice) to the partial rendered
+into it. Only the bytes between the markers are replaced, so the shared
+<head> links, logos and navigation come from ``_templates/partials/``
+while each page's body stays in the page, where the publication updater
+and the image stage keep editing it. ``nav`` is ``site.nav`` with the
+entry of the page (or of its ``active`` page) marked active.
+
+The build keeps a manifest of the content hash of every input a page was
+rendered from (its data files, ``_data/site.json`` and each template or
+partial it used), which forms the template -> page and data -> page
+dependency graph. A rebuild only re-renders pages with a changed input,
+and independent pages are rendered in parallel on a process pool.
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from pubupdater.splice import marker_bytes, splice_region
+from sitebuild.templates import TemplateError, TemplateLoader
+
+TEMPLATE_DIR = '_templates'
+DATA_DIR = '_data'
+PAGES_DIR = os.path.join(DATA_DIR, 'pages')
+SITE_DATA = os.path.join(DATA_DIR, 'site.json')
+PUBLICATIONS_DIR = os.path.join(DATA_DIR, 'publications')
+MANIFEST_PATH = os.path.join('_build', 'pages.json')
+
+
+def file_hash(path):
+    """Return the content hash of a file, or None if it does not exist"""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()[:16]
+    except FileNotFoundError:
+        return None
+
+
+def load_json(path, default=None):
+    """Load a JSON file, returning default when it does not exist"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+
+def write_json(path, data):
+    """Write a JSON file, creating its directory if needed"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+        f.write('\n')
+
+
+def discover_pages(root='.'):
+    """Return {output page: data file} for every page data file"""
+    pages_dir = os.path.join(root, PAGES_DIR)
+    if not os.path.isdir(pages_dir):
+        return {}
+    return {
+        page_name(name): os.path.join(PAGES_DIR, name)
+        for name in sorted(os.listdir(pages_dir))
+        if name.endswith('.json')
+    }
+
+
+def publications_path(data_path):
+    """Return the publication data file belonging to a page data file"""
+    return os.path.join(PUBLICATIONS_DIR, os.path.basename(data_path))
+
+
+def page_name(data_path):
+    """Return the output page of a page data file"""
+    return os.path.splitext(os.path.basename(data_path))[0] + '.html'
+
+
+def render_regions(root, page, loader, regions, context):
+    """Render partials into the marked regions of an existing page
+
+    Returns (html bytes, paths of the templates used).
+    """
+    with open(os.path.join(root, page), 'rb') as f:
+        output = f.read()
+    used = []
+    for name, template in sorted(regions.items()):
+        text, region_used = loader.render(template, context)
+        spliced = splice_region(output, name, b'\n' + text.encode('utf-8'))
+        if spliced is None:
+            raise TemplateError(f"{page}: missing {marker_bytes(name, 'begin').decode()} "
+                                f"or {marker_bytes(name, 'end').decode()} marker")
+        output = spliced
+        used.extend(path for path in region_used if path not in used)
+    return output, used
+
+
+def render_page(root, data_path):
+    """Render one page and return (html bytes, relative paths of its inputs)
+
+    Runs in a worker process, so it only takes and returns plain values.
+    """
+    page = page_name(data_path)
+    data = load_json(os.path.join(root, data_path))
+    site = load_json(os.path.join(root, SITE_DATA), {})
+    active = data.get('active', page)
+    context = dict(data, site=site, nav=[dict(item, active=item['href'] == active) for item in site.get('nav', [])])
+    context.setdefault('publications', load_json(os.path.join(root, publications_path(data_path)), []))
+    loader = TemplateLoader(os.path.join(root, TEMPLATE_DIR))
+    if 'regions' in data:
+        output, used = render_regions(root, page, loader, data['regions'], context)
+    else:
+        text, used = loader.render(data['template'], context)
+        output = text.encode('utf-8')
+    inputs = [data_path, SITE_DATA, publications_path(data_path)] + [os.path.relpath(path, root) for path in used]
+    return output, inputs
+
+
+def stale_reason(root, page, data_path, entry, hashes):
+    """Return why a page must be rebuilt, or None if it is up to date"""
+    if entry is None:
+        return "new page"
+    if data_path not in entry['inputs']:
+        return f"data file moved to {data_path}"
+    if publications_path(data_path) not in entry['inputs']:
+        return "publications were not an input yet"
+    for path, recorded in entry['inputs'].items():
+        if path not in hashes:
+            hashes[path] = file_hash(os.path.join(root, path))
+        if hashes[path] != recorded:
+            return f"{path} changed"
+    if file_hash(os.path.join(root, page)) != entry['output']:
+        return "output was modified or removed"
+    return None
+
+
+def dependents(manifest):
+    """Invert the manifest into {input file: [pages built from it]}"""
+    graph = {}
+    for page, entry in sorted(manifest.items()):
+        for path in entry['inputs']:
+            graph.setdefault(path, []).append(page)
+    return graph
+
+
+def build_pages(root='.', force=False, jobs=None, dry_run=False):
+    """Rebuild every templated page whose inputs changed
+
+    Returns the list of pages whose output was (or, on a dry run, would
+    be) rewritten.
+    """
+    manifest_path = os.path.join(root, MANIFEST_PATH)
+    manifest = load_json(manifest_path, {})
+    pages = discover_pages(root)
+
+    hashes = {}
+    stale = []
+    for page, data_path in pages.items():
+        reason = "forced" if force else stale_reason(root, page, data_path, manifest.get(page), hashes)
+        if reason:
+            print(f"{page}: {reason}")
+            stale.append(page)
+
+    print(f"{len(stale)} of {len(pages)} pages need rebuilding")
+    if not stale or dry_run:
+        return stale
+
+    jobs = jobs or os.cpu_count() or 1
+    data_paths = [pages[page] for page in stale]
+    try:
+        if jobs > 1 and len(stale) > 1:
+            with ProcessPoolExecutor(max_workers=min(jobs, len(stale))) as pool:
+                results = list(pool.map(render_page, [root] * len(stale), data_paths))
+        else:
+            results = [render_page(root, data_path) for data_path in data_paths]
+    except (TemplateError, KeyError, ValueError, OSError) as e:
+        print(f"Error building pages: {e}")
+        return None
+
+    written = []
+    for page, (output, inputs) in zip(stale, results):
+        output_path = os.path.join(root, page)
+        try:
+            with open(output_path, 'rb') as f:
+                unchanged = f.read() == output
+        except FileNotFoundError:
+            unchanged = False
+
+        if not unchanged:
+            with open(output_path, 'wb') as f:
+                f.write(output)
+            written.append(page)
+            print(f"Built {page}")
+
+        manifest[page] = {
+            'inputs': {path: file_hash(os.path.join(root, path)) for path in inputs},
+            'output': hashlib.sha256(output).hexdigest()[:16],
+        }
+
+    # Forget pages whose data file was removed
+    for page in set(manifest) - set(pages):
+        del manifest[page]
+
+    write_json(manifest_path, manifest)
+    print(f"Wrote {len(written)} pages, {len(stale) - len(written)} were already up to date")
+    return written
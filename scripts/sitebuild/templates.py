@@ -0,0 +1,131 @@
+"""Minimal template engine for the site's shared page templates.
+
+Supported syntax::
+
+    {{ name }}                      insert a value (not escaped: data is trusted HTML)
+    {{ item.field }}                dotted lookup into dicts
+    {% include "partials/x.html" %} insert another template
+    {% for item in items %}...{% endfor %}
+    {% if name %}...{% else %}...{% endif %}
+
+A block tag that sits alone on its line swallows that line, so templates
+can be indented naturally without leaving blank lines in the output.
+"""
+
+import os
+import re
+
+BLOCK_LINE_RE = re.compile(r'^[ \t]*({%.*?%})[ \t]*\n', re.M)
+TOKEN_RE = re.compile(r'{%\s*(.+?)\s*%}|{{\s*(.+?)\s*}}', re.S)
+
+
+class TemplateError(Exception):
+    """Raised for malformed templates or missing values"""
+
+
+def parse(text, name='<string>'):
+    """Parse template text into a list of nodes"""
+    text = BLOCK_LINE_RE.sub(r'\1', text)
+    root = []
+    stack = [('root', root)]
+    pos = 0
+
+    for match in TOKEN_RE.finditer(text):
+        if match.start() > pos:
+            stack[-1][1].append(('text', text[pos:match.start()]))
+        pos = match.end()
+
+        if match.group(2) is not None:
+            stack[-1][1].append(('var', match.group(2)))
+            continue
+
+        words = match.group(1).split()
+        tag = words[0]
+        if tag == 'include' and len(words) == 2:
+            stack[-1][1].append(('include', words[1].strip('"\'')))
+        elif tag == 'for' and len(words) == 4 and words[2] == 'in':
+            body = []
+            stack[-1][1].append(('for', words[1], words[3], body))
+            stack.append(('for', body))
+        elif tag == 'if' and len(words) == 2:
+            body = []
+            orelse = []
+            stack[-1][1].append(('if', words[1], body, orelse))
+            stack.append(('if', body, orelse))
+        elif tag == 'else' and len(words) == 1 and stack[-1][0] == 'if':
+            stack[-1] = ('else', stack[-1][2])
+        elif tag == 'endfor' and stack[-1][0] == 'for':
+            stack.pop()
+        elif tag == 'endif' and stack[-1][0] in ('if', 'else'):
+            stack.pop()
+        else:
+            raise TemplateError(f"{name}: unexpected tag '{match.group(0)}'")
+
+    if len(stack) > 1:
+        raise TemplateError(f"{name}: unclosed '{stack[-1][0]}' block")
+    if pos < len(text):
+        root.append(('text', text[pos:]))
+    return root
+
+
+def lookup(context, expr, name):
+    """Resolve a dotted expression against the context"""
+    value = context
+    for part in expr.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            raise TemplateError(f"{name}: undefined value '{expr}'")
+        value = value[part]
+    return value
+
+
+class TemplateLoader:
+    """Loads templates from a directory and records which files each render used"""
+
+    def __init__(self, root):
+        self.root = root
+        self.cache = {}
+
+    def path(self, name):
+        return os.path.join(self.root, name)
+
+    def load(self, name):
+        if name not in self.cache:
+            try:
+                with open(self.path(name), 'r', encoding='utf-8') as f:
+                    self.cache[name] = parse(f.read(), name)
+            except OSError as e:
+                raise TemplateError(f"Cannot load template {name}: {e}")
+        return self.cache[name]
+
+    def render(self, name, context):
+        """Render a template, returning (text, paths of every template used)"""
+        used = []
+        out = []
+        self._render_template(name, context, out, used)
+        return ''.join(out), used
+
+    def _render_template(self, name, context, out, used):
+        if self.path(name) not in used:
+            used.append(self.path(name))
+        self._render_nodes(self.load(name), context, out, used, name)
+
+    def _render_nodes(self, nodes, context, out, used, name):
+        for node in nodes:
+            kind = node[0]
+            if kind == 'text':
+                out.append(node[1])
+            elif kind == 'var':
+                out.append(str(lookup(context, node[1], name)))
+            elif kind == 'include':
+                self._render_template(node[1], context, out, used)
+            elif kind == 'for':
+                _, var, expr, body = node
+                for item in lookup(context, expr, name):
+                    self._render_nodes(body, dict(context, **{var: item}), out, used, name)
+            elif kind == 'if':
+                _, expr, body, orelse = node
+                try:
+                    value = lookup(context, expr, name)
+                except TemplateError:
+                    value = None
+                self._render_nodes(body if value else orelse, context, out, used, name)
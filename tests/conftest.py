@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(TESTS_DIR)
+
+# The updater packages are imported from scripts/, as the scripts do
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+sys.path.insert(0, TESTS_DIR)
+
+from scholar_stub import ScholarStub  # noqa: E402
+
+
+@pytest.fixture
+def scholar():
+    """A running Scholar stand-in serving the fixture profiles"""
+    with ScholarStub() as stub:
+        yield stub
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    """Keep retry backoff short so failure tests do not sleep for seconds"""
+    monkeypatch.setattr('pubupdater.details.BACKOFF', 0.01)
@@ -0,0 +1,185 @@
+"""Local stand-in for Google Scholar's profile and publication pages.
+
+Serves the listing and detail pages of the profiles in
+``fixtures/scholar/profiles.json`` from the trimmed Scholar page templates
+next to it, paginated by ``cstart`` and ``pagesize`` and, with
+``sortby=pubdate``, sorted newest first like the real listing. Failures can be scripted per request, and every request is
+logged with its timing so tests can check pacing and concurrency. Run it
+directly to point the updater at it by hand::
+
+    python tests/scholar_stub.py --port 8765
+    SCHOLAR_BASE_URL=http://127.0.0.1:8765 python scripts/update_publications.py \
+        --scholar-id LAB0AAAAJ
+"""
+
+import argparse
+import copy
+import html
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from string import Template
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'scholar')
+
+LAB_ID = 'LAB0AAAAJ'
+MEMBER_ID = 'MEM1AAAAJ'
+
+
+def load_template(name):
+    with open(os.path.join(FIXTURES_DIR, name), 'r', encoding='utf-8') as f:
+        return Template(f.read())
+
+
+def load_profiles():
+    """Return the fixture profiles, {scholar id: {name, stats, rows}}"""
+    with open(os.path.join(FIXTURES_DIR, 'profiles.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class ScholarStub:
+    """A threaded HTTP server answering like Scholar, for one test"""
+
+    def __init__(self, profiles=None, delay=0.0, port=0):
+        self.profiles = copy.deepcopy(load_profiles() if profiles is None else profiles)
+        self.delay = delay
+        self.listing = load_template('listing.html')
+        self.row = load_template('row.html')
+        self.detail = load_template('detail.html')
+        self.failures = []
+        self.requests = []
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), self.handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def fail(self, statuses, **params):
+        """Answer the next requests matching every given query parameter with statuses, in order"""
+        with self.lock:
+            self.failures.append((params, list(statuses)))
+
+    def hits(self, **params):
+        """Return the logged requests matching every given query parameter"""
+        with self.lock:
+            return [request for request in self.requests
+                    if all(request['params'].get(key) == str(value) for key, value in params.items())]
+
+    def scripted_status(self, params):
+        with self.lock:
+            for match, statuses in self.failures:
+                if statuses and all(params.get(key) == str(value) for key, value in match.items()):
+                    return statuses.pop(0)
+        return None
+
+    def render_listing(self, params):
+        user = params.get('user', '')
+        profile = self.profiles.get(user)
+        if profile is None:
+            return 404, "Profile not found"
+        cstart = int(params.get('cstart', 0))
+        page_size = int(params.get('pagesize', 20))
+        rows = profile['rows']
+        if params.get('sortby') == 'pubdate':
+            rows = sorted(rows, key=lambda row: int(row['year'] or 0), reverse=True)
+        page = rows[cstart:cstart + page_size]
+        stats = dict(zip(('citations_all', 'citations_recent', 'h_all', 'h_recent', 'i10_all', 'i10_recent'),
+                         profile['stats']))
+        body = self.listing.substitute(
+            name=html.escape(profile['name']),
+            rows=''.join(self.render_row(user, row) for row in page),
+            disabled=' disabled=""' if cstart + page_size >= len(rows) else '',
+            **stats,
+        )
+        return 200, body
+
+    def render_row(self, user, row):
+        return self.row.substitute(
+            user=user, id=row['id'], title=html.escape(row['title'], quote=False),
+            authors=html.escape(row['authors'], quote=False), venue=html.escape(row['venue'], quote=False),
+            year=row['year'], citations=row['citations'],
+        ).strip()
+
+    def render_detail(self, params):
+        user, _, pub_id = params.get('citation_for_view', '').partition(':')
+        for row in self.profiles.get(user, {}).get('rows', []):
+            if row['id'] == pub_id:
+                return 200, self.detail.substitute(
+                    id=pub_id, title=html.escape(row['title'], quote=False), year=row['year'],
+                    full_authors=html.escape(row.get('full_authors', row['authors']), quote=False),
+                )
+        return 404, "Publication not found"
+
+    def respond(self, method, path):
+        parts = urlsplit(path)
+        params = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        entry = {'method': method, 'path': path, 'params': params, 'start': time.monotonic()}
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            if self.delay:
+                time.sleep(self.delay)
+            status = self.scripted_status(params)
+            if status is not None:
+                body = f"Scripted {status}"
+            elif parts.path != '/citations':
+                status, body = 404, "Not found"
+            elif params.get('view_op') == 'view_citation':
+                status, body = self.render_detail(params)
+            else:
+                status, body = self.render_listing(params)
+        finally:
+            with self.lock:
+                self.active -= 1
+                entry.update(status=status, end=time.monotonic())
+                self.requests.append(entry)
+        return status, body.encode('utf-8')
+
+    def handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                status, body = stub.respond('GET', self.path)
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve the Scholar fixture profiles locally")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--delay', type=float, default=0.0, help="seconds to wait before each response")
+    args = parser.parse_args()
+    with ScholarStub(delay=args.delay, port=args.port) as stub:
+        print(f"Serving {', '.join(stub.profiles)} at {stub.url}")
+        try:
+            stub.thread.join()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,55 @@
+import pytest
+
+from sitebuild import audit
+
+PAGE = '''<html><body>
+<picture data-generated><source type="image/avif" srcset="images/a.avif 640w"><source type="image/webp" srcset="images/a-320.webp 320w, images/a-640.webp 640w" sizes="300px"><img src="images/a.jpg" srcset="images/a-320.jpg 320w" sizes="300px" width="300"></picture>
+<img src="images/b-1x.png" srcset="images/b-1x.png 1x, images/b-2x.png 2x">
+<img src="images/c.png">
+</body></html>
+'''
+
+FILES = {
+    'a.jpg': 1000, 'a.avif': 200, 'a-320.webp': 400, 'a-640.webp': 900, 'a-320.jpg': 500,
+    'b-1x.png': 300, 'b-2x.png': 700, 'c.png': 100,
+}
+
+
+@pytest.fixture
+def site(tmp_path):
+    (tmp_path / 'images').mkdir()
+    for name, size in FILES.items():
+        (tmp_path / 'images' / name).write_bytes(b'\0' * size)
+    (tmp_path / 'page.html').write_text(PAGE, encoding='utf-8')
+    return tmp_path
+
+
+def assets(report):
+    return sorted(asset['path'] for asset in report['largest_assets'])
+
+
+def test_picture_and_srcset_count_the_candidate_a_browser_fetches(site):
+    report = audit.audit_page(str(site), 'page.html')
+
+    # The unsupported AVIF source is skipped; the WebP source wins over the <img>
+    assert assets(report) == ['images/a-320.webp', 'images/b-1x.png', 'images/c.png']
+    assert report['requests'] == 4
+    assert report['transfer_bytes'] == len(PAGE.encode('utf-8')) + 400 + 300 + 100
+
+
+def test_higher_density_screens_pick_larger_candidates(site, monkeypatch):
+    monkeypatch.setattr(audit, 'DEVICE_PIXEL_RATIO', 2)
+    report = audit.audit_page(str(site), 'page.html')
+
+    assert assets(report) == ['images/a-640.webp', 'images/b-2x.png', 'images/c.png']
+
+
+@pytest.mark.parametrize('srcset, attrs, expected', [
+    ('s.jpg 320w, m.jpg 640w, l.jpg 1280w', {'sizes': '(max-width: 600px) 100vw, 500px'}, 'm.jpg'),
+    ('s.jpg 320w, m.jpg 640w', {'sizes': '2000px'}, 'm.jpg'),
+    ('s.jpg 320w, l.jpg 1280w', {'sizes': '50vw'}, 'l.jpg'),
+    ('s.jpg 320w, m.jpg 640w', {'width': '300'}, 's.jpg'),
+    ('one.jpg', {}, 'one.jpg'),
+])
+def test_pick_candidate(srcset, attrs, expected):
+    assert audit.pick_candidate(srcset, attrs) == expected
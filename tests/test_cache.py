@@ -0,0 +1,122 @@
+import json
+
+from pubupdater.cache import DAY, PublicationCache, listing_hash, publication_id, refresh_publications
+
+NOW = 1_800_000_000
+
+
+def row(cid='abc', title='Edge-Assisted Perception', citations='5', **fields):
+    return {'citation_id': cid, 'title': title, 'authors': 'S Baidya, MH Uddin', 'venue': 'IEEE TMC',
+            'year': '2024', 'citations': citations, **fields}
+
+
+def cached(tmp_path, **kwargs):
+    return PublicationCache(str(tmp_path / 'cache.json'), **kwargs)
+
+
+def test_hit_by_citation_id_takes_the_listing_citation_count(tmp_path):
+    cache = cached(tmp_path)
+    cache.store(row(), dict(row(), authors='Sabur Baidya, Mohammad Helal Uddin'), now=NOW)
+
+    record = cache.lookup(row(citations='9'), now=NOW + DAY)
+
+    assert record['authors'] == 'Sabur Baidya, Mohammad Helal Uddin'
+    assert record['citations'] == '9'
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_rows_without_a_citation_id_are_keyed_by_title(tmp_path):
+    cache = cached(tmp_path)
+    pub = row(cid='', title='Edge-Assisted  Perception!')
+    cache.store(pub, dict(pub, pdf_link='https://example.org/p.pdf'), now=NOW)
+
+    assert publication_id(pub) == 'title:edge assisted perception'
+    assert list(cache.entries) == ['title:edge assisted perception']
+    assert cache.lookup(row(cid='', title='Edge Assisted Perception'), now=NOW) is None
+    assert cache.lookup(pub, now=NOW)['pdf_link'] == 'https://example.org/p.pdf'
+
+
+def test_entries_expire_after_max_age(tmp_path):
+    cache = cached(tmp_path, max_age_days=30)
+    cache.store(row(), row(), now=NOW)
+
+    assert cache.lookup(row(), now=NOW + 29 * DAY) is not None
+    assert cache.lookup(row(), now=NOW + 31 * DAY) is None
+
+    forever = cached(tmp_path, max_age_days=0)
+    forever.store(row(), row(), now=NOW)
+    assert forever.lookup(row(), now=NOW + 3650 * DAY) is not None
+
+
+def test_listing_hash_ignores_citation_counts_only(tmp_path):
+    assert listing_hash(row(citations='5')) == listing_hash(row(citations='500'))
+    assert listing_hash(row()) != listing_hash(row(venue='IEEE INFOCOM'))
+
+    cache = cached(tmp_path)
+    cache.store(row(), row(), now=NOW)
+    assert cache.lookup(row(year='2025'), now=NOW) is None
+
+
+def test_evict_drops_only_entries_missing_from_the_listing(tmp_path):
+    cache = cached(tmp_path)
+    for cid in ('a', 'b', 'c'):
+        cache.store(row(cid), row(cid), now=NOW)
+    cache.save()
+
+    # The next run lists a and c
+    cache = cached(tmp_path)
+    cache.load()
+    cache.lookup(row('a'), now=NOW)
+    cache.lookup(row('c', year='2025'), now=NOW)
+
+    assert cache.evict() == 1
+    assert sorted(cache.entries) == ['a', 'c']
+    assert cache.save()
+    assert sorted(json.loads((tmp_path / 'cache.json').read_text())['entries']) == ['a', 'c']
+
+
+def test_evict_without_a_listing_keeps_everything(tmp_path):
+    cache = cached(tmp_path)
+    cache.store(row('a'), row('a'), now=NOW)
+    cache.seen.clear()
+
+    assert cache.evict() == 0
+    assert list(cache.entries) == ['a']
+
+
+def test_evict_trims_to_the_newest_entries(tmp_path):
+    cache = cached(tmp_path, max_entries=2)
+    for age, cid in enumerate(('a', 'b', 'c')):
+        cache.store(row(cid), row(cid), now=NOW - age * DAY)
+
+    assert cache.evict() == 1
+    assert sorted(cache.entries) == ['a', 'b']
+
+
+def test_hits_leave_the_file_alone(tmp_path):
+    cache = cached(tmp_path)
+    cache.store(row(), row(), now=NOW)
+    cache.save()
+
+    cache = cached(tmp_path)
+    cache.load()
+    cache.lookup(row())
+    assert cache.evict() == 0
+    assert not cache.save()
+
+
+def test_refresh_fills_only_misses(tmp_path):
+    cache = cached(tmp_path)
+    cache.store(row('a'), dict(row('a'), pdf_link='cached.pdf'))
+    filled = []
+
+    def fill(pub):
+        filled.append(pub['citation_id'])
+        return None if pub['citation_id'] == 'c' else dict(pub, pdf_link='fetched.pdf')
+
+    records = refresh_publications([row('a'), row('b'), row('c')], fill, cache)
+
+    assert sorted(filled) == ['b', 'c']
+    assert [record.get('pdf_link') for record in records] == ['cached.pdf', 'fetched.pdf', None]
+    # A failed fill keeps the listing row and is not cached
+    assert sorted(cache.entries) == ['a', 'b']
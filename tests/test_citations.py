@@ -0,0 +1,26 @@
+from pubupdater.citations import append_history, load_history
+
+
+def test_history_rows_are_only_appended_when_a_count_changes(tmp_path):
+    path = str(tmp_path / 'history.jsonl')
+
+    assert append_history({'a': 1, 'b': 2}, path, date='2026-01-01')
+    assert not append_history({'a': 1, 'b': 2}, path, date='2026-01-08')
+    assert append_history({'a': 1, 'b': 3}, path, date='2026-01-15')
+
+    columns, rows = load_history(path)
+    assert columns == ['a', 'b']
+    assert rows == [('2026-01-01', [1, 2]), ('2026-01-15', [1, 3])]
+
+
+def test_new_and_missing_papers_are_changes(tmp_path):
+    path = str(tmp_path / 'history.jsonl')
+    append_history({'a': 1}, path, date='2026-01-01')
+
+    assert append_history({'a': 1, 'c': 0}, path, date='2026-01-08')
+    assert append_history({'c': 0}, path, date='2026-01-15')
+    assert not append_history({'c': 0}, path, date='2026-01-22')
+
+    columns, rows = load_history(path)
+    assert columns == ['a', 'c']
+    assert rows[-1] == ('2026-01-15', [None, 0])
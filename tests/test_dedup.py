@@ -0,0 +1,72 @@
+from pubupdater.dedup import BANDS, ROWS, base_hashes, dedupe_publications, find_clusters, minhash, shingles
+
+
+def pub(title, venue='', year='2024', citations='', **fields):
+    return {'title': title, 'authors': 'S Baidya', 'venue': venue, 'year': year, 'citations': citations, **fields}
+
+
+PREPRINT = pub('Edge-Assisted Perception for Connected Vehicles', 'arXiv preprint arXiv:2401.01234', '2023',
+               '12', pdf_link='https://arxiv.org/pdf/2401.01234', citation_id='pre1')
+CONFERENCE = pub('Edge Assisted Perception for Connected Vehicles', 'IEEE INFOCOM 2024', '2024', '3',
+                 citation_id='conf1')
+JOURNAL = pub('Edge-Assisted Perception for Connected Vehicles', 'IEEE Transactions on Mobile Computing 23 (4)',
+              '2025', '1', citation_id='jour1')
+
+
+def test_preprint_merges_into_the_peer_reviewed_record():
+    other = pub('Digital Twins of Wireless Drone Swarms', 'IEEE MASS', '2022')
+
+    merged = dedupe_publications([PREPRINT, other, CONFERENCE])
+
+    assert len(merged) == 2
+    canonical = merged[0]
+    # The conference version wins despite fewer citations; its gaps come from the preprint
+    assert canonical['venue'] == 'IEEE INFOCOM 2024'
+    assert canonical['citation_id'] == 'conf1'
+    assert canonical['pdf_link'] == 'https://arxiv.org/pdf/2401.01234'
+    assert merged[1] is other
+
+
+def test_conference_and_journal_versions_stay_separate():
+    merged = dedupe_publications([CONFERENCE, JOURNAL])
+
+    assert [record['citation_id'] for record in merged] == ['conf1', 'jour1']
+
+
+def test_a_preprint_joins_only_one_of_two_venues():
+    clusters = find_clusters([CONFERENCE, PREPRINT, JOURNAL])
+
+    assert sorted(map(len, clusters)) == [1, 2]
+
+
+def test_numbered_parts_stay_separate():
+    part_one = pub('Scheduling in Vehicular Edge Networks: Part I', 'IEEE TMC')
+    part_two = pub('Scheduling in Vehicular Edge Networks: Part II', 'IEEE TMC')
+
+    assert dedupe_publications([part_one, part_two]) == [part_one, part_two]
+
+
+def test_listing_order_is_preserved():
+    records = [pub(f'Unrelated Study Number {word}', 'IEEE X') for word in ('Alpha', 'Kilo', 'Zulu')]
+    listing = [records[0], PREPRINT, records[1], CONFERENCE, records[2]]
+
+    merged = dedupe_publications(listing)
+
+    # The merged record takes the listing position of the first of its cluster
+    assert [record['title'] for record in merged] == [
+        records[0]['title'], CONFERENCE['title'], records[1]['title'], records[2]['title']]
+
+
+def test_preference_order_is_configurable():
+    merged = dedupe_publications([PREPRINT, CONFERENCE], prefer='citations,peer_reviewed')
+
+    assert merged[0]['citation_id'] == 'pre1'
+    assert merged[0]['venue'].startswith('arXiv')
+
+
+def test_short_titles_fill_every_signature_slot():
+    signature = minhash(base_hashes(shingles('IoT'), {}))
+
+    assert len(signature) == BANDS * ROWS
+    assert None not in signature
+    assert minhash([]) == [None] * (BANDS * ROWS)
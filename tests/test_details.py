@@ -0,0 +1,115 @@
+import threading
+import time
+
+from pubupdater.details import TokenBucket, Unlimited, fetch_all_details, with_retries
+from pubupdater.http_backend import create_session, scrape_scholar_with_http
+from scholar_stub import LAB_ID, ScholarStub
+
+
+class CountingLimiter:
+    """Wraps a limiter and counts the tokens taken from it"""
+
+    def __init__(self, limiter):
+        self.limiter = limiter
+        self.acquired = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        self.limiter.acquire()
+        with self.lock:
+            self.acquired += 1
+
+
+def listing(stub, scholar_id=LAB_ID):
+    return scrape_scholar_with_http(scholar_id, base_url=stub.url, limiter=Unlimited())
+
+
+def detail_requests(stub):
+    return [request for request in stub.requests if request['params'].get('view_op') == 'view_citation']
+
+
+def test_details_are_filled_from_the_detail_pages(scholar):
+    records = fetch_all_details(listing(scholar), limiter=Unlimited())
+
+    assert records[0]['authors'] == 'Sabur Baidya, Mohammad Helal Uddin'
+    assert records[0]['pdf_link'] == 'https://arxiv.org/pdf/u1x2.pdf'
+    assert len(detail_requests(scholar)) == 7
+
+
+def test_details_are_fetched_concurrently():
+    with ScholarStub(delay=0.2) as stub:
+        rows = listing(stub)
+        start = time.monotonic()
+        fetch_all_details(rows, limiter=Unlimited(), max_workers=4)
+        elapsed = time.monotonic() - start
+
+    # Seven 0.2 s pages on four workers take two rounds, not seven
+    assert stub.peak == 4
+    assert elapsed < 7 * 0.2 / 2
+
+
+def test_token_bucket_caps_the_request_rate(scholar):
+    rows = listing(scholar)
+    limiter = TokenBucket(rate=20, capacity=2)
+    fetch_all_details(rows, limiter=limiter, max_workers=8)
+
+    starts = sorted(request['start'] for request in detail_requests(scholar))
+    # Two requests fit in the burst, the other five wait for tokens at 20/s
+    assert starts[-1] - starts[0] >= (len(starts) - 2) / 20 * 0.9
+
+
+def test_token_bucket_refills_at_its_rate():
+    bucket = TokenBucket(rate=50, capacity=1)
+    start = time.monotonic()
+    for _ in range(11):
+        bucket.acquire()
+    assert time.monotonic() - start >= 10 / 50 * 0.9
+
+
+def test_failed_detail_pages_are_retried_with_backoff(scholar):
+    rows = listing(scholar)
+    scholar.fail([503, 429], citation_for_view=f'{LAB_ID}:k9p4')
+    records = fetch_all_details(rows, limiter=Unlimited())
+
+    retried = scholar.hits(citation_for_view=f'{LAB_ID}:k9p4')
+    assert [request['status'] for request in retried] == [503, 429, 200]
+    assert retried[1]['start'] - retried[0]['end'] >= 0.01
+    assert retried[2]['start'] - retried[1]['end'] >= 0.02
+    assert records[1]['pdf_link'] == 'https://arxiv.org/pdf/k9p4.pdf'
+
+
+def test_client_errors_are_not_retried(scholar):
+    rows = listing(scholar)
+    scholar.fail([404], citation_for_view=f'{LAB_ID}:k9p4')
+    records = fetch_all_details(rows, limiter=Unlimited())
+
+    assert len(scholar.hits(citation_for_view=f'{LAB_ID}:k9p4')) == 1
+    # The listing row is kept without details
+    assert records[1]['pdf_link'] == ''
+
+
+def test_retries_draw_from_the_shared_limiter(scholar):
+    scholar.fail([429, 429], user=LAB_ID, cstart=0)
+    scholar.fail([429, 503], citation_for_view=f'{LAB_ID}:u1x2')
+    limiter = CountingLimiter(Unlimited())
+
+    rows = scrape_scholar_with_http(LAB_ID, base_url=scholar.url, session=create_session(), limiter=limiter)
+    fetch_all_details(rows, limiter=limiter)
+
+    # Every request that reached the server, retries included, took a token
+    assert len(scholar.requests) == 3 + 9
+    assert limiter.acquired == len(scholar.requests)
+
+
+def test_with_retries_gives_up_after_the_last_retry():
+    calls = []
+
+    def fail():
+        calls.append(1)
+        raise ValueError("down")
+
+    try:
+        with_retries(fail, retries=2, backoff=0, retry_on=(ValueError,))
+    except ValueError:
+        pass
+    assert len(calls) == 3
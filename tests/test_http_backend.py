@@ -0,0 +1,103 @@
+import pytest
+
+from pubupdater.details import Unlimited
+from pubupdater.http_backend import (IncompleteListing, create_session, has_more_pages, parse_publication_rows,
+                                     scrape_scholar_with_http)
+from pubupdater.members import scrape_profiles
+from scholar_stub import LAB_ID, MEMBER_ID, ScholarStub, load_profiles
+
+
+def scrape(stub, scholar_id=LAB_ID, **kwargs):
+    kwargs.setdefault('page_size', 3)
+    return scrape_scholar_with_http(scholar_id, base_url=stub.url, session=create_session(retries=0),
+                                    limiter=Unlimited(), **kwargs)
+
+
+def test_pagination_fetches_every_page_in_order(scholar):
+    publications = scrape(scholar)
+
+    rows = load_profiles()[LAB_ID]['rows']
+    assert [pub['title'] for pub in publications] == [row['title'] for row in rows]
+    assert [request['params']['cstart'] for request in scholar.hits(user=LAB_ID)] == ['0', '3', '6']
+
+
+def test_pagination_stops_when_show_more_is_disabled(scholar):
+    # Seven rows on pages of seven: the full first page must not trigger a second request
+    publications = scrape(scholar, page_size=7)
+
+    assert len(publications) == 7
+    assert len(scholar.hits(user=LAB_ID)) == 1
+
+
+def test_row_parsing(scholar):
+    first, *_, last = scrape(scholar)
+
+    assert first == {
+        'title': 'Edge-Assisted Perception for Connected Vehicles',
+        'authors': 'S Baidya, MH Uddin',
+        'venue': 'IEEE Transactions on Mobile Computing',
+        'year': '2024',
+        'url': f'{scholar.url}/citations?view_op=view_citation&hl=en&user={LAB_ID}&citation_for_view={LAB_ID}:u1x2',
+        'pdf_link': '',
+        'citations': '41',
+        'citation_id': f'{LAB_ID}:u1x2',
+    }
+    # Rows without a venue, year or citations still parse
+    assert (last['venue'], last['year'], last['citations']) == ('', 'N/A', '0')
+
+
+def test_row_parsing_unescapes_titles(scholar):
+    titles = [pub['title'] for pub in scrape(scholar)]
+    assert 'Large Language Models in the IoT Ecosystem: Security & Applications' in titles
+
+
+def test_parse_publication_rows_skips_rows_without_a_title():
+    html = ('<table><tr class="gsc_a_tr"><td class="gsc_a_t"></td></tr>'
+            '<tr class="gsc_a_tr"><td><a class="gsc_a_at" href="/x">Kept</a></td></tr></table>')
+    assert [pub['title'] for pub in parse_publication_rows(html, 'http://stub')] == ['Kept']
+
+
+@pytest.mark.parametrize('button, expected', [
+    ('<button type="button" id="gsc_bpf_more" class="gs_btnPD">', True),
+    ('<button type="button" id="gsc_bpf_more" class="gs_btnPD" disabled="">', False),
+    ('', False),
+])
+def test_has_more_pages(button, expected):
+    assert has_more_pages(f'<div id="gsc_bpf">{button}</div>') is expected
+
+
+def test_first_page_failure_returns_nothing(scholar):
+    scholar.fail([404], user=LAB_ID, cstart=0)
+    assert scrape(scholar) == []
+
+
+def test_failure_after_the_first_page_is_reported_as_incomplete(scholar):
+    # The first try and all three retries are refused
+    scholar.fail([429] * 4, user=LAB_ID, cstart=3)
+
+    with pytest.raises(IncompleteListing) as excinfo:
+        scrape(scholar)
+    assert len(excinfo.value.publications) == 3
+    assert '429' in str(excinfo.value)
+
+
+def test_listing_past_max_pages_is_incomplete(scholar):
+    with pytest.raises(IncompleteListing) as excinfo:
+        scrape(scholar, max_pages=2)
+    assert len(excinfo.value.publications) == 6
+
+
+def test_incomplete_profile_is_not_passed_off_as_scraped(monkeypatch):
+    profiles = load_profiles()
+    lab = profiles[LAB_ID]
+    lab['rows'] = [dict(lab['rows'][i % 7], id=f'p{i}', title=f'Paper {i}') for i in range(150)]
+    monkeypatch.setattr('pubupdater.members.shared_limiter', Unlimited)
+
+    with ScholarStub(profiles) as stub:
+        monkeypatch.setattr('pubupdater.http_backend.SCHOLAR_BASE_URL', stub.url)
+        stub.fail([404], user=LAB_ID, cstart=100)
+        listings = scrape_profiles({'lab': LAB_ID, 'member': MEMBER_ID})
+
+    # The lab's second page failed, so the profile counts as not scraped
+    assert listings['lab'] == []
+    assert len(listings['member']) == 3
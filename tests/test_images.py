@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+Image = pytest.importorskip('PIL.Image')
+
+from sitebuild import images  # noqa: E402
+
+
+def write_page(root, tags):
+    (root / 'page.html').write_text(f"<html><body>\n{tags}\n</body></html>\n", encoding='utf-8')
+
+
+def variants(root):
+    """Names of the written variants, ordered by format"""
+    return sorted(os.listdir(root / images.OUTPUT_DIR), key=lambda name: (name.rsplit('.', 1)[1], name))
+
+
+@pytest.fixture
+def site(tmp_path):
+    (tmp_path / 'images').mkdir()
+    return tmp_path
+
+
+def test_colour_key_transparency_gets_a_png_fallback(site):
+    # An RGB PNG whose white pixels are transparent through a tRNS colour key
+    image = Image.new('RGB', (80, 40), (255, 255, 255))
+    image.paste((200, 30, 30), (0, 0, 40, 40))
+    image.save(site / 'images' / 'key.png', transparency=(255, 255, 255))
+    write_page(site, '<img src="images/key.png" width="20">')
+
+    assert images.build_images(str(site), pages=['page.html'], jobs=1) == ['page.html']
+
+    written = variants(site)
+    assert [name.rsplit('.', 1)[1] for name in written] == ['png', 'png', 'webp', 'webp']
+    with Image.open(site / images.OUTPUT_DIR / written[0]) as variant:
+        assert variant.mode == 'RGBA'
+        assert variant.getpixel((variant.width - 1, 0))[3] == 0
+    assert 'srcset="images/resized/key-' in (site / 'page.html').read_text()
+
+
+def test_opaque_images_get_a_jpeg_fallback(site):
+    Image.new('RGB', (80, 40), (10, 120, 200)).save(site / 'images' / 'photo.png')
+    write_page(site, '<img src="images/photo.png" width="20">')
+
+    images.build_images(str(site), pages=['page.html'], jobs=1)
+
+    assert [name.rsplit('.', 1)[1] for name in variants(site)] == ['jpg', 'jpg', 'webp', 'webp']
+
+
+@pytest.mark.parametrize('mode, info, expected', [
+    ('RGB', {}, False),
+    ('RGB', {'transparency': (255, 255, 255)}, True),
+    ('L', {'transparency': 0}, True),
+    ('P', {}, False),
+    ('P', {'transparency': 0}, True),
+    ('RGBA', {}, True),
+    ('LA', {}, True),
+])
+def test_image_has_alpha(mode, info, expected):
+    image = Image.new(mode, (2, 2))
+    image.info.update(info)
+    assert images.image_has_alpha(image) is expected
@@ -0,0 +1,176 @@
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from sitebuild import links
+from sitebuild.links import LinkChecker, check_links
+
+
+class LinkServer:
+    """HTTP stand-in whose paths behave like the kinds of servers pages link to
+
+    /ok answers both methods, /no-head refuses HEAD with 405, /get-only
+    answers HEAD with 404 but GET with 200, /missing is a 404 either way,
+    and /slow/... answers after a delay. Every request is logged.
+    """
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.requests = []
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self.handler())
+        self.server.daemon_threads = True
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def status(self, method, path):
+        if path == '/no-head' and method == 'HEAD':
+            return 405
+        if path == '/get-only' and method == 'HEAD':
+            return 404
+        if path == '/missing':
+            return 404
+        return 200
+
+    def respond(self, method, path):
+        with self.lock:
+            self.requests.append((method, path))
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            if path.startswith('/slow/'):
+                time.sleep(self.delay)
+            return self.status(method, path)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+    def paths(self, method=None):
+        with self.lock:
+            return sorted(path for m, path in self.requests if method is None or m == method)
+
+    def handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def answer(self, method):
+                status = stub.respond(method, self.path)
+                body = b'' if method == 'HEAD' else b'<html></html>'
+                self.send_response(status)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_HEAD(self):
+                self.answer('HEAD')
+
+            def do_GET(self):
+                self.answer('GET')
+
+        return Handler
+
+
+@pytest.fixture
+def server():
+    with LinkServer() as stub:
+        yield stub
+
+
+def refused_url():
+    """A URL on a local port nothing listens on"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}/gone"
+
+
+def write_page(root, urls):
+    anchors = ''.join(f'<a href="{url}">link</a>\n' for url in urls)
+    (root / 'index.html').write_text(f'<html><body>\n{anchors}</body></html>\n', encoding='utf-8')
+
+
+def test_head_falls_back_to_get(server):
+    checker = LinkChecker(workers=2, per_host=2, timeout=5)
+    try:
+        results = checker.check_all([f'{server.url}/ok', f'{server.url}/no-head', f'{server.url}/get-only'])
+    finally:
+        checker.close()
+
+    assert results[f'{server.url}/ok']['method'] == 'HEAD'
+    for path in ('/no-head', '/get-only'):
+        assert results[server.url + path]['method'] == 'GET'
+        assert results[server.url + path]['status'] == 200
+    assert server.paths('GET') == ['/get-only', '/no-head']
+
+
+def test_concurrency_per_host_is_capped(server):
+    checker = LinkChecker(workers=8, per_host=2, timeout=5)
+    try:
+        results = checker.check_all([f'{server.url}/slow/{i}' for i in range(6)])
+    finally:
+        checker.close()
+
+    assert all(result['status'] == 200 for result in results.values())
+    assert server.peak == 2
+
+
+def test_broken_and_refused_links_are_reported(server, tmp_path):
+    refused = refused_url()
+    write_page(tmp_path, [f'{server.url}/ok', f'{server.url}/missing', refused, 'local.pdf'])
+
+    report, broken = check_links(tmp_path, pages=['index.html'], cache_path=str(tmp_path / 'cache.json'), timeout=5)
+
+    found = {link['url']: link for link in report['pages']['index.html']['broken']}
+    assert broken == 3
+    assert found[f'{server.url}/missing']['status'] == 404
+    assert found[refused]['status'] is None and found[refused]['error']
+    assert found['local.pdf']['error'] == 'missing file'
+    assert found[f'{server.url}/missing']['line'] == 3
+
+
+def test_only_expired_results_are_checked_again(server, tmp_path, monkeypatch):
+    urls = [f'{server.url}/ok', f'{server.url}/no-head', f'{server.url}/missing']
+    write_page(tmp_path, urls)
+    cache_path = tmp_path / 'cache.json'
+
+    report, _ = check_links(tmp_path, pages=['index.html'], cache_path=str(cache_path), timeout=5)
+    assert report['totals']['external_checked'] == 3
+
+    # A rerun is served from the cache
+    server.requests.clear()
+    report, _ = check_links(tmp_path, pages=['index.html'], cache_path=str(cache_path), timeout=5)
+    assert report['totals']['external_cached'] == 3
+    assert server.requests == []
+
+    # Age one success past the success TTL and the failure past the shorter failure TTL
+    monkeypatch.setattr(links, 'LINK_TTL_HOURS', 10)
+    monkeypatch.setattr(links, 'LINK_FAILURE_TTL_HOURS', 1)
+    cache = json.loads(cache_path.read_text())
+    now = time.time()
+    cache[urls[0]]['checked_at'] = now - 11 * 3600
+    cache[urls[1]]['checked_at'] = now - 2 * 3600
+    cache[urls[2]]['checked_at'] = now - 2 * 3600
+    cache_path.write_text(json.dumps(cache))
+
+    report, _ = check_links(tmp_path, pages=['index.html'], cache_path=str(cache_path), timeout=5)
+    assert report['totals']['external_checked'] == 2
+    assert server.paths() == ['/missing', '/missing', '/ok']
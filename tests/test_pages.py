@@ -0,0 +1,106 @@
+import json
+
+from sitebuild.pages import build_pages
+
+SITE = {'nav': [{'href': 'index.html', 'label': 'Home'}, {'href': 'gallery.html', 'label': 'Gallery'}]}
+
+HEADER = '''<ul>
+{% for item in nav %}
+<li{% if item.active %} class="active"{% endif %}><a href="{{ item.href }}">{{ item.label }}</a></li>
+{% endfor %}
+</ul>
+'''
+
+PAGE = '''<html><head><!-- site-head:begin --><!-- site-head:end --></head><body>
+<!-- site-header:begin -->
+<p>old header</p>
+<!-- site-header:end -->
+<p>Hand-written body</p>
+</body></html>
+'''
+
+REGIONS = {'site-head': 'partials/site_head.html', 'site-header': 'partials/site_header.html'}
+
+
+def write_json(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data), encoding='utf-8')
+
+
+def site(tmp_path):
+    partials = tmp_path / '_templates' / 'partials'
+    partials.mkdir(parents=True)
+    (partials / 'site_head.html').write_text('<title>{{ title }}</title>\n', encoding='utf-8')
+    (partials / 'site_header.html').write_text(HEADER, encoding='utf-8')
+    write_json(tmp_path / '_data' / 'site.json', SITE)
+    for page, data in (('index', {'title': 'Home'}), ('media', {'title': 'Media', 'active': 'gallery.html'})):
+        write_json(tmp_path / '_data' / 'pages' / f'{page}.json', dict(data, regions=REGIONS))
+        (tmp_path / f'{page}.html').write_text(PAGE, encoding='utf-8')
+    return tmp_path
+
+
+def test_regions_are_rendered_and_the_body_is_kept(tmp_path):
+    root = site(tmp_path)
+
+    assert build_pages(str(root), jobs=1) == ['index.html', 'media.html']
+
+    text = (root / 'index.html').read_text(encoding='utf-8')
+    assert '<!-- site-head:begin -->\n<title>Home</title>\n<!-- site-head:end -->' in text
+    assert 'old header' not in text
+    assert '<li class="active"><a href="index.html">Home</a></li>' in text
+    assert '<p>Hand-written body</p>' in text
+    assert text.startswith('<html><head>') and text.endswith('</body></html>\n')
+
+
+def test_active_entry_can_name_another_page(tmp_path):
+    root = site(tmp_path)
+    build_pages(str(root), jobs=1)
+
+    text = (root / 'media.html').read_text(encoding='utf-8')
+    assert '<li class="active"><a href="gallery.html">Gallery</a></li>' in text
+    assert '<li><a href="index.html">Home</a></li>' in text
+
+
+def test_partial_change_rebuilds_its_dependents_only(tmp_path):
+    root = site(tmp_path)
+    build_pages(str(root), jobs=1)
+    assert build_pages(str(root), jobs=1) == []
+
+    write_json(root / '_data' / 'pages' / 'media.json', {'title': 'Press', 'active': 'gallery.html',
+                                                         'regions': REGIONS})
+    assert build_pages(str(root), jobs=1) == ['media.html']
+
+    (root / '_templates' / 'partials' / 'site_head.html').write_text('<title>{{ title }} | Lab</title>\n')
+    assert build_pages(str(root), jobs=1) == ['index.html', 'media.html']
+    assert '<title>Press | Lab</title>' in (root / 'media.html').read_text(encoding='utf-8')
+
+
+def test_edits_outside_the_regions_survive_a_rebuild(tmp_path):
+    root = site(tmp_path)
+    build_pages(str(root), jobs=1)
+    page = root / 'index.html'
+    page.write_text(page.read_text(encoding='utf-8').replace('Hand-written body', 'New news item'),
+                    encoding='utf-8')
+
+    assert build_pages(str(root), jobs=1) == []
+    assert 'New news item' in page.read_text(encoding='utf-8')
+
+
+def test_missing_markers_fail_the_build(tmp_path):
+    root = site(tmp_path)
+    (root / 'media.html').write_text('<html><head></head><body></body></html>\n', encoding='utf-8')
+
+    assert build_pages(str(root), jobs=1) is None
+
+
+def test_template_pages_get_the_navigation(tmp_path):
+    root = site(tmp_path)
+    (root / '_templates' / 'member.html').write_text(
+        '<h1>{{ name }}</h1>\n{% include "partials/site_header.html" %}', encoding='utf-8')
+    write_json(root / '_data' / 'pages' / 'jane_doe.json', {'template': 'member.html', 'name': 'Jane Doe'})
+
+    build_pages(str(root), jobs=1)
+
+    text = (root / 'jane_doe.html').read_text(encoding='utf-8')
+    assert text.startswith('<h1>Jane Doe</h1>')
+    assert '<li><a href="gallery.html">Gallery</a></li>' in text
@@ -0,0 +1,44 @@
+import pytest
+
+from pubupdater import http_backend
+from pubupdater.probe import probe_profiles, save_fingerprints
+from scholar_stub import LAB_ID, ScholarStub, load_profiles
+
+
+@pytest.fixture
+def large_profile():
+    """The lab profile with 150 cited rows, so its listing spans two pages"""
+    profiles = load_profiles()
+    lab = profiles[LAB_ID]
+    lab['rows'] = [dict(lab['rows'][i % 6], id=f'p{i}', title=f'Paper {i}', citations=str(200 - i))
+                   for i in range(150)]
+    return profiles
+
+
+def probe(stub, monkeypatch, path):
+    monkeypatch.setattr(http_backend, 'SCHOLAR_BASE_URL', stub.url)
+    return probe_profiles({'lab': LAB_ID}, path=str(path))
+
+
+def test_unchanged_profile_matches_its_fingerprint(monkeypatch, tmp_path, large_profile):
+    path = tmp_path / 'fingerprints.json'
+    with ScholarStub(large_profile) as stub:
+        unchanged, fingerprints = probe(stub, monkeypatch, path)
+        assert not unchanged
+        save_fingerprints(fingerprints, str(path))
+
+        assert probe(stub, monkeypatch, path) == (True, fingerprints)
+        assert [request['params'].get('sortby') for request in stub.requests] == ['pubdate', 'pubdate']
+
+
+def test_new_uncited_paper_changes_the_fingerprint(monkeypatch, tmp_path, large_profile):
+    path = tmp_path / 'fingerprints.json'
+    with ScholarStub(large_profile) as stub:
+        save_fingerprints(probe(stub, monkeypatch, path)[1], str(path))
+
+        # Sorted by citations the new paper would be row 151, on the second page
+        stub.profiles[LAB_ID]['rows'].append(
+            dict(stub.profiles[LAB_ID]['rows'][0], id='new1', title='A New Paper', year='2026', citations=''))
+        unchanged, _ = probe(stub, monkeypatch, path)
+
+    assert not unchanged
@@ -0,0 +1,211 @@
+import pytest
+from bs4 import BeautifulSoup
+
+from pubupdater import render
+from pubupdater.render import (FULL_VIEW, ensure_markers, entry_hash, find_marker, patch_list, render_file,
+                               render_full_entry, splice_file, update_list)
+from pubupdater.splice import entry_digest, find_region, region_entries
+
+PAGE = '''<html><body>
+<h2>Journals &amp; Conference Proceedings</h2>
+<ol id="pub-list">{entries}</ol>
+<p>Hand-written footer</p>
+</body></html>
+'''
+
+VIEWS = [(FULL_VIEW, None)]
+
+
+def pub(n, year='2024', citations='3'):
+    return {'title': f'Paper {n} on Edge Computing', 'authors': 'S Baidya', 'venue': f'Venue {n}',
+            'year': year, 'citations': citations, 'citation_id': f'cid{n}'}
+
+
+PUBS = [pub(1), pub(2), pub(3), pub(4)]
+
+
+def titles(pub_list):
+    return [li.find(class_='pub-title').get_text() for li in pub_list.find_all('li', recursive=False)]
+
+
+def parsed(publications):
+    """A page whose list was rendered from publications through the parser"""
+    soup = BeautifulSoup(PAGE.format(entries=''), 'html.parser')
+    pub_list = soup.find('ol')
+    update_list(soup, pub_list, publications, render_full_entry, 'pubs')
+    return soup, pub_list
+
+
+def spliced(publications):
+    """The bytes of a page with a marked region rendered from publications"""
+    soup, _ = parsed(publications)
+    return splice_file(str(soup).encode('utf-8'), VIEWS, publications, report=False)
+
+
+def region(data):
+    start, end = find_region(data, 'pubs')
+    return data[start:end]
+
+
+# In-place patching of a parsed list
+
+def test_patch_unchanged_list_is_a_no_op():
+    soup, pub_list = parsed(PUBS)
+    before = str(soup)
+
+    stats = patch_list(soup, pub_list, PUBS, render_full_entry, 'pubs')
+
+    assert stats == {'inserted': 0, 'updated': 0, 'moved': 0, 'deleted': 0}
+    assert str(soup) == before
+
+
+def test_patch_inserts_new_entries_and_keeps_the_rest():
+    soup, pub_list = parsed(PUBS)
+    kept = {id(li) for li in pub_list.find_all('li')}
+    wanted = [pub(0)] + PUBS[:2] + [pub(9)] + PUBS[2:]
+
+    stats = patch_list(soup, pub_list, wanted, render_full_entry, 'pubs')
+
+    assert stats == {'inserted': 2, 'updated': 0, 'moved': 0, 'deleted': 0}
+    assert titles(pub_list) == [p['title'] for p in wanted]
+    # The existing entries are the same tags, not re-rendered copies
+    assert [id(li) in kept for li in pub_list.find_all('li')] == [False, True, True, False, True, True]
+
+
+def test_patch_moves_only_entries_off_the_longest_ordered_run():
+    soup, pub_list = parsed(PUBS)
+
+    stats = patch_list(soup, pub_list, [PUBS[3]] + PUBS[:3], render_full_entry, 'pubs')
+
+    assert stats == {'inserted': 0, 'updated': 0, 'moved': 1, 'deleted': 0}
+    assert titles(pub_list) == [p['title'] for p in [PUBS[3]] + PUBS[:3]]
+
+
+def test_patch_deletes_and_updates():
+    soup, pub_list = parsed(PUBS)
+    changed = dict(PUBS[1], venue='Another Venue')
+
+    stats = patch_list(soup, pub_list, [PUBS[0], changed, PUBS[3]], render_full_entry, 'pubs')
+
+    assert stats == {'inserted': 0, 'updated': 1, 'moved': 0, 'deleted': 1}
+    assert titles(pub_list) == [PUBS[0]['title'], PUBS[1]['title'], PUBS[3]['title']]
+    assert 'Another Venue' in pub_list.get_text()
+    # Deleted entries take their <br/> separators with them
+    assert len(pub_list.find_all('br', recursive=False)) == 3
+
+
+# Byte splicing of a marked region
+
+def test_splice_unchanged_region_keeps_identical_bytes():
+    data = spliced(PUBS)
+
+    assert splice_file(data, VIEWS, PUBS, report=False) == data
+
+
+def test_splice_insert_move_delete_only_touch_the_region():
+    data = spliced(PUBS)
+    start, end = find_region(data, 'pubs')
+    wanted = [pub(0), PUBS[3], PUBS[0], PUBS[2]]
+
+    output = splice_file(data, VIEWS, wanted, report=False)
+
+    new_start, new_end = find_region(output, 'pubs')
+    assert output[:new_start] == data[:start]
+    assert output[new_end:] == data[end:]
+    entries = region_entries(region(output))
+    assert [entry_digest(entry) for entry in entries] == [entry_hash(p) for p in wanted]
+    # The region is laid out as a fresh render of the same list would be
+    assert region(output) == region(spliced(wanted))
+
+
+def test_splice_keeps_hand_edits_of_unchanged_entries():
+    data = spliced(PUBS)
+    edited = data.replace(b'Venue 2, 2024', b'Venue 2, 2024 <em>Best paper</em>')
+
+    output = splice_file(edited, VIEWS, [pub(0)] + PUBS, report=False)
+
+    assert b'<em>Best paper</em>' in output
+    assert len(region_entries(region(output))) == 5
+
+
+def test_splice_refreshes_citation_figures_of_kept_entries():
+    data = spliced(PUBS)
+
+    output = splice_file(data, VIEWS, [PUBS[0], pub(2, citations='40')] + PUBS[2:], report=False)
+
+    assert b'data-cid="cid2">Cited by 40<' in output
+    assert output.count(b'Cited by 3') == 3
+
+
+def test_region_entries_skips_nested_lists():
+    content = b'\n<li>a<ul><li>x</li></ul></li><br/>\n<li>b</li><br/>\n'
+
+    assert region_entries(content) == [b'<li>a<ul><li>x</li></ul></li>', b'<li>b</li>']
+
+
+# Markers
+
+def test_missing_markers_fall_back_to_the_parser_and_are_added(tmp_path):
+    legacy = ''.join(f'<li><span class="pub-title">{p["title"]}</span></li><br/>' for p in PUBS[:2])
+    page = tmp_path / 'publication.html'
+    page.write_text(PAGE.format(entries=legacy), encoding='utf-8')
+    assert splice_file(page.read_bytes(), VIEWS, PUBS, report=False) is None
+
+    ok, output, _ = render_file(str(page), VIEWS, PUBS)
+
+    assert ok and find_region(output, 'pubs') is not None
+    assert b'<p>Hand-written footer</p>' in output
+    page.write_bytes(output)
+    # The next run takes the splice path and finds nothing to change
+    assert render_file(str(page), VIEWS, PUBS)[1] == output
+
+
+def test_parser_and_splice_paths_write_the_same_region(tmp_path, monkeypatch):
+    page = tmp_path / 'publication.html'
+    page.write_bytes(spliced(PUBS))
+    wanted = [pub(0), PUBS[2], PUBS[0]]
+
+    spliced_output = render_file(str(page), VIEWS, wanted)[1]
+    monkeypatch.setattr(render, 'SPLICE_ENABLED', False)
+    parsed_output = render_file(str(page), VIEWS, wanted)[1]
+
+    assert region(parsed_output) == region(spliced_output)
+
+
+def test_ensure_markers_wraps_existing_entries():
+    soup = BeautifulSoup(PAGE.format(entries='<li>a</li><br/><li>b</li><br/>'), 'html.parser')
+    pub_list = soup.find('ol')
+
+    ensure_markers(pub_list, 'pubs')
+    ensure_markers(pub_list, 'pubs')
+
+    assert str(pub_list).count('pubs:begin') == 1
+    assert str(pub_list) == '<ol id="pub-list"><!-- pubs:begin -->\n<li>a</li><br/><li>b</li><br/><!-- pubs:end --></ol>'
+
+
+def test_ensure_markers_replaces_a_lone_marker():
+    soup = BeautifulSoup(PAGE.format(entries='<!-- pubs:begin --><li>a</li>'), 'html.parser')
+    pub_list = soup.find('ol')
+
+    ensure_markers(pub_list, 'pubs')
+
+    assert find_marker(pub_list, 'pubs', 'end') is not None
+    assert str(pub_list).count('pubs:begin') == 1
+
+
+# Entry hashes
+
+@pytest.mark.parametrize('field', ['title', 'authors', 'venue', 'year', 'citation_id'])
+def test_entry_hash_follows_rendered_fields(field):
+    assert entry_hash(dict(PUBS[0], **{field: 'changed'})) != entry_hash(PUBS[0])
+
+
+def test_entry_hash_ignores_citation_counts():
+    assert entry_hash(dict(PUBS[0], citations='99')) == entry_hash(PUBS[0])
+
+
+def test_entry_hash_changes_with_the_entry_style(monkeypatch):
+    compact = entry_hash(PUBS[0])
+    monkeypatch.setattr(render, 'ENTRY_STYLE', 'inline')
+
+    assert entry_hash(PUBS[0]) != compact
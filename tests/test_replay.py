@@ -0,0 +1,76 @@
+"""End-to-end run of the updater replaying the recorded fixture cassette.
+
+``fixtures/scholar-cassette.json.gz`` holds the traffic of one update of
+the fixture lab profile, recorded against the stub server::
+
+    python tests/scholar_stub.py --port 8765
+    SCHOLAR_BASE_URL=http://127.0.0.1:8765 SCHOLAR_CASSETTE_MODE=record \
+        SCHOLAR_CASSETTE=tests/fixtures/scholar-cassette.json.gz \
+        python scripts/update_publications.py --scholar-id LAB0AAAAJ --backends http
+
+Re-record it (from a scratch copy of the pages) when the fixtures or the
+requests the updater makes change.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+
+from bs4 import BeautifulSoup
+
+from conftest import ROOT, TESTS_DIR
+from scholar_stub import LAB_ID, load_profiles
+
+CASSETTE = os.path.join(TESTS_DIR, 'fixtures', 'scholar-cassette.json.gz')
+RECORDED_BASE_URL = 'http://127.0.0.1:8765'
+
+
+def run_replay(workdir):
+    env = dict(os.environ, SCHOLAR_BASE_URL=RECORDED_BASE_URL, SCHOLAR_CASSETTE=CASSETTE)
+    env.pop('SCHOLAR_CASSETTE_MODE', None)
+    return subprocess.run(
+        [sys.executable, os.path.join(ROOT, 'scripts', 'update_publications.py'),
+         '--scholar-id', LAB_ID, '--backends', 'replay'],
+        cwd=workdir, env=env, capture_output=True, text=True, timeout=60,
+    )
+
+
+def entries(path, selector):
+    with open(path, 'r', encoding='utf-8') as f:
+        soup = BeautifulSoup(f.read(), 'html.parser')
+    return soup.select(selector)
+
+
+def test_replayed_run_renders_the_pages(tmp_path):
+    for page in ('publication.html', 'aimslab.html'):
+        shutil.copy(os.path.join(ROOT, page), tmp_path / page)
+    (tmp_path / 'scripts').mkdir()
+
+    result = run_replay(tmp_path)
+    assert result.returncode == 0, result.stdout + result.stderr
+
+    rows = load_profiles()[LAB_ID]['rows']
+    full = entries(tmp_path / 'publication.html', '#pub-list > li[data-pub]')
+    titles = [li.select_one('.pub-title').get_text() for li in full]
+    assert sorted(titles) == sorted(row['title'] for row in rows)
+    assert titles[0] == next(row['title'] for row in rows if row['id'] == 'b7q1')
+
+    # Full author lists come from the replayed detail pages
+    edge = full[titles.index('Edge-Assisted Perception for Connected Vehicles')]
+    assert 'Sabur Baidya, Mohammad Helal Uddin' in edge.get_text()
+
+    recent = entries(tmp_path / 'aimslab.html', 'li[data-pub]')
+    assert [li['data-pub'] for li in recent] == [li['data-pub'] for li in full[:len(recent)]]
+    assert len(recent) == 3
+
+    assert (tmp_path / 'publication-search.json').exists()
+
+    history = (tmp_path / 'scripts' / 'citation_history.jsonl').read_text()
+
+    # A second replay finds nothing to change
+    result = run_replay(tmp_path)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "Successfully updated" not in result.stdout
+    assert "nothing written" in result.stdout
+    assert (tmp_path / 'scripts' / 'citation_history.jsonl').read_text() == history
@@ -0,0 +1,120 @@
+import pytest
+
+from pubupdater.store import LAB_SOURCE, PublicationStore
+
+
+def pub(cid, title, year='2024', venue='IEEE INFOCOM', authors='S Baidya, MH Uddin', citations='1'):
+    return {'citation_id': cid, 'title': title, 'authors': authors, 'venue': venue, 'year': year,
+            'url': f'https://example.org/{cid}', 'pdf_link': '', 'citations': citations}
+
+
+LAB = [
+    pub('a', 'Edge Perception', '2023', 'IEEE INFOCOM 2023', citations='10'),
+    pub('b', 'Drone Swarms', '2025', 'IEEE Transactions on Mobile Computing', 'S Baidya, N Golmohammadi'),
+    pub('c', 'Federated Anomaly Detection', '2023', 'ACM SenSys', 'W Arnold, S Baidya'),
+    pub('d', 'Untitled Report', 'N/A', ''),
+]
+
+
+@pytest.fixture
+def store():
+    store = PublicationStore(':memory:')
+    store.import_publications(LAB)
+    yield store
+    store.close()
+
+
+def ids(records):
+    return [record['citation_id'] for record in records]
+
+
+def test_records_round_trip_in_the_scraped_shape(store):
+    assert store.get('a') == LAB[0]
+    assert store.get('d')['year'] == 'N/A'
+    assert store.get('missing') is None
+
+
+def test_import_upserts_and_keeps_listing_order_within_a_year(store):
+    upserted, deleted = store.import_publications([dict(LAB[0], citations='12')] + LAB[1:])
+
+    assert (upserted, deleted) == (4, 0)
+    assert len(store) == 4
+    assert store.get('a')['citations'] == '12'
+    assert ids(store.newest()) == ['b', 'a', 'c', 'd']
+    assert ids(store.newest(2)) == ['b', 'a']
+
+
+def test_complete_import_deletes_what_the_source_no_longer_lists(store):
+    assert store.import_publications(LAB[:2]) == (2, 2)
+
+    assert ids(store.newest()) == ['b', 'a']
+
+
+def test_partial_import_deletes_nothing(store):
+    new = pub('e', 'Vision-Based Gesture Control', '2026')
+
+    assert store.import_publications([new], complete=False) == (1, 0)
+    assert ids(store.newest()) == ['e', 'b', 'a', 'c', 'd']
+
+
+def test_publications_shared_with_another_source_are_kept(store):
+    store.import_publications([LAB[2], pub('m', 'Member Paper', '2022')], source='william_arnold')
+
+    store.import_publications(LAB[:2])
+
+    assert ids(store.newest()) == ['b', 'a', 'c', 'm']
+    assert ids(store.by_source(LAB_SOURCE)) == ['b', 'a']
+    assert ids(store.by_source('william_arnold')) == ['c', 'm']
+    assert store.sources() == ['lab', 'william_arnold']
+
+
+def test_queries(store):
+    assert ids(store.by_author('S Baidya')) == ['b', 'a', 'c', 'd']
+    assert ids(store.by_author('w arnold')) == ['c']
+    assert ids(store.by_author('S Baidya', limit=1)) == ['b']
+    assert ids(store.by_venue('ACM SenSys')) == ['c']
+    assert ids(store.by_venue('IEEE INFOCOM 2023')) == ['a']
+    assert ids(store.by_year(2023)) == ['a', 'c']
+    assert ids(store.by_year('2025')) == ['b']
+    assert store.by_year(1999) == []
+
+
+def test_update_citations_only_touches_changed_counts(store):
+    assert store.update_citations({'a': 10, 'b': 7, 'zzz': 3}) == 1
+    assert store.get('b')['citations'] == '7'
+
+
+def test_snapshot_round_trip_keeps_every_source(store, tmp_path):
+    path = str(tmp_path / 'snapshot.json')
+    store.import_publications([LAB[2], pub('m', 'Member Paper', '2022')], source='william_arnold')
+
+    assert store.save_snapshot(path)
+    assert not store.save_snapshot(path)
+
+    restored = PublicationStore(str(tmp_path / 'restored.db'))
+    assert restored.load_snapshot(path) == 2
+    for source in ('lab', 'william_arnold'):
+        assert restored.listing(source) == store.listing(source)
+    assert ids(restored.listing(LAB_SOURCE)) == ['a', 'b', 'c', 'd']
+    restored.close()
+
+
+def test_snapshot_lets_a_failed_source_keep_its_records(store, tmp_path):
+    path = str(tmp_path / 'snapshot.json')
+    store.import_publications([pub('m', 'Member Paper', '2022')], source='william_arnold')
+    store.save_snapshot(path)
+
+    # A new run: the member could not be scraped, only the lab is imported
+    fresh = PublicationStore(str(tmp_path / 'fresh.db'))
+    fresh.load_snapshot(path)
+    fresh.import_publications(LAB[:3])
+
+    assert ids(fresh.by_source('william_arnold')) == ['m']
+    assert fresh.get('d') is None
+    fresh.close()
+
+
+def test_missing_snapshot_loads_nothing(tmp_path):
+    store = PublicationStore(':memory:')
+    assert store.load_snapshot(str(tmp_path / 'missing.json')) == 0
+    assert len(store) == 0